@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import sys
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TextIO
+
+from main import (AI, BOARD_SIZE, MISS, SHIPS_TYPES, SHOT_MESSAGES, Board,
+                  BoardException, ConsolePrinter, Game, Player,
+                  ShotSubscriber, User)
+from records import RecordWriter
+
+if TYPE_CHECKING:
+    from board_pool import BoardPool
+    from layout_index import LayoutIndex
+
+
+class AsyncGame(Game):
+    """
+    Класс для представления игры с асинхронным игровым циклом.
+    Вместо input() и sleep() ввод читается через awaitable-функцию,
+    а паузы выполняются через asyncio.sleep, поэтому в одном
+    цикле событий могут одновременно идти несколько игр.
+
+    Атрибуты
+    --------
+    read_line : Callable
+        Асинхронная функция, возвращающая очередную строку ввода
+        пользователя; пустая строка означает конец ввода.
+    pace : float
+        Длительность пауз между сообщениями игры в секундах.
+    printers : list
+        Получатели ConsolePrinter, паузы которых игра выжидает
+        асинхронно в pause().
+
+    Методы
+    --------
+    pause():
+        Асинхронная пауза между сообщениями игры.
+    greet():
+        Приветствует пользователя и ждёт строку для старта.
+    move(Player):
+        Делает ход игрока, возвращает True, если ход остаётся за ним.
+    play():
+        Игровой цикл. Возвращает номер победителя
+        (0 - пользователь, 1 - компьютер).
+    """
+
+    def __init__(self, read_line: Callable[[], Awaitable[str]],
+                 stream: Optional[TextIO] = None,
+                 pace: float = 1.0,
+                 board_class: type[Board] = Board,
+                 ai_class: type[AI] = AI,
+                 width: int = BOARD_SIZE,
+                 height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES,
+                 ansi: bool = False,
+                 recorder: Optional[RecordWriter] = None,
+                 layouts: Optional['LayoutIndex'] = None,
+                 pool: Optional['BoardPool'] = None,
+                 seed: Optional[int] = None,
+                 subscribers: Optional[list[ShotSubscriber]] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта AsyncGame.
+
+        Атрибуты
+        --------
+        read_line : Callable
+            Асинхронная функция чтения строки ввода пользователя.
+        pace : float
+            Длительность пауз между сообщениями игры в секундах.
+        Остальные атрибуты такие же, как у Game, но сообщения
+        о результатах выстрелов игра выводит сама, поэтому
+        по умолчанию получателей результатов нет.
+        """
+
+        super().__init__(board_class, ai_class, width, height, ships_types,
+                         ansi, stream, recorder, layouts, pool, seed,
+                         subscribers or [])
+        self.read_line = read_line
+        self.pace = pace
+        self.printers = [subscriber for subscriber in self.events.subscribers
+                         if isinstance(subscriber, ConsolePrinter)]
+        for printer in self.printers:
+            printer.deferred = True
+
+    async def pause(self) -> None:
+        """
+        Асинхронная пауза между сообщениями игры вместе с паузами,
+        накопленными получателями ConsolePrinter.
+        Пока игра ждёт, цикл событий обслуживает другие игры.
+        """
+
+        # Паузы получателей ConsolePrinter тоже выжидаются здесь,
+        # а не через time.sleep(), который остановил бы цикл событий
+        owed = sum(printer.take_owed() for printer in self.printers)
+        await asyncio.sleep(self.pace + owed)
+
+    async def greet(self) -> None:
+        """
+        Приветствует пользователя и ждёт строку для старта.
+        """
+
+        self.say(Game.GREETING)
+        self.say(Game.MARKS)
+        self.say(Game.PROMPT_START, end='')
+        if not await self.read_line():
+            raise EOFError
+
+    async def move(self, player: Player) -> bool:
+        """
+        Делает ход игрока, повторяя запрос, пока выстрел не удастся.
+        Возвращает True, если игрок попал и ход остаётся за ним.
+        """
+
+        while True:
+            try:
+                if isinstance(player, User):
+                    self.say('x y = ', end='')
+                    line = await self.read_line()
+                    # Пустая строка - ввод закончился
+                    if not line:
+                        raise EOFError
+                    dot = User.parse(line)
+                else:
+                    dot = player.decide()
+                    self.say(f'x y = {dot.x + 1} {dot.y + 1}')
+                    await self.pause()
+                result = player.strike(dot)
+            except (ValueError, BoardException) as e:
+                self.say(Player.retry_message(e))
+                await self.pause()
+            else:
+                self.say(SHOT_MESSAGES[result])
+                await self.pause()
+                return result != MISS
+
+    async def play(self) -> int:
+        """
+        Игровой цикл. Очерёдность ходов та же, что в Game.loop()
+        (см. Game.turns()), но ходы делаются асинхронно.
+        Возвращает номер победителя (0 - пользователь, 1 - компьютер).
+        """
+
+        turns = self.turns()
+        player = next(turns)
+        try:
+            while True:
+                player = turns.send(await self.move(player))
+        except StopIteration as stop:
+            return stop.value
+
+
+async def stdin_reader() -> Callable[[], Awaitable[str]]:
+    """
+    Возвращает асинхронную функцию чтения строк из sys.stdin.
+    Если stdin нельзя подключить к циклу событий (например, это файл
+    или консоль Windows), строки читаются в потоке из пула.
+    """
+
+    loop = asyncio.get_running_loop()
+    try:
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (NotImplementedError, OSError, ValueError):
+        async def read_line() -> str:
+            return await loop.run_in_executor(None, sys.stdin.readline)
+        return read_line
+
+    async def read_line() -> str:
+        return (await reader.readline()).decode()
+    return read_line
+
+
+async def console(pace: float, ansi: bool) -> None:
+    """
+    Запускает одну игру пользователя с компьютером в консоли.
+    """
+
+    game = AsyncGame(await stdin_reader(), pace=pace, ansi=ansi)
+    try:
+        await game.greet()
+        await game.play()
+    except EOFError:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Морской бой с асинхронным игровым циклом.')
+    parser.add_argument('--pace', type=float, default=1.0,
+                        help='пауза между сообщениями, секунды')
+    parser.add_argument('--ansi', action='store_true',
+                        help='перерисовывать только изменившиеся клетки')
+    args = parser.parse_args()
+    asyncio.run(console(args.pace, args.ansi))
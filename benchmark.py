@@ -0,0 +1,213 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from random import Random
+from time import perf_counter_ns, strftime
+from typing import Callable, Optional
+
+import main
+from main import (SHIPS_TYPES, Board, BitBoard, Dot, Game, RandomStream,
+                  Ship)
+from simulation import play_headless
+
+
+# Сценарии: название, ширина и высота доски, флот
+SCENARIOS = [
+    ('6x6', 6, 6, SHIPS_TYPES),
+    ('10x10', 10, 10, [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]),
+    ('30x30', 30, 30, [4] * 5 + [3] * 10 + [2] * 15 + [1] * 20),
+    ('100x100', 100, 100, [4] * 20 + [3] * 40 + [2] * 60 + [1] * 80),
+]
+# Перцентили времени операции, которые попадают в отчёт
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(samples: list[int], p: float) -> int:
+    """
+    Возвращает p-й перцентиль отсортированного списка замеров.
+    """
+
+    index = min(len(samples) - 1, int(len(samples) * p / 100))
+    return samples[index]
+
+
+def measure(setup: Callable[[], tuple], operation: Callable[..., object],
+            repeat: int) -> dict[str, float]:
+    """
+    Замеряет время операции repeat раз.
+    Перед каждым замером вызывается setup(), и его результат передаётся
+    в operation как аргументы, так что подготовка не попадает в замер.
+    Затем отдельным прогоном под tracemalloc замеряется пиковая память
+    одной операции. Возвращает статистику в микросекундах и килобайтах.
+    """
+
+    samples = list()
+    for _ in range(repeat):
+        args = setup()
+        start = perf_counter_ns()
+        operation(*args)
+        samples.append(perf_counter_ns() - start)
+    samples.sort()
+    # Память замеряем отдельно: tracemalloc сильно замедляет код
+    peak = 0
+    for _ in range(min(repeat, 20)):
+        args = setup()
+        tracemalloc.start()
+        operation(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    stats = {
+        'n': repeat,
+        'mean_us': sum(samples) / repeat / 1000,
+        'max_us': samples[-1] / 1000,
+        'peak_kib': peak / 1024,
+    }
+    for p in PERCENTILES:
+        stats[f'p{p}_us'] = percentile(samples, p) / 1000
+    return stats
+
+
+def bench_scenario(width: int, height: int, ships_types: list[int],
+                   repeat: int, rng: Random) -> dict[str, dict[str, float]]:
+    """
+    Замеряет все горячие операции движка на досках одного сценария.
+    """
+
+    results = dict()
+    ships = main.place_fleet(ships_types, width, height)
+    longest = max(ships, key=lambda ship: ship.length)
+    probe = Dot(longest.bow.x, longest.bow.y)
+
+    results['Ship.dots'] = measure(lambda: (longest,),
+                                   lambda ship: ship.dots, repeat)
+    results['Ship.is_strike'] = measure(lambda: (longest, probe),
+                                        lambda ship, dot: ship.is_strike(dot),
+                                        repeat)
+
+    for board_class in (Board, BitBoard):
+        name = board_class.__name__
+
+        def filled_board() -> tuple:
+            # Доска со всеми кораблями, кроме последнего
+            board = board_class(width, height, ships_types)
+            for ship in ships[:-1]:
+                board.add_ship(ship)
+            return board, Ship(ships[-1].length, ships[-1].bow,
+                               ships[-1].direction)
+
+        results[f'{name}.add_ship'] = measure(
+            filled_board, lambda board, ship: board.add_ship(ship), repeat)
+
+        def sinking_board() -> tuple:
+            # Доска в игре, где у самого длинного корабля одна жизнь
+            board = Game.random_board(board_class, width, height, ships_types)
+            board.get_ready()
+            return (board, max(board.ships, key=lambda ship: ship.length))
+
+        results[f'{name}.mark_oreol'] = measure(
+            sinking_board,
+            lambda board, ship: board.mark_oreol(ship, is_game=True), repeat)
+
+        def shot_board() -> tuple:
+            board = Game.random_board(board_class, width, height, ships_types)
+            board.get_ready()
+            return board, Dot(rng.randrange(width), rng.randrange(height))
+
+        results[f'{name}.shot'] = measure(
+            shot_board, lambda board, dot: board.shot(dot), repeat)
+
+        results[f'{name}.random_board'] = measure(
+            lambda: (), lambda: Game.random_board(board_class, width, height,
+                                                  ships_types),
+            max(1, repeat // 10))
+
+    def boards() -> tuple:
+        pair = list()
+        for _ in range(2):
+            board = Game.random_board(BitBoard, width, height, ships_types)
+            board.get_ready()
+            pair.append(board)
+        return (pair[0], pair[1]), RandomStream(rng.getrandbits(64))
+
+    results['headless_game'] = measure(boards, play_headless,
+                                       max(1, repeat // 10))
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Сравнивает медианы времени операций с прошлым прогоном.
+    Возвращает список строк об операциях, замедлившихся больше
+    чем на долю threshold.
+    """
+
+    regressions = list()
+    for scenario, operations in current['results'].items():
+        for operation, stats in operations.items():
+            old = baseline.get('results', {}).get(scenario, {}).get(operation)
+            if not old or not old['p50_us']:
+                continue
+            ratio = stats['p50_us'] / old['p50_us']
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f'{scenario} {operation}: p50 {old["p50_us"]:.1f} -> '
+                    f'{stats["p50_us"]:.1f} мкс (x{ratio:.2f})')
+    return regressions
+
+
+def run(scenarios: list[str], repeat: int,
+        seed: Optional[int] = None) -> dict:
+    """
+    Прогоняет выбранные сценарии и возвращает отчёт для записи в JSON.
+    """
+
+    rng = Random(seed)
+    report = {
+        'timestamp': strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': dict(),
+    }
+    for name, width, height, ships_types in SCENARIOS:
+        if name in scenarios:
+            # На больших досках операции дольше, поэтому повторов меньше
+            count = max(10, repeat * 36 // (width * height))
+            report['results'][name] = bench_scenario(width, height,
+                                                     ships_types, count, rng)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Замер производительности горячих операций движка.')
+    parser.add_argument('--scenario', action='append',
+                        choices=[scenario[0] for scenario in SCENARIOS],
+                        help='сценарий (по умолчанию все)')
+    parser.add_argument('--repeat', type=int, default=1000,
+                        help='число повторов на доске 6x6')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', default='-',
+                        help='файл для отчёта в JSON (по умолчанию stdout)')
+    parser.add_argument('--compare', default=None,
+                        help='отчёт прошлого прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимое замедление медианы, доля')
+    args = parser.parse_args()
+
+    report = run(args.scenario or [scenario[0] for scenario in SCENARIOS],
+                 args.repeat, args.seed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out == '-':
+        print(text)
+    else:
+        with open(args.out, 'w', encoding='utf-8') as file:
+            file.write(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for line in regressions:
+            print('Замедление:', line, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,135 @@
+import threading
+from collections import deque
+from typing import Optional
+
+import main
+from main import BOARD_SIZE, SHIPS_TYPES, Board, Game
+
+
+class BoardPool():
+    """
+    Класс для представления запаса заранее сгенерированных досок.
+    Фоновый поток держит в запасе до size готовых к игре досок:
+    когда их остаётся меньше low, поток просыпается и пополняет
+    запас до size. Игра берёт доску из запаса за O(1) и генерирует
+    её сама, только если запас пуст.
+
+    Атрибуты
+    --------
+    board_class : type
+        Класс досок (Board или BitBoard).
+    width : int
+        Ширина досок (размер по оси x).
+    height : int
+        Высота досок (размер по оси y).
+    ships_types : list
+        Длины всех кораблей флота в порядке убывания.
+    size : int
+        Максимальное количество досок в запасе.
+    low : int
+        Количество досок, при котором запас начинает пополняться.
+    _boards : deque
+        Готовые доски.
+    _wake : threading.Event
+        Сигнал фоновому потоку пополнить запас.
+    _stopped : bool
+        Информация о том, остановлен ли фоновый поток.
+    _thread : threading.Thread
+        Фоновый поток (или None, если он ещё не запускался).
+
+    Методы
+    --------
+    start():
+        Запускает фоновый поток пополнения запаса.
+    stop():
+        Останавливает фоновый поток.
+    take():
+        Возвращает готовую доску из запаса или None, если запас пуст.
+    """
+
+    def __init__(self, board_class: type[Board] = Board,
+                 width: int = BOARD_SIZE,
+                 height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES,
+                 size: int = 64,
+                 low: int = 16) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта BoardPool.
+        """
+
+        self.board_class = board_class
+        self.width = width
+        self.height = height
+        self.ships_types = list(ships_types)
+        self.size = size
+        self.low = min(low, size)
+        self._boards = deque()
+        self._wake = threading.Event()
+        self._stopped = True
+        self._thread = None
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество досок в запасе.
+        """
+
+        return len(self._boards)
+
+    def start(self) -> 'BoardPool':
+        """
+        Запускает фоновый поток пополнения запаса.
+        Если пул только что остановлен, сначала дожидается завершения
+        прежнего потока, чтобы не запустить второй.
+        """
+
+        if self._stopped:
+            if self._thread is not None:
+                self._thread.join()
+            self._stopped = False
+            self._wake.set()
+            self._thread = threading.Thread(target=self._run,
+                                            name='board-pool', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Останавливает фоновый поток.
+        """
+
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self) -> None:
+        """
+        Цикл фонового потока: пополняет запас до size досок
+        и засыпает до сигнала take().
+        """
+
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stopped and len(self._boards) < self.size:
+                board = Game.random_board(self.board_class, self.width,
+                                          self.height, self.ships_types)
+                board.get_ready()
+                self._boards.append(board)
+            if self._stopped:
+                return
+
+    def take(self) -> Optional[Board]:
+        """
+        Возвращает готовую доску из запаса или None, если запас пуст.
+        Если досок осталось меньше low, будит фоновый поток.
+        """
+
+        try:
+            board = self._boards.popleft()
+        except IndexError:
+            board = None
+        if len(self._boards) < self.low:
+            self._wake.set()
+        if main.instrument is not None:
+            main.instrument.count('pool.miss' if board is None
+                                  else 'pool.hit')
+        return board
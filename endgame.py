@@ -0,0 +1,477 @@
+from time import perf_counter
+from typing import Optional
+
+from main import (Board, DensityAI, Dot, RandomStream, oreol_mask,
+                  ship_placements)
+from transposition import TranspositionCache
+
+
+def split_ships(mask: int, width: int, height: int) -> list[int]:
+    """
+    Разбивает битовую маску палуб на маски отдельных кораблей.
+    Палубы разных кораблей по правилам не соприкасаются,
+    поэтому каждая связная группа палуб - это отдельный корабль.
+    """
+
+    ships = list()
+    while mask:
+        ship = mask & -mask
+        while True:
+            grown = ship | (oreol_mask(ship, width, height) & mask)
+            if grown == ship:
+                break
+            ship = grown
+        ships.append(ship)
+        mask &= ~ship
+    return ships
+
+
+def consistent_layouts(fleet: list[int], width: int, height: int,
+                       hits: int, empty: int, limit: int,
+                       max_nodes: int,
+                       candidates: Optional[dict[int, list[tuple[int, int]]]]
+                       = None) -> Optional[list[tuple[int, ...]]]:
+    """
+    Перебирает расстановки кораблей fleet, согласные с увиденным:
+    корабли не заходят в клетки маски empty, накрывают все подбитые
+    палубы hits, не соприкасаются с подбитыми палубами других кораблей
+    и не состоят целиком из подбитых палуб.
+    Сначала ставятся корабли, накрывающие подбитые палубы (каждый раз -
+    младшую ещё не накрытую), затем остальные, поэтому перебор
+    не заходит в расстановки, где подбитая палуба осталась без корабля.
+    Положения кораблей берутся из candidates (для каждой длины - пары
+    масок палуб и палуб с ореолом), а если они не заданы -
+    из всех положений на доске (ship_placements).
+    Возвращает расстановки в виде кортежей масок кораблей или None,
+    если их больше limit или перебор не уложился в max_nodes шагов.
+    """
+
+    placements = dict()
+    for length in set(fleet):
+        if candidates is None:
+            pool = [(mask, blocked) for mask, blocked, *_ in
+                    ship_placements(length, width, height)]
+        else:
+            pool = candidates.get(length, [])
+        placements[length] = [
+            (mask, blocked) for mask, blocked in pool
+            if not mask & empty and mask & ~hits and
+            not blocked & ~mask & hits]
+    layouts = list()
+    chosen = list()
+    nodes = 0
+
+    def place(ships: list[int], locked: int, start: int) -> bool:
+        # Ставит корабли ships (по убыванию длины) без подбитых палуб
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            return False
+        if not ships:
+            if len(layouts) >= limit:
+                return False
+            layouts.append(tuple(chosen))
+            return True
+        length = ships[0]
+        # Для следующего корабля той же длины перебор продолжается
+        # с положения после текущего
+        same = len(ships) > 1 and ships[1] == length
+        pool = placements[length]
+        for i in range(start, len(pool)):
+            mask, blocked = pool[i]
+            if mask & locked:
+                continue
+            chosen.append(mask)
+            found = place(ships[1:], locked | blocked, i + 1 if same else 0)
+            chosen.pop()
+            if not found:
+                return False
+        return True
+
+    def cover(ships: list[int], locked: int, uncovered: int) -> bool:
+        # Ставит корабль на младшую не накрытую подбитую палубу
+        nonlocal nodes
+        if not uncovered:
+            return place(ships, locked, 0)
+        nodes += 1
+        if nodes > max_nodes:
+            return False
+        low = uncovered & -uncovered
+        for length in sorted(set(ships), reverse=True):
+            rest = list(ships)
+            rest.remove(length)
+            for mask, blocked in placements[length]:
+                if not mask & low or mask & locked:
+                    continue
+                chosen.append(mask)
+                found = cover(rest, locked | blocked, uncovered & ~mask)
+                chosen.pop()
+                if not found:
+                    return False
+        return True
+
+    return layouts if cover(sorted(fleet, reverse=True), 0, hits) else None
+
+
+class EndgameSolver():
+    """
+    Класс для точного выбора выстрела по оставшимся расстановкам флота.
+    Все расстановки считаются равновероятными; выстрел в клетку делит
+    их на группы по результату (промах, попадание или потопление
+    конкретного корабля), и ожидаемое число оставшихся выстрелов
+    E(S, H) множества расстановок S при подбитых палубах H равно
+    1 + min по клеткам суммы p * E группы. Значения подзадач
+    запоминаются в кеше ограниченного размера, а клетки перебираются
+    по убыванию вероятности палубы с отсечением по лучшему
+    найденному значению.
+
+    Атрибуты
+    --------
+    width : int
+        Ширина доски (размер по оси x).
+    height : int
+        Высота доски (размер по оси y).
+    layouts : list
+        Исходные расстановки в виде кортежей масок кораблей;
+        множество расстановок - битовая маска номеров в этом списке.
+    cache : TranspositionCache
+        Значения подзадач по ключу (множество расстановок, H).
+    _decks : list
+        Маска всех палуб каждой расстановки.
+
+    Методы
+    --------
+    filter(int, int, int):
+        Возвращает множество расстановок, согласных с увиденным.
+    targets(int, int):
+        Возвращает маску клеток, где ещё может быть палуба.
+    best_shot(int, int, float):
+        Возвращает лучшую клетку и ожидаемое число оставшихся выстрелов.
+    """
+
+    def __init__(self, width: int, height: int,
+                 layouts: list[tuple[int, ...]],
+                 cache_size: int = 1 << 16) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта EndgameSolver.
+        """
+
+        self.width = width
+        self.height = height
+        self.layouts = layouts
+        self.cache = TranspositionCache(cache_size)
+        self._decks = list()
+        for ships in layouts:
+            decks = 0
+            for ship in ships:
+                decks |= ship
+            self._decks.append(decks)
+        self._deadline = 0.0
+
+    def filter(self, hits: int, empty: int, sunk: int) -> int:
+        """
+        Возвращает множество расстановок, согласных с увиденным:
+        палубы накрывают hits, не заходят в empty, а потоплены
+        ровно те корабли, все палубы которых подбиты (их палубы - sunk).
+        """
+
+        members = 0
+        for number, ships in enumerate(self.layouts):
+            decks = self._decks[number]
+            if decks & hits != hits or decks & empty:
+                continue
+            if sum(ship for ship in ships if ship & ~hits == 0) == sunk:
+                members |= 1 << number
+        return members
+
+    def targets(self, members: int, hits: int) -> int:
+        """
+        Возвращает маску неподбитых палуб всех расстановок members:
+        клетки, которые ещё стоит рассматривать для выстрела.
+        """
+
+        decks = 0
+        while members:
+            low = members & -members
+            decks |= self._decks[low.bit_length() - 1]
+            members ^= low
+        return decks & ~hits
+
+    def best_shot(self, members: int, hits: int,
+                  deadline: float) -> Optional[tuple[int, float]]:
+        """
+        Возвращает лучшую клетку для выстрела и ожидаемое число
+        оставшихся выстрелов для множества расстановок members.
+        Если не успевает до deadline (по часам perf_counter()),
+        возвращает None; уже решённые подзадачи остаются в кеше.
+        """
+
+        if not members:
+            return None
+        self._deadline = deadline
+        try:
+            value, cell = self._solve(members, hits)
+        except TimeoutError:
+            return None
+        return (cell, value) if cell >= 0 else None
+
+    def _solve(self, members: int, hits: int) -> tuple[float, int]:
+        """
+        Возвращает E(members, hits) и лучшую клетку (-1, если
+        флот уже потоплен).
+        """
+
+        key = (members, hits)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        if perf_counter() > self._deadline:
+            raise TimeoutError
+        numbers = list()
+        rest = members
+        while rest:
+            low = rest & -rest
+            numbers.append(low.bit_length() - 1)
+            rest ^= low
+        decks = self._decks
+        # Все палубы подбиты - флот потоплен
+        if not decks[numbers[0]] & ~hits:
+            result = (0.0, -1)
+            self.cache.put(key, result)
+            return result
+        # Сколько неподбитых палуб у каждой расстановки (каждую
+        # придётся подбить, поэтому среднее по расстановкам -
+        # нижняя оценка E)
+        # и сколько расстановок ставят палубу в каждую клетку
+        left = dict()
+        counts = dict()
+        for number in numbers:
+            rest = decks[number] & ~hits
+            left[number] = bin(rest).count('1')
+            while rest:
+                low = rest & -rest
+                cell = low.bit_length() - 1
+                counts[cell] = counts.get(cell, 0) + 1
+                rest ^= low
+        total = len(numbers)
+        bound = sum(left.values()) / total
+        best, best_cell = float('inf'), -1
+        cells = sorted(counts, key=counts.get, reverse=True)
+        # У каждой расстановки осталась одна палуба: попадание
+        # заканчивает партию, а промах только убирает расстановки
+        # с палубой в этой клетке. Тогда лучше всего стрелять
+        # по убыванию числа расстановок с палубой в клетке,
+        # и E считается сразу, без перебора подзадач
+        if bound == 1:
+            value = sum(shot * counts[cell]
+                        for shot, cell in enumerate(cells, 1)) / total
+            result = (value, cells[0])
+            self.cache.put(key, result)
+            return result
+        # Палубу, которая есть во всех расстановках, всё равно придётся
+        # подбить, а выстрел в неё сразу может только добавить сведений,
+        # поэтому другие клетки можно не рассматривать
+        if counts[cells[0]] == total:
+            cells = cells[:1]
+        for cell in cells:
+            bit = 1 << cell
+            # Группы расстановок по результату выстрела: 0 - промах,
+            # -1 - попадание, маска корабля - его потопление;
+            # для каждой - номера расстановок, их количество и сумма
+            # неподбитых палуб (нижняя оценка E группы - среднее)
+            groups = dict()
+            for number in numbers:
+                outcome = 0
+                rest = left[number]
+                if decks[number] & bit:
+                    outcome = -1
+                    rest -= 1
+                    for ship in self.layouts[number]:
+                        if ship & bit:
+                            if not ship & ~(hits | bit):
+                                outcome = ship
+                            break
+                group = groups.get(outcome)
+                if group is None:
+                    groups[outcome] = [1 << number, 1, rest]
+                else:
+                    group[0] |= 1 << number
+                    group[1] += 1
+                    group[2] += rest
+            # Сначала оцениваем выстрел снизу по нижним оценкам групп,
+            # затем уточняем их по одной, пока оценка меньше лучшей
+            value = 1.0 + sum(low for _, _, low in groups.values()) / total
+            if value >= best:
+                continue
+            for outcome, (group, size, low) in groups.items():
+                exact = self._solve(group, hits if outcome == 0
+                                    else hits | bit)[0]
+                value += (size * exact - low) / total
+                if value >= best:
+                    break
+            else:
+                best, best_cell = value, cell
+                if best <= bound:
+                    break
+        result = (best, best_cell)
+        self.cache.put(key, result)
+        return result
+
+
+class EndgameAI(DensityAI):
+    """
+    Класс для представления игрока-компьютера, который стреляет
+    как DensityAI, пока согласных с увиденным расстановок
+    оставшихся кораблей много, а когда их становится не больше
+    threshold - выбирает выстрел с наименьшим ожидаемым числом
+    оставшихся выстрелов точным перебором (EndgameSolver).
+
+    Расстановки перечисляются, как только их не больше max_layouts,
+    один раз за партию, а дальше только отфильтровываются по новым
+    выстрелам. Пока возможных положений кораблей (их DensityAI
+    считает по ходу партии) больше max_placements, перечисление
+    даже не начинается, поэтому ход в середине партии и на больших
+    досках стоит столько же, сколько у DensityAI. Перечисление
+    ограничено max_nodes шагами за ход. Число подзадач поиска растёт
+    с числом клеток, где ещё может быть палуба, экспоненциально,
+    поэтому поиск включается, только если таких клеток не больше
+    max_cells, и ограничен time_budget секундами; если не уложился,
+    ход делается как у DensityAI.
+
+    Наследуемые атрибуты
+    --------
+    own_board : Board
+        Собственная доска.
+    opponent_board: Board
+        Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
+
+    Атрибуты
+    --------
+    threshold : int
+        Количество расстановок, начиная с которого включается
+        точный поиск выстрела.
+    max_placements : int
+        Количество возможных положений кораблей, начиная с которого
+        перечисляются расстановки.
+    max_layouts : int
+        Количество расстановок, начиная с которого они перечисляются.
+    max_nodes : int
+        Ограничение числа шагов перечисления расстановок за ход.
+    max_cells : int
+        Количество клеток, где ещё может быть палуба, начиная
+        с которого включается точный поиск выстрела.
+    time_budget : float
+        Время на поиск выстрела в секундах.
+    cache_size : int
+        Максимальное количество запомненных подзадач.
+    solver : EndgameSolver
+        Решатель, созданный при включении перебора (или None).
+    expected : float
+        Ожидаемое число оставшихся выстрелов после последнего
+        выбора решателя (или None, если выбор сделал DensityAI).
+
+    Методы
+    --------
+    solve():
+        Возвращает номер лучшей клетки или None, если перебор
+        не включён или не уложился в ограничения.
+    choose():
+        Выбирает клетку решателем, а если не удалось - как DensityAI.
+    """
+
+    threshold = 32
+    max_placements = 64
+    max_layouts = 1024
+    max_nodes = 5000
+    max_cells = 16
+    time_budget = 0.2
+    cache_size = 1 << 16
+
+    def __init__(self, own_board: Board, opponent_board: Board,
+                 rng: Optional[RandomStream] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта EndgameAI.
+        """
+
+        super().__init__(own_board, opponent_board, rng)
+        self.solver = None
+        self.expected = None
+        # Палубы кораблей, потопленных до включения перебора
+        self._sunk = 0
+
+    def _candidates(self) -> dict[int, list[tuple[int, int]]]:
+        """
+        Возвращает возможные по мнению DensityAI положения кораблей
+        в виде пар масок палуб и палуб с ореолом для каждой длины.
+        """
+
+        width, height = self.opponent_board.width, self.opponent_board.height
+        candidates = dict()
+        placement = self._alive.find(1)
+        while placement >= 0:
+            mask = 0
+            for cell in self._cells[placement]:
+                mask |= 1 << cell
+            candidates.setdefault(self._lengths[placement], list()).append(
+                (mask, mask | oreol_mask(mask, width, height)))
+            placement = self._alive.find(1, placement + 1)
+        return candidates
+
+    def solve(self) -> Optional[int]:
+        """
+        Возвращает номер лучшей клетки или None, если перебор
+        не включён или не уложился в ограничения.
+        Увиденное берётся из состояния доски соперника (Board.state()).
+        """
+
+        # Пока положений много, расстановок заведомо слишком много
+        if self.solver is None and self._live > self.max_placements:
+            return None
+        board = self.opponent_board
+        width, height = board.width, board.height
+        cells = width * height
+        full = (1 << cells) - 1
+        code = board.state().code
+        empty, hits = code & full, code >> cells & full
+        sunk = code >> 2 * cells
+        if self.solver is None:
+            fleet = list(board.ships_types)
+            for ship in split_ships(sunk, width, height):
+                fleet.remove(bin(ship).count('1'))
+            layouts = consistent_layouts(fleet, width, height, hits & ~sunk,
+                                         empty | sunk, self.max_layouts,
+                                         self.max_nodes, self._candidates())
+            if not layouts:
+                return None
+            self.solver = EndgameSolver(width, height, layouts,
+                                        self.cache_size)
+            self._sunk = sunk
+        # Решатель знает только корабли, не потопленные до его создания
+        hits &= ~self._sunk
+        members = self.solver.filter(hits, empty, sunk & ~self._sunk)
+        if bin(members).count('1') > self.threshold or \
+           bin(self.solver.targets(members, hits)).count('1') > \
+           self.max_cells:
+            return None
+        found = self.solver.best_shot(members, hits,
+                                      perf_counter() + self.time_budget)
+        if found is None:
+            return None
+        cell, self.expected = found
+        return cell
+
+    def choose(self) -> Dot:
+        """
+        Выбирает клетку с наименьшим ожидаемым числом оставшихся
+        выстрелов, а если перебор не включён или не уложился
+        в ограничения - как DensityAI.
+        """
+
+        self.expected = None
+        cell = self.solve()
+        if cell is None:
+            return super().choose()
+        width = self.opponent_board.width
+        return Dot(cell % width, cell // width)
@@ -0,0 +1,326 @@
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from random import getrandbits
+from time import perf_counter
+from typing import Iterable, Optional
+
+import numpy as np
+
+from main import BOARD_SIZE, MISS, SHIPS_TYPES, Game
+from records import GameRecord, board_ships, record_game
+from simulation import play_games
+
+
+class Heatmaps():
+    """
+    Класс для потокового сбора статистики по клеткам доски
+    за большое количество партий. Партии добавляются по одной
+    по мере того, как они сыграны, а статистика хранится
+    в массивах NumPy фиксированного размера, поэтому память
+    не зависит от количества партий.
+
+    Номера событий копятся в списках и раз в FLUSH событий
+    раскладываются по массивам одним вызовом np.bincount.
+    Игрок 0 - ходивший первым (в Game - пользователь),
+    игрок 1 - второй; ход игрока - номер его выстрела в партии с 1.
+
+    Атрибуты
+    --------
+    FLUSH : int
+        Количество накопленных событий, после которого
+        они раскладываются по массивам.
+    width : int
+        Ширина досок (размер по оси x).
+    height : int
+        Высота досок (размер по оси y).
+    games : int
+        Количество добавленных партий.
+    boards : int
+        Количество добавленных расстановок.
+    occupancy : np.ndarray
+        Для каждой клетки число расстановок с палубой в ней.
+    shots : np.ndarray
+        Для каждого игрока и клетки число выстрелов в неё.
+    hits : np.ndarray
+        Для каждого игрока и клетки число попаданий в неё.
+    hit_turns : np.ndarray
+        Для каждого игрока и клетки сумма ходов, на которых она подбита.
+    first_hit : np.ndarray
+        Для каждого игрока число партий, где его первое
+        попадание было на ходу i + 1.
+
+    Методы
+    --------
+    add(tuple, Iterable):
+        Добавляет партию по расстановкам досок и выстрелам.
+    add_record(GameRecord):
+        Добавляет записанную партию.
+    add_game(Game):
+        Добавляет законченную партию игры Game.
+    flush():
+        Раскладывает накопленные события по массивам.
+    merge(Heatmaps):
+        Прибавляет статистику другого объекта Heatmaps.
+    maps():
+        Возвращает тепловые карты в виде массивов (height, width).
+    save(str):
+        Записывает статистику и тепловые карты в файл .npz.
+    @staticmethod
+    load(str):
+        Загружает статистику из файла, записанного save().
+    """
+
+    FLUSH = 1 << 16
+
+    def __init__(self, width: int = BOARD_SIZE,
+                 height: int = BOARD_SIZE) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта Heatmaps.
+        """
+
+        cells = width * height
+        self.width = width
+        self.height = height
+        self.games = 0
+        self.boards = 0
+        self.occupancy = np.zeros(cells, dtype=np.int64)
+        self.shots = np.zeros((2, cells), dtype=np.int64)
+        self.hits = np.zeros((2, cells), dtype=np.int64)
+        self.hit_turns = np.zeros((2, cells), dtype=np.int64)
+        self.first_hit = np.zeros((2, cells), dtype=np.int64)
+        # Накопленные события: номера клеток с палубами, номера
+        # player * cells + cell выстрелов и попаданий, ходы попаданий
+        # и номера player * cells + ход - 1 первых попаданий
+        self._decks = list()
+        self._shots = list()
+        self._hits = list()
+        self._turns = list()
+        self._firsts = list()
+
+    def add(self, ships: tuple[tuple[tuple[int, int, int], ...], ...],
+            shots: Iterable[tuple[int, int]]) -> None:
+        """
+        Добавляет партию: начальные расстановки досок игроков
+        в виде троек (номер клетки носа, длина, направление)
+        и выстрелы по порядку в виде пар (номер клетки, результат).
+        Первым стреляет игрок 0; после промаха право хода
+        переходит сопернику.
+        """
+
+        width, cells = self.width, self.width * self.height
+        decks = self._decks
+        for board in ships:
+            for bow, length, direction in board:
+                step = width if direction else 1
+                decks.extend(range(bow, bow + length * step, step))
+        self.boards += len(ships)
+        player = 0
+        turns = [0, 0]
+        first = [True, True]
+        for cell, result in shots:
+            turns[player] += 1
+            index = player * cells + cell
+            self._shots.append(index)
+            if result == MISS:
+                player = 1 - player
+                continue
+            self._hits.append(index)
+            self._turns.append(turns[player])
+            if first[player]:
+                first[player] = False
+                self._firsts.append(player * cells + turns[player] - 1)
+        self.games += 1
+        if len(self._shots) >= self.FLUSH or len(decks) >= self.FLUSH:
+            self.flush()
+
+    def add_record(self, record: GameRecord) -> None:
+        """
+        Добавляет записанную партию (см. records.py).
+        """
+
+        self.add(record.ships, record.shots)
+
+    def add_game(self, game: Game) -> None:
+        """
+        Добавляет законченную партию игры Game.
+        """
+
+        self.add_record(record_game(game))
+
+    def flush(self) -> None:
+        """
+        Раскладывает накопленные события по массивам.
+        """
+
+        cells = self.width * self.height
+        if self._decks:
+            self.occupancy += np.bincount(self._decks, minlength=cells)
+            self._decks.clear()
+        if self._shots:
+            self.shots += np.bincount(
+                self._shots, minlength=2 * cells).reshape(2, cells)
+            self._shots.clear()
+        if self._hits:
+            self.hits += np.bincount(
+                self._hits, minlength=2 * cells).reshape(2, cells)
+            self.hit_turns += np.bincount(
+                self._hits, self._turns,
+                minlength=2 * cells).astype(np.int64).reshape(2, cells)
+            self._hits.clear()
+            self._turns.clear()
+        if self._firsts:
+            self.first_hit += np.bincount(
+                self._firsts, minlength=2 * cells).reshape(2, cells)
+            self._firsts.clear()
+
+    def merge(self, other: 'Heatmaps') -> 'Heatmaps':
+        """
+        Прибавляет статистику другого объекта Heatmaps
+        (например, собранную в процессе пула) и возвращает себя.
+        Если размеры досок не совпадают, выбрасывает ValueError.
+        """
+
+        if (other.width, other.height) != (self.width, self.height):
+            raise ValueError('Нельзя объединить статистику досок '
+                             'разного размера.')
+        self.flush()
+        other.flush()
+        self.games += other.games
+        self.boards += other.boards
+        self.occupancy += other.occupancy
+        self.shots += other.shots
+        self.hits += other.hits
+        self.hit_turns += other.hit_turns
+        self.first_hit += other.first_hit
+        return self
+
+    def maps(self) -> dict[str, np.ndarray]:
+        """
+        Возвращает тепловые карты в виде массивов (height, width):
+        occupancy - доля расстановок с палубой в клетке;
+        shots_0, shots_1 - доля партий, в которых игрок стрелял в клетку;
+        hit_turn_0, hit_turn_1 - средний ход игрока, на котором
+        клетка была подбита (nan, если её не подбивали).
+        """
+
+        self.flush()
+        shape = (self.height, self.width)
+        maps = {'occupancy': (self.occupancy / max(self.boards, 1))
+                .reshape(shape)}
+        for player in range(2):
+            maps[f'shots_{player}'] = \
+                (self.shots[player] / max(self.games, 1)).reshape(shape)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                maps[f'hit_turn_{player}'] = \
+                    (self.hit_turns[player] / self.hits[player]).reshape(shape)
+        return maps
+
+    def save(self, path: str) -> None:
+        """
+        Записывает счётчики и тепловые карты в файл .npz.
+        Файл заменяется целиком через временный файл.
+        """
+
+        self.flush()
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as file:
+            np.savez(file, size=np.array([self.width, self.height,
+                                          self.games, self.boards]),
+                     occupancy=self.occupancy, shots=self.shots,
+                     hits=self.hits, hit_turns=self.hit_turns,
+                     first_hit=self.first_hit,
+                     **{f'map_{name}': value
+                        for name, value in self.maps().items()})
+        os.replace(temp, path)
+
+    @staticmethod
+    def load(path: str) -> 'Heatmaps':
+        """
+        Загружает статистику из файла, записанного save().
+        """
+
+        with np.load(path) as data:
+            width, height, games, boards = data['size'].tolist()
+            heatmaps = Heatmaps(width, height)
+            heatmaps.games = games
+            heatmaps.boards = boards
+            for name in ('occupancy', 'shots', 'hits', 'hit_turns',
+                         'first_hit'):
+                setattr(heatmaps, name, data[name].astype(np.int64))
+        return heatmaps
+
+
+def collect(first: int, count: int, seed: int,
+            width: int = BOARD_SIZE,
+            height: int = BOARD_SIZE,
+            ships_types: list[int] = SHIPS_TYPES) -> Heatmaps:
+    """
+    Разыгрывает партии компьютера против компьютера с номерами
+    от first до first + count - 1 и возвращает их статистику.
+    Это те же партии, что и партии с этими номерами прогона
+    simulation.simulate с начальным значением seed (см. play_games).
+    """
+
+    heatmaps = Heatmaps(width, height)
+    for boards, result in play_games(first, count, seed, width, height,
+                                     ships_types):
+        heatmaps.add((board_ships(boards[0]), board_ships(boards[1])),
+                     result.shots)
+    heatmaps.flush()
+    return heatmaps
+
+
+def aggregate(n_games: int, seed: Optional[int] = None,
+              workers: Optional[int] = None, chunk: int = 10000,
+              width: int = BOARD_SIZE,
+              height: int = BOARD_SIZE,
+              ships_types: list[int] = SHIPS_TYPES) -> Heatmaps:
+    """
+    Разыгрывает n_games партий в пуле процессов порциями по chunk партий
+    и объединяет их статистику по мере готовности порций.
+    В работе одновременно не больше двух порций на процесс,
+    поэтому память не зависит от n_games.
+    """
+
+    if seed is None:
+        seed = getrandbits(64)
+    workers = workers or os.cpu_count() or 1
+    total = Heatmaps(width, height)
+    starts = iter(range(0, n_games, chunk))
+    with ProcessPoolExecutor(workers) as pool:
+        futures = set()
+        while True:
+            for first in starts:
+                futures.add(pool.submit(collect, first,
+                                        min(chunk, n_games - first), seed,
+                                        width, height, ships_types))
+                if len(futures) >= 2 * workers:
+                    break
+            if not futures:
+                return total
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                total.merge(future.result())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Тепловые карты по клеткам доски за много партий '
+                    'компьютера против компьютера.')
+    parser.add_argument('games', type=int)
+    parser.add_argument('--out', default='heatmaps.npz')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    heatmaps = aggregate(args.games, args.seed, args.workers, args.chunk)
+    heatmaps.save(args.out)
+    elapsed = perf_counter() - start
+    print(f'Партий: {heatmaps.games}, время: {elapsed:.1f} с '
+          f'({heatmaps.games / elapsed:.0f} партий/с), файл: {args.out}')
+    print('Доля расстановок с палубой в клетке:')
+    for row in heatmaps.maps()['occupancy']:
+        print(' '.join(f'{value:.3f}' for value in row))
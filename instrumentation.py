@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+from time import perf_counter, strftime
+from typing import Callable, Optional, TypeVar
+
+import main
+
+
+T = TypeVar('T')
+
+
+class Instrumentation():
+    """
+    Класс для сбора счётчиков и замеров времени горячих операций движка.
+    Движок обращается к нему через main.instrument; пока там None,
+    инструментирование выключено и стоит одну проверку на событие.
+
+    Счётчики:
+        place_fleet.calls, .steps, .backtracks, .restarts, .failures -
+            генерация расстановок флота;
+        add_ship.rejected - отказы BoardWrongShipException;
+        shot.miss, shot.hit, shot.sunk - результаты выстрелов Board.fire;
+        move.retry.input, move.retry.out, move.retry.used - повторы хода
+            в Player.move из-за неверного ввода, BoardOutException
+            и BoardUsedException;
+        cache.hit, cache.miss - обращения к TranspositionCache.
+    Замеры времени:
+        Game.random_board - генерация доски;
+        <класс AI>.choose - время принятия решения компьютером.
+
+    Атрибуты
+    --------
+    counters : dict
+        Значения счётчиков.
+    timings : dict
+        Для каждого замера список [количество, сумма секунд, максимум].
+    started : float
+        Время включения по perf_counter().
+    _lock : threading.Lock
+        Блокировка для чтения данных из потока записи в файл.
+    _stop : threading.Event
+        Сигнал остановки потока записи в файл.
+    _thread : threading.Thread
+        Поток записи в файл (None, если он не запускался).
+
+    Методы
+    --------
+    count(str, int=1):
+        Увеличивает счётчик.
+    observe(str, float):
+        Добавляет замер времени в секундах.
+    timed(str, Callable, *args):
+        Вызывает функцию и добавляет замер времени её работы.
+    snapshot():
+        Возвращает копию собранных данных в виде словаря.
+    dump(str):
+        Записывает снимок данных в файл JSON.
+    start_dump(str, float=10.0):
+        Запускает поток, который периодически записывает снимок в файл,
+        если он ещё не запущен.
+    stop_dump():
+        Останавливает поток записи в файл.
+    """
+
+    def __init__(self) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта Instrumentation.
+        """
+
+        self.counters = dict()
+        self.timings = dict()
+        self.started = perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Увеличивает счётчик.
+        """
+
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Добавляет замер времени в секундах.
+        """
+
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def timed(self, name: str, function: Callable[..., T], *args) -> T:
+        """
+        Вызывает функцию и добавляет замер времени её работы.
+        """
+
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает копию собранных данных в виде словаря.
+        """
+
+        with self._lock:
+            return {
+                'timestamp': strftime('%Y-%m-%dT%H:%M:%S'),
+                'uptime_s': perf_counter() - self.started,
+                'counters': dict(self.counters),
+                'timings': {name: {'count': count,
+                                   'total_ms': total * 1000,
+                                   'mean_us': total / count * 1e6,
+                                   'max_us': peak * 1e6}
+                            for name, (count, total, peak)
+                            in self.timings.items()},
+            }
+
+    def dump(self, path: str) -> None:
+        """
+        Записывает снимок данных в файл JSON.
+        Файл заменяется целиком, поэтому читатель никогда
+        не увидит его наполовину записанным.
+        """
+
+        temp = f'{path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, indent=2, ensure_ascii=False)
+        os.replace(temp, path)
+
+    def start_dump(self, path: str, interval: float = 10.0) -> None:
+        """
+        Запускает поток, который каждые interval секунд
+        записывает снимок данных в файл.
+        Если поток уже запущен, ничего не делает.
+        """
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+
+        self._thread = threading.Thread(target=run,
+                                        name='instrumentation-dump',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop_dump(self) -> None:
+        """
+        Останавливает поток записи в файл (перед остановкой
+        он записывает последний снимок) и дожидается его завершения.
+        """
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def enable(instrument: Optional[Instrumentation] = None) -> Instrumentation:
+    """
+    Включает инструментирование движка и возвращает сборщик данных.
+    """
+
+    main.instrument = instrument if instrument is not None \
+        else Instrumentation()
+    return main.instrument
+
+
+def disable() -> None:
+    """
+    Выключает инструментирование движка.
+    """
+
+    main.instrument = None
@@ -0,0 +1,288 @@
+import os
+import sys
+from random import randrange
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+
+from main import (BOARD_SIZE, SHIPS_TYPES, Board, BoardWrongFleetException,
+                  Dot, RandomStream, Ship, ship_placements)
+
+
+# Каталог, в котором хранятся индексы расстановок
+CACHE_DIR = os.environ.get(
+    'BATTLESHIP_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'battleship'))
+# Предел количества расстановок при переборе: на больших досках
+# их слишком много, чтобы хранить все
+MAX_LAYOUTS = 50_000_000
+
+
+def enumerate_layouts(ships_types: list[int] = SHIPS_TYPES,
+                      width: int = BOARD_SIZE,
+                      height: int = BOARD_SIZE,
+                      limit: int = MAX_LAYOUTS) -> list[int]:
+    """
+    Перебирает все допустимые по правилам расстановки флота
+    и возвращает их в виде битовых масок палуб.
+    Корабли одной длины ставятся в порядке возрастания номера положения,
+    поэтому каждая расстановка встречается ровно один раз.
+    Если расстановок больше limit, выбрасывает ValueError.
+    """
+
+    ships = sorted(ships_types, reverse=True)
+    placements = {length: [(mask, blocked) for mask, blocked, *_ in
+                           ship_placements(length, width, height)]
+                  for length in set(ships)}
+    layouts = list()
+
+    def place(level: int, locked: int, occupied: int, start: int) -> None:
+        if level == len(ships):
+            if len(layouts) >= limit:
+                raise ValueError(f'Расстановок флота больше {limit}.')
+            layouts.append(occupied)
+            return
+        length = ships[level]
+        # Для следующего корабля той же длины перебор продолжается
+        # с положения после текущего
+        same = level + 1 < len(ships) and ships[level + 1] == length
+        pool = placements[length]
+        for i in range(start, len(pool)):
+            mask, blocked = pool[i]
+            if not mask & locked:
+                place(level + 1, locked | blocked, occupied | mask,
+                      i + 1 if same else 0)
+
+    place(0, 0, 0, 0)
+    return layouts
+
+
+def mask_ships(mask: int, width: int) -> list[Ship]:
+    """
+    Восстанавливает корабли по битовой маске палуб.
+    Палубы разных кораблей по правилам не соприкасаются,
+    поэтому каждый отрезок из палуб - это отдельный корабль.
+    Возвращает корабли в порядке убывания длины.
+    """
+
+    ships = list()
+    while mask:
+        # Младшая палуба - нос очередного корабля
+        cell = (mask & -mask).bit_length() - 1
+        x = cell % width
+        step = 1 if x + 1 < width and mask >> (cell + 1) & 1 else width
+        length = 1
+        while mask >> (cell + length * step) & 1 and \
+                (step == width or x + length < width):
+            length += 1
+        for i in range(length):
+            mask &= ~(1 << (cell + i * step))
+        ships.append(Ship(length, Dot(x, cell // width),
+                          0 if step == 1 else 1))
+    ships.sort(key=lambda ship: ship.length, reverse=True)
+    return ships
+
+
+def observed(board: Board) -> tuple[int, int]:
+    """
+    Возвращает то, что известно о доске сопернику, в виде битовых масок:
+    подбитые палубы и клетки, где палуб заведомо нет
+    (промахи и ореолы потопленных кораблей).
+    """
+
+    hits = empty = 0
+    table = board.table
+    for x in range(board.width):
+        for y in range(board.height):
+            bit = 1 << (y * board.width + x)
+            if table[x][y] == '×':
+                hits |= bit
+            elif table[x][y] == '•':
+                empty |= bit
+    return hits, empty
+
+
+class LayoutIndex():
+    """
+    Класс для представления индекса всех допустимых расстановок флота.
+    Расстановки хранятся массивом (count, words) 64-битных слов:
+    бит номер y * width + x маски равен 1, если в клетке (x, y) палуба.
+
+    Атрибуты
+    --------
+    width : int
+        Ширина доски (размер по оси x).
+    height : int
+        Высота доски (размер по оси y).
+    ships_types : list
+        Длины всех кораблей флота в порядке убывания.
+    masks : np.ndarray
+        Маски палуб расстановок; у загруженного с диска индекса
+        массив отображён в память.
+
+    Методы
+    --------
+    @staticmethod
+    path(ships_types, width, height, cache_dir=CACHE_DIR):
+        Возвращает путь к файлу индекса для данной доски и флота.
+    @staticmethod
+    build(ships_types, width, height):
+        Перебирает все расстановки и возвращает индекс в памяти.
+    @staticmethod
+    load(ships_types, width, height, cache_dir=CACHE_DIR):
+        Загружает индекс с диска, а если его нет - строит и сохраняет.
+    mask(int):
+        Возвращает маску палуб расстановки с данным номером.
+    board(int, board_class=Board):
+        Возвращает готовую к игре доску с расстановкой с данным номером.
+    random_board(board_class=Board, rng=None):
+        Возвращает доску со случайной расстановкой из индекса.
+    filter(int, int):
+        Возвращает индекс расстановок, согласных с наблюдениями.
+    """
+
+    def __init__(self, width: int, height: int, ships_types: list[int],
+                 masks: np.ndarray) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта LayoutIndex.
+
+        Атрибуты
+        --------
+        width : int
+            Ширина доски (размер по оси x).
+        height : int
+            Высота доски (размер по оси y).
+        ships_types : list
+            Длины всех кораблей флота в порядке убывания.
+        masks : np.ndarray
+            Маски палуб расстановок.
+        """
+
+        self.width = width
+        self.height = height
+        self.ships_types = sorted(ships_types, reverse=True)
+        self.masks = masks
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество расстановок в индексе.
+        """
+
+        return len(self.masks)
+
+    @staticmethod
+    def path(ships_types: list[int] = SHIPS_TYPES,
+             width: int = BOARD_SIZE,
+             height: int = BOARD_SIZE,
+             cache_dir: str = CACHE_DIR) -> str:
+        """
+        Возвращает путь к файлу индекса для данной доски и флота.
+        """
+
+        fleet = '-'.join(map(str, sorted(ships_types, reverse=True)))
+        return os.path.join(cache_dir, f'layouts_{width}x{height}_{fleet}.npy')
+
+    @staticmethod
+    def build(ships_types: list[int] = SHIPS_TYPES,
+              width: int = BOARD_SIZE,
+              height: int = BOARD_SIZE) -> 'LayoutIndex':
+        """
+        Перебирает все расстановки и возвращает индекс в памяти.
+        Если флот невозможно разместить, выбрасывает BoardWrongFleetException.
+        """
+
+        layouts = enumerate_layouts(ships_types, width, height)
+        if not layouts:
+            raise BoardWrongFleetException()
+        words = (width * height + 63) // 64
+        masks = np.empty((len(layouts), words), dtype=np.uint64)
+        for word in range(words):
+            masks[:, word] = [(layout >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+                              for layout in layouts]
+        return LayoutIndex(width, height, ships_types, masks)
+
+    @staticmethod
+    def load(ships_types: list[int] = SHIPS_TYPES,
+             width: int = BOARD_SIZE,
+             height: int = BOARD_SIZE,
+             cache_dir: str = CACHE_DIR) -> 'LayoutIndex':
+        """
+        Загружает индекс с диска, отображая его в память,
+        а если файла ещё нет - строит индекс и сохраняет его.
+        """
+
+        path = LayoutIndex.path(ships_types, width, height, cache_dir)
+        if not os.path.exists(path):
+            index = LayoutIndex.build(ships_types, width, height)
+            os.makedirs(cache_dir, exist_ok=True)
+            # Пишем во временный файл, чтобы не оставить обрезанный индекс
+            temp = f'{path}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as file:
+                np.save(file, index.masks)
+            os.replace(temp, path)
+        masks = np.load(path, mmap_mode='r')
+        return LayoutIndex(width, height, ships_types, masks)
+
+    def mask(self, number: int) -> int:
+        """
+        Возвращает маску палуб расстановки с данным номером.
+        """
+
+        mask = 0
+        for word, value in enumerate(self.masks[number].tolist()):
+            mask |= value << (64 * word)
+        return mask
+
+    def board(self, number: int, board_class: type[Board] = Board) -> Board:
+        """
+        Возвращает готовую к игре доску с расстановкой с данным номером.
+        """
+
+        board = board_class(self.width, self.height, self.ships_types)
+        for ship in mask_ships(self.mask(number), self.width):
+            board.add_ship(ship)
+        board.get_ready()
+        return board
+
+    def random_board(self, board_class: type[Board] = Board,
+                     rng: Optional[RandomStream] = None) -> Board:
+        """
+        Возвращает доску со случайной расстановкой из индекса.
+        Все допустимые расстановки выпадают равновероятно.
+        Номер расстановки берётся из потока rng, а если он не задан -
+        из общего генератора модуля random.
+        """
+
+        below = rng.below if rng is not None else randrange
+        return self.board(below(len(self.masks)), board_class)
+
+    def filter(self, hits: int, empty: int) -> 'LayoutIndex':
+        """
+        Возвращает индекс расстановок, согласных с наблюдениями:
+        в которых есть палубы во всех клетках маски hits
+        и нет палуб ни в одной клетке маски empty.
+        """
+
+        keep = np.ones(len(self.masks), dtype=bool)
+        for word in range(self.masks.shape[1]):
+            hit = np.uint64((hits >> (64 * word)) & 0xFFFFFFFFFFFFFFFF)
+            miss = np.uint64((empty >> (64 * word)) & 0xFFFFFFFFFFFFFFFF)
+            column = self.masks[:, word]
+            keep &= ((column & hit) == hit) & ((column & miss) == 0)
+        return LayoutIndex(self.width, self.height, self.ships_types,
+                           self.masks[keep])
+
+
+if __name__ == '__main__':
+    # python layout_index.py [ШИРИНА ВЫСОТА ДЛИНА...]
+    if len(sys.argv) > 3:
+        width, height = int(sys.argv[1]), int(sys.argv[2])
+        ships_types = [int(length) for length in sys.argv[3:]]
+    else:
+        width, height, ships_types = BOARD_SIZE, BOARD_SIZE, SHIPS_TYPES
+    start = perf_counter()
+    index = LayoutIndex.load(ships_types, width, height)
+    print(f'Расстановок: {len(index)}, файл: '
+          f'{LayoutIndex.path(ships_types, width, height)}, '
+          f'время: {perf_counter() - start:.2f} с')
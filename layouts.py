@@ -0,0 +1,201 @@
+from typing import Callable, Optional
+
+import numpy as np
+
+from main import (BOARD_SIZE, SHIPS_TYPES, Board, Dot, RandomStream, Ship,
+                  place_fleet, ship_placements)
+
+
+# Ограничение памяти под временные массивы одной порции досок в байтах
+CHUNK_MEMORY = 64 * 2 ** 20
+
+
+def pack_masks(masks: list[int], words: int) -> np.ndarray:
+    """
+    Переводит список битовых масок Python в массив (len(masks), words)
+    64-битных слов, младшее слово первым.
+    """
+
+    packed = np.zeros((len(masks), words), dtype=np.uint64)
+    for i, mask in enumerate(masks):
+        for word in range(words):
+            packed[i, word] = (mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+    return packed
+
+
+def _place_chunk(count: int,
+                 ships_types: list[int],
+                 placements: dict[int, tuple[np.ndarray, np.ndarray]],
+                 words: int,
+                 draw: Callable[[np.ndarray], np.ndarray]
+                 ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Генерирует count расстановок флота и возвращает их маски палуб
+    в виде массива (count, words) 64-битных слов и номера положений
+    кораблей в виде массива (count, len(ships_types)).
+    draw(boards) возвращает по случайному числу от 0 до 1
+    для каждой доски с номером из массива boards.
+    """
+
+    ships = np.zeros((count, words), dtype=np.uint64)
+    indices = np.zeros((count, len(ships_types)), dtype=np.int64)
+    # Номера досок, которые ещё предстоит сгенерировать
+    pending = np.arange(count)
+    while pending.size:
+        locked = np.zeros((pending.size, words), dtype=np.uint64)
+        occupied = np.zeros((pending.size, words), dtype=np.uint64)
+        chosen = np.zeros((pending.size, len(ships_types)), dtype=np.int64)
+        alive = np.ones(pending.size, dtype=bool)
+        for ship, length in enumerate(ships_types):
+            masks, blocked = placements[length]
+            # Положения, не пересекающиеся с занятыми клетками
+            legal = ((locked[:, None, :] & masks[None, :, :]) == 0).all(axis=2)
+            counts = legal.sum(axis=1)
+            alive &= counts > 0
+            # Равновероятно выбираем номер одного из допустимых положений
+            choice = (draw(pending) * counts).astype(np.int64)
+            index = (legal.cumsum(axis=1) <= choice[:, None]).sum(axis=1)
+            index = np.minimum(index, len(masks) - 1)
+            chosen[:, ship] = index
+            occupied |= masks[index]
+            locked |= blocked[index]
+        ships[pending[alive]] = occupied[alive]
+        indices[pending[alive]] = chosen[alive]
+        pending = pending[~alive]
+    return ships, indices
+
+
+def _prepare(ships_types: list[int], width: int, height: int,
+             chunk: int) -> tuple[int, dict[int, tuple[np.ndarray,
+                                                       np.ndarray]], int]:
+    """
+    Проверяет, что флот помещается на доске, и возвращает количество
+    64-битных слов в маске доски, маски палуб и палуб с ореолом всех
+    положений кораблей каждой длины флота (положения нумеруются так же,
+    как в ship_placements) и размер порции досок.
+    Временные массивы _place_chunk занимают порядка
+    8 * (words + 2) байт на доску и положение корабля, поэтому порция
+    уменьшается так, чтобы они не превышали CHUNK_MEMORY.
+    """
+
+    # Проверка расходует случайные числа собственного потока,
+    # а не общего генератора модуля random
+    place_fleet(ships_types, width, height, rng=RandomStream(0))
+    words = (width * height + 63) // 64
+    placements = dict()
+    for length in set(ships_types):
+        positions = ship_placements(length, width, height)
+        placements[length] = (
+            pack_masks([position[0] for position in positions], words),
+            pack_masks([position[1] for position in positions], words),
+        )
+    most = max(len(masks) for masks, _ in placements.values())
+    chunk = max(1, min(chunk, CHUNK_MEMORY // (8 * (words + 2) * most)))
+    return words, placements, chunk
+
+
+def generate_layouts(n: int,
+                     ships_types: list[int] = SHIPS_TYPES,
+                     width: int = BOARD_SIZE,
+                     height: int = BOARD_SIZE,
+                     seed: Optional[int] = None,
+                     chunk: int = 65536) -> np.ndarray:
+    """
+    Генерирует n случайных расстановок флота сразу.
+    Возвращает массив uint8 формы (n, height, width), где layouts[i, y, x]
+    равен 1, если в клетке (x, y) i-й расстановки стоит палуба.
+
+    Корабли ставятся по очереди сразу на всех досках: для каждой доски
+    векторно находятся положения, не пересекающиеся с занятыми кораблями
+    и их ореолами клетками, и из них равновероятно выбирается одно.
+    Доски, на которых очередной корабль поставить некуда,
+    генерируются заново. Чтобы ограничить расход памяти,
+    доски обрабатываются порциями не больше чем по chunk штук
+    (на больших досках порции меньше, см. CHUNK_MEMORY).
+    Если флот невозможно разместить, выбрасывает BoardWrongFleetException
+    (или BoardFleetSearchException, см. place_fleet).
+    """
+
+    words, placements, chunk = _prepare(ships_types, width, height, chunk)
+    rng = np.random.default_rng(seed)
+    cells = width * height
+    layouts = np.empty((n, height, width), dtype=np.uint8)
+    for start in range(0, n, chunk):
+        count = min(chunk, n - start)
+        ships, _ = _place_chunk(count, ships_types, placements, words,
+                                lambda boards: rng.random(boards.size))
+        # Распаковываем биты в сетку: бит номер y * width + x - клетка (x, y)
+        bits = np.unpackbits(ships.astype('<u8').view(np.uint8),
+                             axis=1, bitorder='little')
+        layouts[start:start + count] = \
+            bits[:, :cells].reshape(count, height, width)
+    return layouts
+
+
+def stream_placements(streams: list[RandomStream],
+                      ships_types: list[int] = SHIPS_TYPES,
+                      width: int = BOARD_SIZE,
+                      height: int = BOARD_SIZE,
+                      chunk: int = 65536) -> np.ndarray:
+    """
+    Генерирует по случайной расстановке флота на каждый поток streams
+    так же, как generate_layouts, но возвращает не сетки, а массив формы
+    (len(streams), len(ships_types)): placements[i, k] - номер положения
+    k-го корабля i-й расстановки в ship_placements(ships_types[k],
+    width, height). По номерам доска собирается без разбора сетки
+    (см. BitBoard.set_ships).
+    Доски обрабатываются векторно, но i-я расстановка берёт случайные
+    числа только из потока streams[i], поэтому зависит только от него,
+    а не от того, с какими досками она генерировалась вместе.
+    Один поток может быть задан для нескольких расстановок: тогда они
+    берут из него числа по очереди в порядке их номеров и вместе
+    зависят только от этого потока.
+    Если флот невозможно разместить, выбрасывает BoardWrongFleetException
+    (или BoardFleetSearchException, см. place_fleet).
+    """
+
+    words, placements, chunk = _prepare(ships_types, width, height, chunk)
+    indices = np.empty((len(streams), len(ships_types)), dtype=np.int64)
+    for start in range(0, len(streams), chunk):
+        count = min(chunk, len(streams) - start)
+        part = streams[start:start + count]
+        _, indices[start:start + count] = _place_chunk(
+            count, ships_types, placements, words,
+            lambda boards: np.fromiter((part[i].random() for i in boards),
+                                       dtype=np.float64, count=boards.size))
+    return indices
+
+
+def layout_to_board(layout: np.ndarray,
+                    board_class: type[Board] = Board) -> Board:
+    """
+    Возвращает готовую к игре доску по одной расстановке
+    из массива generate_layouts.
+    Палубы разных кораблей по правилам не соприкасаются,
+    поэтому каждый отрезок из палуб - это отдельный корабль.
+    """
+
+    grid = layout.tolist()
+    height, width = len(grid), len(grid[0])
+    ships = list()
+    for y in range(height):
+        for x in range(width):
+            # Нос корабля - палуба, у которой нет палубы слева и сверху
+            if not grid[y][x] or (x and grid[y][x - 1]) or \
+               (y and grid[y - 1][x]):
+                continue
+            direction = 1 if y + 1 < height and grid[y + 1][x] else 0
+            length = 1
+            while True:
+                nx, ny = x + length * (1 - direction), y + length * direction
+                if nx >= width or ny >= height or not grid[ny][nx]:
+                    break
+                length += 1
+            ships.append(Ship(length, Dot(x, y), direction))
+    # Флот доски - длины найденных кораблей в порядке убывания
+    ships.sort(key=lambda ship: ship.length, reverse=True)
+    board = board_class(width, height, [ship.length for ship in ships])
+    for ship in ships:
+        board.add_ship(ship)
+    board.get_ready()
+    return board
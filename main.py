@@ -1,11 +1,43 @@
-from random import randint
-from time import sleep
+import struct
+import sys
+from functools import lru_cache
+from hashlib import blake2b
+from heapq import heapify, heappop, heappush
+from random import Random, getrandbits, randrange
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING, Generator, NamedTuple, Optional, TextIO
+
+if TYPE_CHECKING:
+    from board_pool import BoardPool
+    from instrumentation import Instrumentation
+    from layout_index import LayoutIndex
+    from records import RecordWriter
 
 
 # Размер игровой доски
 BOARD_SIZE = 6
 # Длины / количество палуб всех кораблей в порядке убывания
 SHIPS_TYPES = [3, 2, 2, 1, 1, 1, 1]
+# Результаты выстрела: промах, попадание, потопление
+MISS, HIT, SUNK = 0, 1, 2
+# Сообщения о результатах выстрела
+SHOT_MESSAGES = {
+    MISS: '\n\tМимо.',
+    HIT: '\n\tПопадание!',
+    SUNK: '\n\tКорабль потоплен!',
+}
+# Названия счётчиков результатов выстрела для инструментирования
+SHOT_COUNTERS = {MISS: 'shot.miss', HIT: 'shot.hit', SUNK: 'shot.sunk'}
+# Сообщение о неверном формате координат выстрела
+WRONG_INPUT = '\n\tВнимательнее, вводите две цифры через пробел.\n'
+# Сборщик счётчиков и замеров времени (см. instrumentation.py);
+# None - инструментирование выключено
+instrument: Optional['Instrumentation'] = None
+# Запущенный как скрипт модуль регистрируется и под именем main:
+# иначе модули, которые делают import main (например, instrumentation),
+# получили бы вторую копию модуля со своим instrument и своими классами
+if __name__ == '__main__':
+    sys.modules.setdefault('main', sys.modules[__name__])
 
 
 class BoardException(Exception):
@@ -52,6 +84,48 @@ class BoardWrongShipException(BoardException):
     pass
 
 
+class BoardWrongFleetException(BoardException):
+    """
+    Класс для представления ошибки размещения флота:
+    корабли SHIPS_TYPES невозможно расставить на доске по правилам.
+    """
+
+    def __str__(self) -> str:
+        """
+        Устанавливает выводимое сообщение об ошибке
+        """
+
+        return '\n\tФлот невозможно расставить на доске!\n'
+
+
+class BoardFleetSearchException(BoardException):
+    """
+    Класс для представления ошибки поиска расстановки флота:
+    поиск исчерпал лимит шагов и перезапусков, не найдя расстановки,
+    хотя флот, возможно, и помещается на доске.
+    """
+
+    def __str__(self) -> str:
+        """
+        Устанавливает выводимое сообщение об ошибке
+        """
+
+        return '\n\tНе удалось расставить флот за отведённое число шагов!\n'
+
+
+def retry_counter(error: BoardException) -> str:
+    """
+    Возвращает название счётчика повторов хода из-за данной ошибки
+    для инструментирования.
+    """
+
+    if isinstance(error, BoardOutException):
+        return 'move.retry.out'
+    if isinstance(error, BoardUsedException):
+        return 'move.retry.used'
+    return 'move.retry.other'
+
+
 class Dot():
     """
     Класс для представления точки на доске.
@@ -88,6 +162,14 @@ class Dot():
 
         return self.x == other.x and self.y == other.y
 
+    def __hash__(self) -> int:
+        """
+        Позволяет хранить точки в множествах и использовать их
+        как ключи словарей: равные точки имеют равный хеш.
+        """
+
+        return hash((self.x, self.y))
+
 
 class Ship():
     """
@@ -103,6 +185,10 @@ class Ship():
         Направление корабля (вертикальное/горизонтальное).
     lives : int
         Количеством жизней (сколько точек корабля еще не подбито).
+    _dots : tuple
+        Точки корабля, вычисленные один раз при создании.
+    _dot_set : frozenset
+        Множество точек корабля для проверки попадания.
 
     Методы
     --------
@@ -128,6 +214,10 @@ class Ship():
             Направление корабля (вертикальное/горизонтальное).
         lives : int
             Количеством жизней (сколько точек корабля еще не подбито).
+        _dots : tuple
+            Точки корабля, вычисленные один раз при создании.
+        _dot_set : frozenset
+            Множество точек корабля для проверки попадания.
         """
 
         self.length = length
@@ -135,12 +225,6 @@ class Ship():
         self.direction = direction
         self.lives = length
 
-    @property
-    def dots(self) -> list[Dot]:
-        """
-        Возвращает список всех точек корабля.
-        """
-
         dot_list = list()
         for i in range(self.length):
             x, y = self.bow.x, self.bow.y
@@ -151,7 +235,16 @@ class Ship():
                 y += i
 
             dot_list.append(Dot(x, y))
-        return dot_list
+        self._dots = tuple(dot_list)
+        self._dot_set = frozenset(dot_list)
+
+    @property
+    def dots(self) -> list[Dot]:
+        """
+        Возвращает список всех точек корабля.
+        """
+
+        return list(self._dots)
 
     def is_strike(self, dot: Dot) -> bool:
         """
@@ -159,7 +252,315 @@ class Ship():
         иными словами, принадлежит ли точка dot этому кораблю.
         """
 
-        return dot in self.dots
+        return dot in self._dot_set
+
+
+@lru_cache(maxsize=None)
+def state_keys(width: int = BOARD_SIZE,
+               height: int = BOARD_SIZE) -> tuple[int, ...]:
+    """
+    Возвращает случайные 64-битные ключи хеширования состояния доски
+    для каждого бита кода состояния (см. BoardState).
+    Ключи зависят только от размеров доски, поэтому одинаковы
+    во всех процессах.
+    """
+
+    rng = Random(f'{width}x{height}')
+    return tuple(rng.getrandbits(64) for _ in range(3 * width * height))
+
+
+class BoardState():
+    """
+    Класс для представления видимого сопернику состояния доски.
+    Код состояния - число из трёх слоёв по width * height бит:
+    бит номер cell - в клетке заведомо пусто (промах или ореол
+    потопленного корабля), бит номер cells + cell - подбитая палуба,
+    бит номер 2 * cells + cell - палуба потопленного корабля.
+    Ключ - 64-битный хеш, XOR ключей state_keys всех единичных битов кода;
+    доска пересчитывает его при каждом выстреле, а не по всему коду.
+    Состояния сравниваются по коду и размерам доски, поэтому разные
+    состояния с одинаковым хешем не путаются, а одинаковые коды досок
+    разного размера (например, пустых) не считаются равными.
+
+    Атрибуты
+    --------
+    code : int
+        Код состояния.
+    key : int
+        64-битный хеш кода.
+    width : int
+        Ширина доски.
+    height : int
+        Высота доски.
+    """
+
+    __slots__ = ('code', 'key', 'width', 'height')
+
+    def __init__(self, code: int, key: int, width: int = BOARD_SIZE,
+                 height: int = BOARD_SIZE) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта BoardState.
+        """
+
+        self.code = code
+        self.key = key
+        self.width = width
+        self.height = height
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Состояния равны, если равны их коды и размеры досок.
+        """
+
+        if not isinstance(other, BoardState):
+            return NotImplemented
+        return self.code == other.code and self.width == other.width \
+            and self.height == other.height
+
+    def __hash__(self) -> int:
+        """
+        Возвращает хеш состояния по 64-битному ключу и размерам доски.
+        """
+
+        return hash((self.key, self.width, self.height))
+
+    def __repr__(self) -> str:
+        """
+        Возвращает строку с кодом состояния и размерами доски.
+        """
+
+        return f'BoardState({self.code:#x}, {self.width}x{self.height})'
+
+
+class ShotResult(NamedTuple):
+    """
+    Класс для представления результата выстрела Board.shot.
+    Как и прежний результат shot, истинен, если право следующего хода
+    остаётся за стрелявшим, т.е. при попадании.
+
+    Атрибуты
+    --------
+    cell : int
+        Номер клетки выстрела y * width + x.
+    result : int
+        MISS, HIT или SUNK.
+    ship : Ship
+        Потопленный корабль (None, если корабль не потоплен).
+    halo : tuple
+        Номера клеток ореола потопленного корабля по возрастанию.
+    decks : tuple
+        Номера клеток палуб потопленного корабля по возрастанию.
+    board : str
+        Имя доски, по которой стреляли (см. Board.name): по нему общий
+        поток результатов нескольких партий разбирается на партии.
+    """
+
+    cell: int
+    result: int
+    ship: Optional[Ship] = None
+    halo: tuple[int, ...] = ()
+    decks: tuple[int, ...] = ()
+    board: str = ''
+
+    def __bool__(self) -> bool:
+        """
+        Истинен при попадании, т.е. если ход остаётся за стрелявшим.
+        """
+
+        return self.result != MISS
+
+
+class ShotSubscriber():
+    """
+    Родительский класс для представления получателей результатов выстрелов.
+    Результаты копятся и передаются методу handle() пачками
+    по batch штук, а остаток - при вызове flush() или close().
+
+    Атрибуты
+    --------
+    batch : int
+        Количество результатов, после которого они передаются handle().
+    _pending : list
+        Результаты, ещё не переданные handle().
+
+    Методы
+    --------
+    notify(ShotResult):
+        Добавляет результат выстрела в пачку.
+    handle(list):
+        Обрабатывает пачку результатов.
+        Потомки должны реализовать этот метод.
+    flush():
+        Передаёт handle() накопленные результаты.
+    close():
+        Передаёт handle() остаток результатов.
+        Потомки могут переопределить этот метод.
+    """
+
+    def __init__(self, batch: int = 1) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта ShotSubscriber.
+        """
+
+        self.batch = batch
+        self._pending = list()
+
+    def notify(self, shot: ShotResult) -> None:
+        """
+        Добавляет результат выстрела в пачку.
+        """
+
+        self._pending.append(shot)
+        if len(self._pending) >= self.batch:
+            self.flush()
+
+    def handle(self, shots: list[ShotResult]) -> None:
+        """
+        Обрабатывает пачку результатов.
+        Потомки должны реализовать этот метод.
+        """
+
+        raise NotImplementedError(
+            f'Определите handle в {self.__class__.__name__}.')
+
+    def flush(self) -> None:
+        """
+        Передаёт handle() накопленные результаты.
+        """
+
+        if self._pending:
+            shots, self._pending = self._pending, list()
+            self.handle(shots)
+
+    def close(self) -> None:
+        """
+        Передаёт handle() остаток результатов.
+        Потомки могут переопределить этот метод.
+        """
+
+        self.flush()
+
+
+class ConsolePrinter(ShotSubscriber):
+    """
+    Класс для вывода результатов выстрелов в консоль с паузой
+    после каждого сообщения, как в интерактивной игре.
+
+    Атрибуты
+    --------
+    stream : TextIO
+        Поток вывода (по умолчанию sys.stdout).
+    pause : float
+        Пауза после сообщения в секундах.
+    deferred : bool
+        Если True, паузы не выполняются через sleep(), а копятся
+        в owed, чтобы асинхронная игра выждала их сама.
+    owed : float
+        Накопленная, но ещё не выполненная пауза в секундах.
+
+    Методы
+    --------
+    handle(list):
+        Выводит сообщения о результатах выстрелов.
+    take_owed():
+        Возвращает накопленную паузу и обнуляет её.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None,
+                 pause: float = 1.0) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта ConsolePrinter.
+        """
+
+        super().__init__()
+        self.stream = stream
+        self.pause = pause
+        self.deferred = False
+        self.owed = 0.0
+
+    def handle(self, shots: list[ShotResult]) -> None:
+        """
+        Выводит сообщения о результатах выстрелов.
+        """
+
+        stream = self.stream or sys.stdout
+        for shot in shots:
+            stream.write(SHOT_MESSAGES[shot.result] + '\n')
+            stream.flush()
+            if self.deferred:
+                self.owed += self.pause
+            elif self.pause:
+                sleep(self.pause)
+
+    def take_owed(self) -> float:
+        """
+        Возвращает накопленную паузу и обнуляет её.
+        """
+
+        owed, self.owed = self.owed, 0.0
+        return owed
+
+
+class ShotEvents():
+    """
+    Класс для рассылки результатов выстрелов по доске
+    подписанным на них получателям ShotSubscriber.
+
+    Атрибуты
+    --------
+    subscribers : list
+        Получатели результатов.
+
+    Методы
+    --------
+    subscribe(ShotSubscriber):
+        Добавляет получателя.
+    publish(ShotResult):
+        Передаёт результат выстрела всем получателям.
+    flush():
+        Передаёт получателям накопленные у них результаты.
+    close():
+        Закрывает всех получателей.
+    """
+
+    def __init__(self,
+                 subscribers: Optional[list[ShotSubscriber]] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта ShotEvents.
+        """
+
+        self.subscribers = list(subscribers or ())
+
+    def subscribe(self, subscriber: ShotSubscriber) -> None:
+        """
+        Добавляет получателя.
+        """
+
+        self.subscribers.append(subscriber)
+
+    def publish(self, shot: ShotResult) -> None:
+        """
+        Передаёт результат выстрела всем получателям.
+        """
+
+        for subscriber in self.subscribers:
+            subscriber.notify(shot)
+
+    def flush(self) -> None:
+        """
+        Передаёт получателям накопленные у них результаты.
+        """
+
+        for subscriber in self.subscribers:
+            subscriber.flush()
+
+    def close(self) -> None:
+        """
+        Закрывает всех получателей.
+        """
+
+        for subscriber in self.subscribers:
+            subscriber.close()
 
 
 class Board():
@@ -172,17 +573,42 @@ class Board():
         Информация о том, нужно ли скрывать
         корабли на доске (для вывода доски соперника),
         или нет (для своей доски).
+    width : int
+        Ширина доски (размер по оси x).
+    height : int
+        Высота доски (размер по оси y).
+    ships_types : list
+        Длины всех кораблей флота доски в порядке убывания.
     table : list
         Двумерный список, в котором хранятся состояния каждой из клеток.
         При инициации заполняется символами моря '○'.
     ships : list
         Список кораблей доски.
-    locked_dots : list
-        Список заблокированных точек: во время генерации случайной доски
+    locked_dots : set
+        Множество заблокированных точек: во время генерации случайной доски
         служит для хранения уже занятых кораблями и их ореолами точек, а
         во время игры служит для хранения точек, куда игрок уже стрелял.
     live_ships : int
         Количество живых кораблей на доске.
+    history : list
+        Список, в который метод fire() добавляет выстрелы
+        в виде пар (номер клетки y * width + x, результат);
+        по умолчанию None - выстрелы не записываются.
+    events : ShotEvents
+        Рассылка результатов метода shot() получателям;
+        по умолчанию None - результаты никуда не передаются.
+    name : str
+        Имя доски в результатах метода shot() (по умолчанию пустое).
+    _ship_at : dict
+        Корабль, которому принадлежит каждая занятая палубой точка.
+    _journal : list
+        Журнал пробных выстрелов для их отмены.
+    _keys : tuple
+        Ключи хеширования состояния доски (см. state_keys).
+    _state_code : int
+        Код видимого состояния доски (см. BoardState).
+    _state_hash : int
+        Хеш кода видимого состояния доски.
 
     Методы
     --------
@@ -197,50 +623,90 @@ class Board():
     mark_oreol(Ship, is_game=True):
         Формирует ореол корабля, т.е. помечает точки вокруг,
         где другого корабля по правилам быть не может.
+        Возвращает список вновь помеченных точек.
+    render():
+        Возвращает изображение доски в виде одной строки
+        в зависимости от параметра _is_hidden.
     show():
-        Выводит доску в консоль в зависимости от параметра _is_hidden.
-    @staticmethod
+        Выводит доску в консоль одной записью
+        в зависимости от параметра _is_hidden.
     out(Dot):
         Возвращает True , если точка выходит за пределы доски,
         и False, если не выходит.
+    fire(Dot):
+        Делает выстрел по доске без вывода в консоль и пауз.
+        Возвращает MISS, HIT или SUNK.
+    apply(Dot):
+        Делает пробный выстрел, который можно отменить методом undo().
+    undo():
+        Отменяет последний пробный выстрел.
+    state():
+        Возвращает видимое сопернику состояние доски.
     shot(Dot):
-        Делает выстрел по доске.
+        Делает выстрел по доске и рассылает его результат получателям events.
         Если есть попытка выстрелить за пределы доски или
         в использованную точку, то выбрасывает исключения.
-        Возвращает True, если право следующего хода остаётся за текущим игроком
-        и False, если право следующего хода переходит сопернику.
+        Возвращает ShotResult.
     get_ready():
-        Обнуляет перед стартом игры список заблокированных точек,
-        который использовался во время генерации доски.
+        Обнуляет перед стартом игры множество заблокированных точек,
+        которое использовалось во время генерации доски.
     is_loser():
         Проверяет состояние проигрыша.
     """
 
     _is_hidden: bool = False
+    history: Optional[list[tuple[int, int]]] = None
+    events: Optional[ShotEvents] = None
+    name: str = ''
 
-    def __init__(self) -> None:
+    def __init__(self, width: int = BOARD_SIZE, height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES) -> None:
         """
         Устанавливает все необходимые атрибуты для объекта Board.
 
         Атрибуты
         --------
+        width : int
+            Ширина доски (размер по оси x).
+        height : int
+            Высота доски (размер по оси y).
+        ships_types : list
+            Длины всех кораблей флота доски в порядке убывания.
         table : list
             Двумерный список, в котором хранятся состояния каждой из клеток.
             При инициации заполняется символами моря '○'.
         ships : list
             Список кораблей доски.
-        locked_dots : list
-            Список заблокированных точек: во время генерации случайной доски
+        locked_dots : set
+            Множество заблокированных точек: во время генерации случайной доски
             служит для хранения уже занятых кораблями и их ореолами точек, а
             во время игры служит для хранения точек, куда игрок уже стрелял.
         live_ships : int
             Количество живых кораблей на доске.
+        _ship_at : dict
+            Корабль, которому принадлежит каждая занятая палубой точка.
+        _journal : list
+            Журнал пробных выстрелов для их отмены.
+        _keys : tuple
+            Ключи хеширования состояния доски (см. state_keys).
+        _state_code : int
+            Код видимого состояния доски (см. BoardState).
+        _state_hash : int
+            Хеш кода видимого состояния доски.
         """
 
-        self.table = [['○'] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.width = width
+        self.height = height
+        self.ships_types = list(ships_types)
+        self.table = [['○'] * height for _ in range(width)]
         self.ships = list()
-        self.locked_dots = list()
-        self.live_ships = len(SHIPS_TYPES)
+        self.locked_dots = set()
+        self.live_ships = len(ships_types)
+        self._ship_at = dict()
+        self._journal = list()
+        self._keys = state_keys(width, height)
+        self._state_code = 0
+        self._state_hash = 0
 
     @property
     def is_hidden(self) -> bool:
@@ -268,23 +734,28 @@ class Board():
 
         # Проверяем возможность установки всех точек корабля
         for dot in ship.dots:
-            if Board.out(dot) or dot in self.locked_dots:
+            if self.out(dot) or dot in self.locked_dots:
+                if instrument is not None:
+                    instrument.count('add_ship.rejected')
                 raise BoardWrongShipException()
         # Устанавливаем на доску корабль
         for dot in ship.dots:
             self.table[dot.x][dot.y] = '■'
-            self.locked_dots.append(dot)
+            self.locked_dots.add(dot)
+            self._ship_at[dot] = ship
         # Добавляем корабль в список кораблей доски
         self.ships.append(ship)
         # Отмечаем ореол корабля
         self.mark_oreol(ship)
 
-    def mark_oreol(self, ship: Ship, is_game: bool = False) -> None:
+    def mark_oreol(self, ship: Ship, is_game: bool = False) -> list[Dot]:
         """
         Формирует ореол корабля, т.е. помечает точки вокруг,
         где другого корабля по правилам быть не может.
+        Возвращает список вновь помеченных точек.
         """
 
+        marked = list()
         # Смещения координат для нахождения всех соседей данной точки
         neighbours = [(-1, -1), (0, -1), (1, -1), (-1, 0),
                       (1, 0), (-1, 1), (0, 1), (1, 1)]
@@ -294,187 +765,1066 @@ class Board():
                 x, y = dot.x + dx, dot.y + dy
                 current_dot = Dot(x, y)
                 # Если сосед в пределах доски и не был помечен ранее
-                if (not Board.out(current_dot)) and \
+                if (not self.out(current_dot)) and \
                    (current_dot not in self.locked_dots):
                     # Помечаем соседа
-                    self.locked_dots.append(current_dot)
+                    self.locked_dots.add(current_dot)
+                    marked.append(current_dot)
                     # Если идёт игра, отмечаем ореол на доске
                     if is_game:
                         self.table[x][y] = '•'
+        return marked
 
-    def show(self) -> None:
+    def render(self) -> str:
         """
-        Выводит доску в консоль в зависимости от параметра _is_hidden.
+        Возвращает изображение доски в виде одной строки
+        в зависимости от параметра _is_hidden.
         """
 
-        print(' X| 1 2 3 4 5 6')
-        print('Y◢ ____________')
-        for row in range(BOARD_SIZE):
-            print(row + 1, end=' | ')
-            for col in range(BOARD_SIZE):
-                cell = self.table[col][row]
-                if self.is_hidden:
+        table = self.table
+        # Ширина подписей строк и столбцов
+        row_width = len(str(self.height))
+        col_width = len(str(self.width))
+        header = ''.join(f' {col + 1:>{col_width}}'
+                         for col in range(self.width))
+        rule = '_' * (self.width * (col_width + 1))
+        lines = [' ' * row_width + 'X|' + header,
+                 'Y◢'.ljust(row_width + 2) + rule]
+        for row in range(self.height):
+            cells = list()
+            for col in range(self.width):
+                cell = table[col][row]
+                if self.is_hidden and cell == '■':
                     # Прячем ещё живые корабли соперника
-                    print('○', end=' ') if cell == '■' else print(cell, end=' ')
-                else:
-                    print(cell, end=' ')
-            print('')
-        print('\n')
+                    cell = '○'
+                cells.append(f'{cell:>{col_width}} ')
+            lines.append(f'{row + 1:>{row_width}} | ' + ''.join(cells))
+        return '\n'.join(lines) + '\n\n\n'
 
-    @staticmethod
-    def out(dot: Dot) -> bool:
+    def show(self) -> None:
+        """
+        Выводит доску в консоль одной записью
+        в зависимости от параметра _is_hidden.
+        """
+
+        sys.stdout.write(self.render())
+        sys.stdout.flush()
+
+    def out(self, dot: Dot) -> bool:
         """
         Возвращает True , если точка выходит за пределы доски,
         и False, если не выходит.
         """
 
-        return not (0 <= dot.x < BOARD_SIZE and 0 <= dot.y < BOARD_SIZE)
+        return not (0 <= dot.x < self.width and 0 <= dot.y < self.height)
 
-    def shot(self, dot: Dot) -> bool:
+    def _strike(self, dot: Dot, journal: Optional[list]) -> int:
         """
-        Делает выстрел по доске.
-        Если есть попытка выстрелить за пределы доски или
-        в использованную точку, то выбрасывает исключения.
-        Возвращает True, если право следующего хода остаётся за текущим игроком
-        и False, если право следующего хода переходит сопернику.
+        Меняет состояние доски после выстрела.
+        Если задан журнал, добавляет в него всё нужное для отмены выстрела.
+        Возвращает MISS, HIT или SUNK.
         """
 
         # Если выстрел за пределы доски
-        if Board.out(dot):
+        if self.out(dot):
             raise BoardOutException
         # Если выстрел в уже стрелянную точку
         if dot in self.locked_dots:
             raise BoardUsedException
-        # Добавляем точку в список уже стрелянных
-        self.locked_dots.append(dot)
-        # Для каждого корабля на доске
-        for ship in self.ships:
-            # Если есть попадание
-            if ship.is_strike(dot):
-                # Отнимаем жизнь у корабля
-                ship.lives -= 1
-                # Помечаем точку на доске
-                self.table[dot.x][dot.y] = '×'
-                # Если это потопление
-                if ship.lives == 0:
-                    # Уменьшаем количество живых кораблей
-                    self.live_ships -= 1
-                    # Отмечаем ореол вокруг потопленного корабля
-                    self.mark_oreol(ship, is_game=True)
-                    # Сообщаем о потоплении
-                    print('\n\tКорабль потоплен!')
-                    sleep(1)
-                    # У текущего игрока сохраняется право следующего хода
-                    return True
-                # Попал, но не потопил
-                else:
-                    # Сообщаем о попадании
-                    print('\n\tПопадание!')
-                    sleep(1)
-                    # У текущего игрока сохраняется право следующего хода
-                    return True
-        # Нет попадания
-        # Помечаем точку на доске
-        self.table[dot.x][dot.y] = '•'
-        # Сообщаем о промахе
-        print('\n\tМимо.')
-        sleep(1)
-        # Право следующего хода переходит сопернику
-        return False
+        # Добавляем точку в множество уже стрелянных
+        self.locked_dots.add(dot)
+        result = MISS
+        halo = None
+        # Корабль, которому принадлежит точка
+        ship = self._ship_at.get(dot)
+        # Если есть попадание
+        if ship is not None:
+            # Отнимаем жизнь у корабля
+            ship.lives -= 1
+            # Помечаем точку на доске
+            self.table[dot.x][dot.y] = '×'
+            # Попал, но не потопил
+            result = HIT
+            # Если это потопление
+            if ship.lives == 0:
+                # Уменьшаем количество живых кораблей
+                self.live_ships -= 1
+                # Отмечаем ореол вокруг потопленного корабля
+                halo = self.mark_oreol(ship, is_game=True)
+                result = SUNK
+        else:
+            # Нет попадания
+            # Помечаем точку на доске
+            self.table[dot.x][dot.y] = '•'
+        self._toggle_state(dot, ship, halo)
+        if journal is not None:
+            journal.append((dot, ship, halo))
+        return result
+
+    def _toggle_state(self, dot: Dot, ship: Optional[Ship],
+                      halo: Optional[list[Dot]]) -> None:
+        """
+        Переключает биты кода состояния доски, которые меняет выстрел
+        в точку dot, и пересчитывает хеш. Выстрел и его отмена
+        переключают одни и те же биты.
+        """
 
-    def get_ready(self) -> None:
+        width = self.width
+        bit = dot.y * width + dot.x
+        if ship is not None:
+            bit += width * self.height
+        self._state_code ^= 1 << bit
+        self._state_hash ^= self._keys[bit]
+        # Потопление: палубы корабля и его ореол
+        if halo is not None:
+            cells = width * self.height
+            bits = [2 * cells + deck.y * width + deck.x for deck in ship.dots]
+            bits.extend(other.y * width + other.x for other in halo)
+            for bit in bits:
+                self._state_code ^= 1 << bit
+                self._state_hash ^= self._keys[bit]
+
+    def fire(self, dot: Dot) -> int:
         """
-        Обнуляет перед стартом игры список заблокированных точек,
-        который использовался во время генерации доски.
+        Делает выстрел по доске без вывода в консоль и пауз.
+        Если есть попытка выстрелить за пределы доски или
+        в использованную точку, то выбрасывает исключения.
+        Возвращает MISS, HIT или SUNK.
         """
 
-        self.locked_dots = list()
+        result = self._strike(dot, None)
+        # Записываем выстрел в историю партии
+        if self.history is not None:
+            self.history.append((dot.y * self.width + dot.x, result))
+        if instrument is not None:
+            instrument.count(SHOT_COUNTERS[result])
+        return result
 
-    def is_loser(self) -> bool:
+    def apply(self, dot: Dot) -> int:
         """
-        Проверяет состояние проигрыша.
+        Делает пробный выстрел, который можно отменить методом undo().
+        Пробные выстрелы не попадают в историю партии и в счётчики.
+        Возвращает MISS, HIT или SUNK.
         """
 
-        return self.live_ships == 0
-
+        return self._strike(dot, self._journal)
 
-class Player():
-    """
-    Родительский класс для представления игроков.
+    def undo(self) -> None:
+        """
+        Отменяет последний пробный выстрел.
+        """
 
-    Атрибуты
-    --------
-    own_board : Board
-        Собственная доска.
-    opponent_board: Board
-        Доска соперника.
+        dot, ship, halo = self._journal.pop()
+        self._toggle_state(dot, ship, halo)
+        self.locked_dots.discard(dot)
+        if ship is None:
+            self.table[dot.x][dot.y] = '○'
+            return
+        self.table[dot.x][dot.y] = '■'
+        ship.lives += 1
+        if halo is not None:
+            self.live_ships += 1
+            # По правилам в ореоле корабля нет палуб, там было море
+            for current_dot in halo:
+                self.locked_dots.discard(current_dot)
+                self.table[current_dot.x][current_dot.y] = '○'
+
+    def state(self) -> BoardState:
+        """
+        Возвращает видимое сопернику состояние доски.
+        У досок с одинаковыми размерами, на которых видно одно и то же,
+        состояния равны, как бы к ним ни пришли.
+        """
 
-    Методы
-    --------
-    ask():
-        Спрашивает игрока, в какую клетку он делает выстрел.
-        Потомки должны реализовать этот метод.
-    move():
-        Делает ход в игре.
-        Вызывает метод ask() и делает выстрел по доске соперника,
-        если есть исключения, повторяет попытку сделать ход.
-        Возвращает True, если право следующего хода остаётся за текущим игроком
-        и False, если право следующего хода переходит сопернику.
-    """
+        return BoardState(self._state_code, self._state_hash, self.width,
+                          self.height)
 
-    def __init__(self, own_board: Board, opponent_board: Board) -> None:
+    def _ship_of(self, dot: Dot) -> Optional[Ship]:
+        """
+        Возвращает корабль, которому принадлежит точка, или None.
         """
-        Устанавливает все необходимые атрибуты для объекта Player.
 
-        Атрибуты
-        --------
-        own_board : Board
-            Собственная доска.
-        opponent_board: Board
-            Доска соперника.
+        return self._ship_at.get(dot)
+
+    def shot(self, dot: Dot) -> ShotResult:
+        """
+        Делает выстрел по доске и передаёт его результат получателям events.
+        В консоль ничего не выводится: сообщения и паузы интерактивной
+        игры - дело получателя ConsolePrinter.
+        Если есть попытка выстрелить за пределы доски или
+        в использованную точку, то выбрасывает исключения.
+        Возвращает ShotResult.
         """
 
-        self.own_board = own_board
-        self.opponent_board = opponent_board
+        result = self.fire(dot)
+        width = self.width
+        if result != SUNK:
+            shot = ShotResult(dot.y * width + dot.x, result, board=self.name)
+        else:
+            ship = self._ship_of(dot)
+            # Палубы корабля идут от носа, т.е. по возрастанию номеров
+            decks = tuple(deck.y * width + deck.x for deck in ship.dots)
+            mask = 0
+            for deck in decks:
+                mask |= 1 << deck
+            # Номера клеток ореола по возрастанию
+            halo = oreol_mask(mask, width, self.height)
+            cells = list()
+            while halo:
+                low = halo & -halo
+                cells.append(low.bit_length() - 1)
+                halo ^= low
+            shot = ShotResult(dot.y * width + dot.x, result, ship,
+                              tuple(cells), decks, self.name)
+        if self.events is not None:
+            self.events.publish(shot)
+        return shot
 
-    def ask(self):
+    def get_ready(self) -> None:
         """
-        Спрашивает игрока, в какую клетку он делает выстрел.
-        Потомки должны реализовать этот метод.
+        Обнуляет перед стартом игры множество заблокированных точек,
+        которое использовалось во время генерации доски.
         """
 
-        raise NotImplementedError(f'Определите ask в {self.__class__.__name__}.')
+        self.locked_dots = set()
 
-    def move(self) -> bool:
+    def is_loser(self) -> bool:
         """
-        Делает ход в игре.
-        Вызывает метод ask() и делает выстрел по доске соперника,
-        если есть исключения, повторяет попытку сделать ход.
-        Возвращает True, если право следующего хода остаётся за текущим игроком
-        и False, если право следующего хода переходит сопернику.
+        Проверяет состояние проигрыша.
         """
 
-        while True:
-            try:
-                return self.opponent_board.shot(self.ask())
-            except ValueError:
-                print('\n\tВнимательнее, вводите две цифры через пробел.\n')
-                sleep(1)
-            except BoardException as e:
-                print(e)
-                sleep(1)
+        return self.live_ships == 0
 
 
-class AI(Player):
+@lru_cache(maxsize=None)
+def edge_masks(width: int = BOARD_SIZE,
+               height: int = BOARD_SIZE) -> tuple[int, int, int]:
+    """
+    Возвращает битовые маски всей доски, её первого и последнего столбцов.
+    Клетке с координатами (x, y) соответствует бит номер y * width + x.
     """
-    Класс для представления игрока-компьютера.
 
-    Наследуемые атрибуты
+    full = (1 << (width * height)) - 1
+    first = 0
+    for y in range(height):
+        first |= 1 << (y * width)
+    return full, first, first << (width - 1)
+
+
+def oreol_mask(mask: int, width: int = BOARD_SIZE,
+               height: int = BOARD_SIZE) -> int:
+    """
+    Возвращает битовую маску ореола вокруг точек маски.
+    Соседи находятся сдвигами всей маски сразу, поэтому время
+    не зависит от числа точек, а памяти под таблицы соседей не нужно.
+    """
+
+    full, first, last = edge_masks(width, height)
+    # Расширяем маску на клетку влево и вправо, не перенося биты
+    # через край доски на соседнюю строку
+    row = (mask | ((mask << 1) & ~first) | ((mask >> 1) & ~last)) & full
+    # Затем на строку вверх и вниз
+    return (row | (row << width) | (row >> width)) & full & ~mask
+
+
+class BitBoard(Board):
+    """
+    Класс для представления игровой доски, состояние которой хранится
+    в битовых масках вместо множества locked_dots и таблицы table.
+    Публичное поведение методов add_ship, shot и is_loser
+    совпадает с поведением Board.
+
+    Атрибуты
+    --------
+    width : int
+        Ширина доски (размер по оси x).
+    height : int
+        Высота доски (размер по оси y).
+    ships_types : list
+        Длины всех кораблей флота доски в порядке убывания.
+    ships : list
+        Список кораблей доски.
+    live_ships : int
+        Количество живых кораблей на доске.
+    _ship_masks : list
+        Список битовых масок кораблей в порядке списка ships.
+    _ship_at : dict
+        Номер корабля в списке ships для каждой клетки с палубой.
+    _ships : int
+        Битовая маска всех палуб на доске.
+    _shots : int
+        Битовая маска точек, куда уже стреляли.
+    _hits : int
+        Битовая маска подбитых палуб.
+    _halo : int
+        Битовая маска ореолов потопленных кораблей.
+    _sunk : int
+        Битовая маска палуб потопленных кораблей.
+    _locked : int
+        Битовая маска заблокированных точек, аналог множества locked_dots.
+    _keys : tuple
+        Ключи хеширования состояния доски (см. state_keys).
+    _state_hash : int
+        Хеш кода видимого состояния доски; сам код
+        собирается из масок методом state().
+    _journal : list
+        Журнал пробных выстрелов: состояние масок, хеша, количества живых
+        кораблей и номер подбитого корабля перед каждым выстрелом.
+        Маски - неизменяемые числа, поэтому снимок состояния
+        не требует копирования.
+
+    Методы
+    --------
+    @property
+    table():
+        Строит двумерный список состояний клеток по битовым маскам.
+        Нужен только для вывода доски методами render() и show().
+    @property
+    locked_dots():
+        Возвращает множество заблокированных точек.
+    ship_mask(Ship):
+        Возвращает битовую маску палуб корабля
+        (если корабль выходит за пределы доски, выбрасывает исключение).
+    is_used(int):
+        Проверяет, заблокирована ли клетка с данным номером.
+    shot_cell(int):
+        Делает выстрел по клетке с данным номером без вывода в консоль.
+        Возвращает MISS, HIT или SUNK.
+    apply_cell(int):
+        Делает пробный выстрел по клетке с данным номером,
+        который можно отменить методом undo().
+    set_ships(list):
+        Ставит на пустую доску сразу все корабли по их битовым маскам
+        без проверок.
+    """
+
+    def __init__(self, width: int = BOARD_SIZE, height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта BitBoard.
+        """
+
+        self.width = width
+        self.height = height
+        self.ships_types = list(ships_types)
+        self.ships = list()
+        self.live_ships = len(ships_types)
+        self._ship_masks = list()
+        self._ship_at = dict()
+        self._ships = 0
+        self._shots = 0
+        self._hits = 0
+        self._halo = 0
+        self._sunk = 0
+        self._locked = 0
+        self._keys = state_keys(width, height)
+        self._state_hash = 0
+        self._journal = list()
+
+    @property
+    def table(self) -> list[list[str]]:
+        """
+        Строит двумерный список состояний клеток по битовым маскам.
+        Нужен только для вывода доски методами render() и show().
+        """
+
+        cells = self.width * self.height
+        # Строки из нулей и единиц, где i-й символ - i-й бит маски
+        hits = format(self._hits, f'0{cells}b')[::-1]
+        used = format(self._shots | self._halo, f'0{cells}b')[::-1]
+        ships = format(self._ships, f'0{cells}b')[::-1]
+        table = [['○'] * self.height for _ in range(self.width)]
+        for y in range(self.height):
+            for x in range(self.width):
+                i = y * self.width + x
+                if hits[i] == '1':
+                    table[x][y] = '×'
+                elif used[i] == '1':
+                    table[x][y] = '•'
+                elif ships[i] == '1':
+                    table[x][y] = '■'
+        return table
+
+    @property
+    def locked_dots(self) -> set[Dot]:
+        """
+        Возвращает множество заблокированных точек.
+        """
+
+        locked = format(self._locked, f'0{self.width * self.height}b')[::-1]
+        return {Dot(i % self.width, i // self.width)
+                for i, bit in enumerate(locked) if bit == '1'}
+
+    def ship_mask(self, ship: Ship) -> int:
+        """
+        Возвращает битовую маску палуб корабля
+        (если корабль выходит за пределы доски, выбрасывает исключение).
+        """
+
+        mask = 0
+        for dot in ship.dots:
+            if self.out(dot):
+                raise BoardWrongShipException()
+            mask |= 1 << (dot.y * self.width + dot.x)
+        return mask
+
+    def add_ship(self, ship: Ship) -> None:
+        """
+        Ставит корабль на доску (если не получается, выбрасывает исключение).
+        """
+
+        try:
+            mask = self.ship_mask(ship)
+        except BoardWrongShipException:
+            if instrument is not None:
+                instrument.count('add_ship.rejected')
+            raise
+        # Проверяем возможность установки всех точек корабля
+        if mask & self._locked:
+            if instrument is not None:
+                instrument.count('add_ship.rejected')
+            raise BoardWrongShipException()
+        # Устанавливаем на доску корабль
+        self._ships |= mask
+        self._locked |= mask
+        for dot in ship.dots:
+            self._ship_at[dot.y * self.width + dot.x] = len(self.ships)
+        # Добавляем корабль в список кораблей доски
+        self.ships.append(ship)
+        self._ship_masks.append(mask)
+        # Отмечаем ореол корабля
+        self.mark_oreol(ship)
+
+    def set_ships(self, masks: list[int]) -> None:
+        """
+        Ставит на пустую доску сразу все корабли по их битовым маскам
+        палуб, например из ship_placements. Расстановка не проверяется
+        и ореолы не помечаются: маски должны быть заведомо допустимой
+        расстановкой флота доски, как у layouts.generate_placements.
+        Доска сразу готова к игре, вызывать get_ready() не нужно.
+        """
+
+        width = self.width
+        ships = 0
+        for number, mask in enumerate(masks):
+            bow = (mask & -mask).bit_length() - 1
+            length = bin(mask).count('1')
+            # Вертикальный корабль занимает и клетку под носом
+            direction = int(length > 1 and bool(mask >> (bow + width) & 1))
+            self.ships.append(Ship(length, Dot(bow % width, bow // width),
+                                   direction))
+            self._ship_masks.append(mask)
+            ships |= mask
+            while mask:
+                low = mask & -mask
+                self._ship_at[low.bit_length() - 1] = number
+                mask ^= low
+        self._ships = ships
+
+    def mark_oreol(self, ship: Ship, is_game: bool = False) -> int:
+        """
+        Формирует ореол корабля, т.е. помечает точки вокруг,
+        где другого корабля по правилам быть не может.
+        Возвращает битовую маску вновь помеченных точек.
+        """
+
+        # Соседи корабля, которые не были помечены ранее
+        oreol = oreol_mask(self.ship_mask(ship), self.width, self.height) \
+            & ~self._locked
+        self._locked |= oreol
+        # Если идёт игра, отмечаем ореол на доске
+        if is_game:
+            self._halo |= oreol
+        return oreol
+
+    def is_used(self, index: int) -> bool:
+        """
+        Проверяет, заблокирована ли клетка с данным номером.
+        """
+
+        return bool(self._locked >> index & 1)
+
+    def shot_cell(self, index: int) -> int:
+        """
+        Делает выстрел по клетке с данным номером без вывода в консоль.
+        Если клетка уже использована, выбрасывает исключение.
+        Возвращает MISS, HIT или SUNK.
+        """
+
+        # Если выстрел в уже стрелянную точку
+        if self._locked >> index & 1:
+            raise BoardUsedException
+        bit = 1 << index
+        # Добавляем точку в маску уже стрелянных
+        self._locked |= bit
+        self._shots |= bit
+        keys = self._keys
+        # Нет попадания
+        number = self._ship_at.get(index)
+        if number is None:
+            self._state_hash ^= keys[index]
+            return MISS
+        # Есть попадание
+        self._hits |= bit
+        cells = self.width * self.height
+        self._state_hash ^= keys[cells + index]
+        ship = self.ships[number]
+        ship.lives -= 1
+        # Если это потопление
+        if ship.lives == 0:
+            self.live_ships -= 1
+            mask = self._ship_masks[number]
+            # Отмечаем ореол вокруг потопленного корабля
+            oreol = oreol_mask(mask, self.width, self.height) & ~self._locked
+            self._locked |= oreol
+            self._halo |= oreol
+            self._sunk |= mask
+            # Палубы корабля становятся потопленными, ореол - пустым
+            key = self._state_hash
+            while mask:
+                low = mask & -mask
+                key ^= keys[2 * cells + low.bit_length() - 1]
+                mask ^= low
+            while oreol:
+                low = oreol & -oreol
+                key ^= keys[low.bit_length() - 1]
+                oreol ^= low
+            self._state_hash = key
+            return SUNK
+        return HIT
+
+    def fire(self, dot: Dot) -> int:
+        """
+        Делает выстрел по доске без вывода в консоль и пауз.
+        Если есть попытка выстрелить за пределы доски или
+        в использованную точку, то выбрасывает исключения.
+        Возвращает MISS, HIT или SUNK.
+        """
+
+        # Если выстрел за пределы доски
+        if self.out(dot):
+            raise BoardOutException
+        index = dot.y * self.width + dot.x
+        result = self.shot_cell(index)
+        # Записываем выстрел в историю партии
+        if self.history is not None:
+            self.history.append((index, result))
+        if instrument is not None:
+            instrument.count(SHOT_COUNTERS[result])
+        return result
+
+    def apply_cell(self, index: int) -> int:
+        """
+        Делает пробный выстрел по клетке с данным номером,
+        который можно отменить методом undo().
+        Возвращает MISS, HIT или SUNK.
+        """
+
+        # Если выстрел в уже стрелянную точку
+        if self._locked >> index & 1:
+            raise BoardUsedException
+        self._journal.append((self._locked, self._shots, self._hits,
+                              self._halo, self._sunk, self._state_hash,
+                              self.live_ships, self._ship_at.get(index)))
+        return self.shot_cell(index)
+
+    def apply(self, dot: Dot) -> int:
+        """
+        Делает пробный выстрел, который можно отменить методом undo().
+        Пробные выстрелы не попадают в историю партии и в счётчики.
+        Возвращает MISS, HIT или SUNK.
+        """
+
+        # Если выстрел за пределы доски
+        if self.out(dot):
+            raise BoardOutException
+        return self.apply_cell(dot.y * self.width + dot.x)
+
+    def undo(self) -> None:
+        """
+        Отменяет последний пробный выстрел.
+        """
+
+        (self._locked, self._shots, self._hits, self._halo, self._sunk,
+         self._state_hash, self.live_ships, number) = self._journal.pop()
+        if number is not None:
+            self.ships[number].lives += 1
+
+    def state(self) -> BoardState:
+        """
+        Возвращает видимое сопернику состояние доски.
+        """
+
+        cells = self.width * self.height
+        empty = (self._shots & ~self._hits) | self._halo
+        code = empty | self._hits << cells | self._sunk << 2 * cells
+        return BoardState(code, self._state_hash, self.width, self.height)
+
+    def _ship_of(self, dot: Dot) -> Optional[Ship]:
+        """
+        Возвращает корабль, которому принадлежит точка, или None.
+        """
+
+        number = self._ship_at.get(dot.y * self.width + dot.x)
+        return None if number is None else self.ships[number]
+
+    def get_ready(self) -> None:
+        """
+        Обнуляет перед стартом игры маску заблокированных точек,
+        которая использовалась во время генерации доски.
+        """
+
+        self._locked = 0
+
+
+@lru_cache(maxsize=None)
+def ship_positions(length: int, width: int = BOARD_SIZE,
+                   height: int = BOARD_SIZE) -> tuple[
+        tuple[int, int, int], ...]:
+    """
+    Возвращает все положения корабля данной длины на пустой доске
+    в виде кортежей (x, y, направление) носа корабля.
+    Однопалубный корабль учитывается только в одном направлении,
+    чтобы каждое положение встречалось ровно один раз.
+    """
+
+    positions = list()
+    for direction in ((0,) if length == 1 else (0, 1)):
+        for y in range(height - (length - 1) * direction):
+            for x in range(width - (length - 1) * (1 - direction)):
+                positions.append((x, y, direction))
+    return tuple(positions)
+
+
+@lru_cache(maxsize=None)
+def ship_placements(length: int, width: int = BOARD_SIZE,
+                    height: int = BOARD_SIZE) -> tuple[
+        tuple[int, int, int, int, int], ...]:
+    """
+    Возвращает все положения корабля данной длины на пустой доске
+    в виде кортежей (маска палуб, маска палуб с ореолом, x, y, направление).
+    Маски занимают width * height бит каждая, поэтому на больших досках
+    лучше обходиться позициями ship_positions и индексом placement_index.
+    """
+
+    placements = list()
+    for x, y, direction in ship_positions(length, width, height):
+        mask = 0
+        for i in range(length):
+            mask |= 1 << ((y + i * direction) * width +
+                          x + i * (1 - direction))
+        blocked = mask | oreol_mask(mask, width, height)
+        placements.append((mask, blocked, x, y, direction))
+    return tuple(placements)
+
+
+@lru_cache(maxsize=None)
+def placement_index(lengths: tuple[int, ...], width: int = BOARD_SIZE,
+                    height: int = BOARD_SIZE) -> tuple[
+        tuple[int, ...], tuple[tuple[int, ...], ...],
+        tuple[tuple[int, ...], ...], tuple[tuple[int, int, int], ...]]:
+    """
+    Нумерует все положения кораблей данных длин на доске.
+    Возвращает кортеж из длин положений, номеров клеток каждого положения,
+    номеров положений, накрывающих каждую клетку, и позиций
+    (x, y, направление) носа корабля в каждом положении.
+    """
+
+    placement_lengths = list()
+    placement_cells = list()
+    by_cell = [list() for _ in range(width * height)]
+    positions = list()
+    for length in lengths:
+        for x, y, direction in ship_positions(length, width, height):
+            cells = tuple((y + i * direction) * width + x + i * (1 - direction)
+                          for i in range(length))
+            for cell in cells:
+                by_cell[cell].append(len(placement_cells))
+            placement_lengths.append(length)
+            placement_cells.append(cells)
+            positions.append((x, y, direction))
+    return (tuple(placement_lengths), tuple(placement_cells),
+            tuple(tuple(placements) for placements in by_cell),
+            tuple(positions))
+
+
+def derive_seed(seed: int, index: int) -> int:
+    """
+    Возвращает 64-битное начальное значение потока номер index,
+    порождённого потоком с начальным значением seed.
+    Значение не зависит от процесса и платформы, поэтому партию
+    из параллельного прогона можно повторить по её seed.
+    """
+
+    digest = blake2b(f'{seed}:{index}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class RandomStream():
+    """
+    Класс для представления потока случайных чисел одной игры.
+    Числа берутся из генератора random.Random, заведённого от seed,
+    пачками по BATCH 32-битных слов, а не по одному на вызов.
+    Два потока с одним seed выдают одинаковые последовательности
+    на любой платформе.
+
+    Атрибуты
+    --------
+    BATCH : int
+        Количество 32-битных слов в одной пачке.
+    seed : int
+        Начальное значение потока.
+    _rng : Random
+        Генератор, из которого берутся пачки.
+    _words : tuple
+        Текущая пачка слов.
+    _next : int
+        Номер следующего слова пачки.
+
+    Методы
+    --------
+    below(int):
+        Возвращает случайное целое число от 0 до n - 1.
+    randint(int, int):
+        Возвращает случайное целое число от a до b включительно.
+    random():
+        Возвращает случайное число от 0 до 1 (1 не включается).
+    shuffle(list):
+        Перемешивает список на месте.
+    spawn(int):
+        Возвращает независимый поток номер index, порождённый этим потоком.
+    """
+
+    BATCH = 256
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта RandomStream.
+        Если seed не задан, он берётся из общего генератора модуля random.
+        """
+
+        self.seed = getrandbits(64) if seed is None else seed
+        self._rng = Random(self.seed)
+        # Первая пачка берётся при первом вызове
+        self._words = ()
+        self._next = self.BATCH
+
+    def _refill(self) -> None:
+        """
+        Берёт у генератора следующую пачку слов.
+        """
+
+        bits = self._rng.getrandbits(32 * self.BATCH)
+        self._words = struct.unpack(f'<{self.BATCH}I',
+                                    bits.to_bytes(4 * self.BATCH, 'little'))
+        self._next = 0
+
+    def below(self, n: int) -> int:
+        """
+        Возвращает случайное целое число от 0 до n - 1.
+        Число получается умножением 32-битного слова на n,
+        поэтому неравномерность не больше n / 2 ** 32.
+        """
+
+        if self._next == self.BATCH:
+            self._refill()
+        word = self._words[self._next]
+        self._next += 1
+        return word * n >> 32
+
+    def randint(self, a: int, b: int) -> int:
+        """
+        Возвращает случайное целое число от a до b включительно.
+        """
+
+        return a + self.below(b - a + 1)
+
+    def random(self) -> float:
+        """
+        Возвращает случайное число от 0 до 1 (1 не включается)
+        с шагом 2 ** -32.
+        """
+
+        return self.below(1 << 32) / 4294967296.0
+
+    def shuffle(self, items: list) -> None:
+        """
+        Перемешивает список на месте (алгоритм Фишера - Йетса).
+        """
+
+        for i in range(len(items) - 1, 0, -1):
+            j = self.below(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def spawn(self, index: int) -> 'RandomStream':
+        """
+        Возвращает независимый поток номер index, порождённый этим потоком.
+        """
+
+        return RandomStream(derive_seed(self.seed, index))
+
+
+def place_fleet(ships_types: list[int] = SHIPS_TYPES,
+                width: int = BOARD_SIZE,
+                height: int = BOARD_SIZE,
+                max_steps: int = 20000,
+                restarts: int = 3,
+                rng: Optional[RandomStream] = None) -> list[Ship]:
+    """
+    Генерирует случайную расстановку флота поиском с возвратом.
+    Для каждой длины корабля поддерживается список положений, свободных
+    от уже поставленных кораблей и их ореолов, и из него равновероятно
+    выбирается положение очередного корабля. После постановки корабля
+    из списков убираются только положения, проходящие через вновь
+    занятые клетки, поэтому шаг поиска не зависит от размера доски.
+    Если следующий корабль поставить некуда, выбор предыдущего корабля
+    отменяется, и это положение больше не пробуется на этом шаге.
+    Поиск ограничен max_steps шагами; если лимит исчерпан, поиск
+    начинается заново, но не более restarts раз.
+    Случайные числа берутся из потока rng, а если он не задан -
+    из общего генератора модуля random.
+    Если флот заведомо невозможно разместить (не проходит оценка
+    по площади или перебраны все варианты), выбрасывает
+    BoardWrongFleetException. Если исчерпаны лимит шагов и перезапуски,
+    выбрасывает BoardFleetSearchException: флот может и помещаться,
+    но расстановка не найдена - можно увеличить max_steps или restarts.
+    Возвращает список кораблей.
+    """
+
+    # Каждый корабль вместе с полосой клеток справа и снизу от него
+    # занимает прямоугольник (length + 1) x 2 на доске
+    # (width + 1) x (height + 1), и у непересекающихся по правилам
+    # кораблей эти прямоугольники не пересекаются, поэтому флот
+    # большей площади не поместится никогда
+    if instrument is not None:
+        instrument.count('place_fleet.calls')
+    if sum((length + 1) * 2 for length in ships_types) > \
+       (width + 1) * (height + 1):
+        if instrument is not None:
+            instrument.count('place_fleet.failures')
+        raise BoardWrongFleetException()
+    below = rng.below if rng is not None else randrange
+    lengths, cells, by_cell, positions = placement_index(
+        tuple(sorted(set(ships_types), reverse=True)), width, height)
+    for attempt in range(restarts + 1):
+        # Свободные положения каждой длины и место каждого положения в них
+        free = {length: list() for length in lengths}
+        where = list()
+        for placement, length in enumerate(lengths):
+            where.append(len(free[length]))
+            free[length].append(placement)
+
+        def remove(placement: int) -> None:
+            # Меняем положение местами с последним в списке и снимаем
+            pool = free[lengths[placement]]
+            last = pool.pop()
+            if last != placement:
+                pool[where[placement]] = last
+                where[last] = where[placement]
+            where[placement] = -1
+
+        def restore(placement: int) -> None:
+            pool = free[lengths[placement]]
+            where[placement] = len(pool)
+            pool.append(placement)
+
+        locked = bytearray(width * height)
+        # Для каждого поставленного корабля: положение, занятые им клетки
+        # и убранные из списков положения
+        chosen = list()
+        # Отвергнутые на каждом шаге положения
+        rejected = [list() for _ in ships_types]
+        steps = backtracks = 0
+        while len(chosen) < len(ships_types) and steps < max_steps:
+            steps += 1
+            level = len(chosen)
+            pool = free[ships_types[level]]
+            # Поставить корабль некуда - возвращаемся на шаг назад
+            if not pool:
+                # Перебраны все варианты - флот разместить невозможно
+                if not level:
+                    if instrument is not None:
+                        instrument.count('place_fleet.steps', steps)
+                        instrument.count('place_fleet.backtracks', backtracks)
+                        instrument.count('place_fleet.failures')
+                    raise BoardWrongFleetException()
+                backtracks += 1
+                for placement in rejected[level]:
+                    restore(placement)
+                rejected[level] = list()
+                placement, newly_locked, removed = chosen.pop()
+                for cell in newly_locked:
+                    locked[cell] = 0
+                for other in reversed(removed):
+                    restore(other)
+                remove(placement)
+                rejected[level - 1].append(placement)
+                continue
+            # Равновероятно выбираем одно из свободных положений
+            placement = pool[below(len(pool))]
+            newly_locked = list()
+            removed = list()
+            # Занимаем палубы и ореол корабля
+            for cell in cells[placement]:
+                x, y = cell % width, cell // width
+                for ny in range(max(y - 1, 0), min(y + 2, height)):
+                    for nx in range(max(x - 1, 0), min(x + 2, width)):
+                        neighbour = ny * width + nx
+                        if locked[neighbour]:
+                            continue
+                        locked[neighbour] = 1
+                        newly_locked.append(neighbour)
+                        for other in by_cell[neighbour]:
+                            if where[other] >= 0:
+                                remove(other)
+                                removed.append(other)
+            chosen.append((placement, newly_locked, removed))
+        if instrument is not None:
+            instrument.count('place_fleet.steps', steps)
+            instrument.count('place_fleet.backtracks', backtracks)
+            if len(chosen) < len(ships_types):
+                # Лимит шагов исчерпан: поиск начнётся заново или
+                # закончится неудачей, хотя флот, возможно, помещается
+                instrument.count('place_fleet.restarts' if attempt < restarts
+                                 else 'place_fleet.exhausted')
+        if len(chosen) == len(ships_types):
+            ships = list()
+            for length, (placement, _, _) in zip(ships_types, chosen):
+                x, y, direction = positions[placement]
+                ships.append(Ship(length, Dot(x, y), direction))
+            return ships
+    raise BoardFleetSearchException()
+
+
+class Player():
+    """
+    Родительский класс для представления игроков.
+
+    Атрибуты
     --------
     own_board : Board
         Собственная доска.
     opponent_board: Board
         Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
+
+    Методы
+    --------
+    ask():
+        Спрашивает игрока, в какую клетку он делает выстрел.
+        Потомки должны реализовать этот метод.
+    learn(Dot, int):
+        Сообщает игроку результат его выстрела.
+        Потомки могут переопределить этот метод.
+    strike(Dot):
+        Делает выстрел по доске соперника и сообщает игроку результат.
+    @staticmethod
+    retry_message(Exception):
+        Учитывает неудачную попытку хода и возвращает сообщение о ней.
+    move():
+        Делает ход в игре.
+        Вызывает метод ask() и делает выстрел по доске соперника,
+        если есть исключения, повторяет попытку сделать ход.
+        Возвращает True, если право следующего хода остаётся за текущим игроком
+        и False, если право следующего хода переходит сопернику.
+    """
+
+    def __init__(self, own_board: Board, opponent_board: Board,
+                 rng: Optional[RandomStream] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта Player.
+
+        Атрибуты
+        --------
+        own_board : Board
+            Собственная доска.
+        opponent_board: Board
+            Доска соперника.
+        rng : RandomStream
+            Поток случайных чисел игрока; если не задан,
+            заводится новый со случайным seed.
+        """
+
+        self.own_board = own_board
+        self.opponent_board = opponent_board
+        self.rng = rng if rng is not None else RandomStream()
+
+    def ask(self):
+        """
+        Спрашивает игрока, в какую клетку он делает выстрел.
+        Потомки должны реализовать этот метод.
+        """
+
+        raise NotImplementedError(f'Определите ask в {self.__class__.__name__}.')
+
+    def learn(self, dot: Dot, result: int) -> None:
+        """
+        Сообщает игроку результат его выстрела.
+        Потомки могут переопределить этот метод.
+        """
+
+        pass
+
+    def strike(self, dot: Dot) -> int:
+        """
+        Делает выстрел по доске соперника и сообщает игроку результат.
+        О результате выстрела сообщают и получатели events доски.
+        Если выстрел не удался, выбрасывает исключение доски.
+        Возвращает MISS, HIT или SUNK.
+        """
+
+        result = self.opponent_board.shot(dot).result
+        self.learn(dot, result)
+        return result
+
+    @staticmethod
+    def retry_message(error: Exception) -> str:
+        """
+        Учитывает неудачную попытку хода (неверный ввод - ValueError
+        или ошибку доски) и возвращает сообщение о ней для игрока.
+        """
+
+        if isinstance(error, BoardException):
+            if instrument is not None:
+                instrument.count(retry_counter(error))
+            return str(error)
+        if instrument is not None:
+            instrument.count('move.retry.input')
+        return WRONG_INPUT
+
+    def move(self) -> bool:
+        """
+        Делает ход в игре.
+        Вызывает метод ask() и делает выстрел по доске соперника,
+        если есть исключения, повторяет попытку сделать ход.
+        Возвращает True, если право следующего хода остаётся за текущим игроком
+        и False, если право следующего хода переходит сопернику.
+        """
+
+        while True:
+            try:
+                result = self.strike(self.ask())
+            except (ValueError, BoardException) as e:
+                print(Player.retry_message(e))
+                sleep(1)
+            else:
+                # Право хода остаётся за текущим игроком только при попадании
+                return result != MISS
+
+
+class AI(Player):
+    """
+    Класс для представления игрока-компьютера.
+
+    Наследуемые атрибуты
+    --------
+    own_board : Board
+        Собственная доска.
+    opponent_board: Board
+        Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
 
     Наследуемые методы
     --------
@@ -487,21 +1837,268 @@ class AI(Player):
 
     Методы
     --------
+    choose():
+        Выбирает точку для выстрела без вывода в консоль и пауз.
+        Для AI это будет выбор случайной точки.
+    decide():
+        Выбирает точку методом choose(), учитывая время выбора
+        в инструментировании.
     ask():
         Спрашивает игрока, в какую клетку он делает выстрел.
-        Для AI это будет выбор случайной точки.
+        Выводит выбор метода choose() в консоль.
     """
 
+    def choose(self) -> Dot:
+        """
+        Выбирает точку для выстрела без вывода в консоль и пауз.
+        Для AI это будет выбор случайной точки.
+        """
+
+        return Dot(self.rng.randint(0, self.opponent_board.width - 1),
+                   self.rng.randint(0, self.opponent_board.height - 1))
+
     def ask(self) -> Dot:
         """
         Спрашивает игрока, в какую клетку он делает выстрел.
-        Для AI это будет выбор случайной точки.
+        Выводит выбор метода choose() в консоль.
         """
 
-        x, y = randint(1, BOARD_SIZE), randint(1, BOARD_SIZE)
-        print(f'x y = {x} {y}')
+        dot = self.decide()
+        print(f'x y = {dot.x + 1} {dot.y + 1}')
         sleep(1)
-        return Dot(x - 1, y - 1)
+        return dot
+
+    def decide(self) -> Dot:
+        """
+        Выбирает точку методом choose(), учитывая время выбора
+        в инструментировании.
+        """
+
+        if instrument is None:
+            return self.choose()
+        return instrument.timed(f'{type(self).__name__}.choose', self.choose)
+
+
+class DensityAI(AI):
+    """
+    Класс для представления игрока-компьютера, который стреляет
+    в клетку, накрываемую наибольшим числом возможных положений
+    ещё не потопленных кораблей.
+
+    Положение корабля считается возможным, пока оно не противоречит
+    увиденному: не проходит через промахи, ореолы потопленных кораблей,
+    палубы потопленных кораблей и диагональных соседей попаданий
+    (там по правилам не может быть палуб), и не состоит целиком
+    из попаданий, если корабль при этом не потоплен.
+    Положения, проходящие через непотопленные попадания,
+    получают вес HIT_BONUS в степени числа таких попаданий,
+    поэтому после попадания AI добивает раненый корабль.
+
+    Плотность клеток обновляется после каждого выстрела только
+    для положений, проходящих через изменившиеся клетки,
+    а самая плотная клетка берётся из кучи с ленивым удалением
+    устаревших записей, поэтому время выбора не зависит
+    от размера доски.
+
+    Наследуемые атрибуты
+    --------
+    own_board : Board
+        Собственная доска.
+    opponent_board: Board
+        Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
+
+    Атрибуты
+    --------
+    HIT_BONUS : int
+        Множитель веса положения за каждое непотопленное попадание в нём.
+    _alive : bytearray
+        Признаки возможности каждого положения кораблей.
+    _live : int
+        Количество возможных положений.
+    _by_length : dict
+        Номера положений кораблей каждой длины (подряд идущий диапазон).
+    _hits_in : list
+        Число непотопленных попаданий в каждом положении.
+    _weight : list
+        Текущий вес каждого положения (0 для невозможных).
+    _score : list
+        Плотность каждой клетки: сумма весов накрывающих её положений.
+    _known : bytearray
+        Признаки клеток, в которые стрелять уже не нужно.
+    _hits : set
+        Номера клеток с непотопленными попаданиями.
+    _remaining : dict
+        Количество ещё не потопленных кораблей каждой длины.
+    _heap : list
+        Куча пар (минус плотность, случайный ключ, номер клетки).
+
+    Методы
+    --------
+    choose_cell():
+        Возвращает номер самой плотной клетки.
+    choose():
+        Выбирает для выстрела самую плотную клетку
+        без вывода в консоль и пауз.
+    learn(Dot, int):
+        Обновляет плотность клеток по результату выстрела.
+    """
+
+    HIT_BONUS = 1000
+
+    def __init__(self, own_board: Board, opponent_board: Board,
+                 rng: Optional[RandomStream] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта DensityAI.
+        """
+
+        super().__init__(own_board, opponent_board, rng)
+        width, height = opponent_board.width, opponent_board.height
+        self._remaining = dict()
+        for length in opponent_board.ships_types:
+            self._remaining[length] = self._remaining.get(length, 0) + 1
+        # Все положения кораблей всех длин флота
+        self._lengths, self._cells, self._by_cell, _ = \
+            placement_index(tuple(self._remaining), width, height)
+        # placement_index нумерует положения одной длины подряд
+        self._by_length = dict()
+        start = 0
+        for length in self._remaining:
+            end = start + len(ship_positions(length, width, height))
+            self._by_length[length] = range(start, end)
+            start = end
+        self._alive = bytearray(b'\x01' * len(self._cells))
+        self._live = len(self._cells)
+        self._hits_in = [0] * len(self._cells)
+        self._weight = [1] * len(self._cells)
+        self._score = [len(placements) for placements in self._by_cell]
+        self._known = bytearray(width * height)
+        self._hits = set()
+        # Случайный ключ разбивает ничьи между одинаково плотными клетками
+        keys = list(range(width * height))
+        self.rng.shuffle(keys)
+        self._keys = keys
+        self._heap = [(-score, keys[cell], cell)
+                      for cell, score in enumerate(self._score)]
+        heapify(self._heap)
+
+    def _set_weight(self, placement: int, weight: int) -> None:
+        """
+        Меняет вес положения и плотность накрываемых им клеток.
+        """
+
+        delta = weight - self._weight[placement]
+        if not delta:
+            return
+        self._weight[placement] = weight
+        for cell in self._cells[placement]:
+            self._score[cell] += delta
+            heappush(self._heap, (-self._score[cell], self._keys[cell], cell))
+
+    def _kill(self, placement: int) -> None:
+        """
+        Помечает положение как невозможное.
+        """
+
+        if self._alive[placement]:
+            self._alive[placement] = 0
+            self._live -= 1
+            self._set_weight(placement, 0)
+
+    def _kill_cell(self, cell: int) -> None:
+        """
+        Помечает клетку, где точно нет палубы непотопленного корабля.
+        """
+
+        self._known[cell] = 1
+        for placement in self._by_cell[cell]:
+            self._kill(placement)
+
+    def choose_cell(self) -> int:
+        """
+        Возвращает номер самой плотной клетки.
+        """
+
+        heap = self._heap
+        while heap:
+            score, _, cell = heap[0]
+            # Пропускаем устаревшие записи и уже известные клетки
+            if self._known[cell] or -score != self._score[cell]:
+                heappop(heap)
+                continue
+            return cell
+        # Положений не осталось: стреляем в любую неизвестную клетку
+        return self._known.index(0)
+
+    def choose(self) -> Dot:
+        """
+        Выбирает для выстрела самую плотную клетку
+        без вывода в консоль и пауз.
+        """
+
+        cell = self.choose_cell()
+        width = self.opponent_board.width
+        return Dot(cell % width, cell // width)
+
+    def learn(self, dot: Dot, result: int) -> None:
+        """
+        Обновляет плотность клеток по результату выстрела.
+        """
+
+        width, height = self.opponent_board.width, self.opponent_board.height
+        x, y = dot.x, dot.y
+        cell = y * width + x
+        if result == MISS:
+            self._kill_cell(cell)
+            return
+        self._known[cell] = 1
+        self._hits.add(cell)
+        if result == SUNK:
+            # Потопленный корабль - связный отрезок попаданий
+            ship = {cell}
+            stack = [cell]
+            while stack:
+                current = stack.pop()
+                cx, cy = current % width, current // width
+                for nx, ny in ((cx - 1, cy), (cx + 1, cy),
+                               (cx, cy - 1), (cx, cy + 1)):
+                    neighbour = ny * width + nx
+                    if 0 <= nx < width and 0 <= ny < height and \
+                       neighbour in self._hits and neighbour not in ship:
+                        ship.add(neighbour)
+                        stack.append(neighbour)
+            self._hits -= ship
+            length = len(ship)
+            self._remaining[length] -= 1
+            # Кораблей этой длины больше нет - все их положения невозможны
+            if not self._remaining[length]:
+                for placement in self._by_length[length]:
+                    self._kill(placement)
+            # Палубы и ореол потопленного корабля
+            for current in ship:
+                cx, cy = current % width, current // width
+                for nx in range(cx - 1, cx + 2):
+                    for ny in range(cy - 1, cy + 2):
+                        if 0 <= nx < width and 0 <= ny < height:
+                            self._kill_cell(ny * width + nx)
+            return
+        # Диагональные соседи попадания точно пусты
+        for nx, ny in ((x - 1, y - 1), (x + 1, y - 1),
+                       (x - 1, y + 1), (x + 1, y + 1)):
+            if 0 <= nx < width and 0 <= ny < height:
+                self._kill_cell(ny * width + nx)
+        # Положения через попадание становятся весомее, а положения
+        # целиком из попаданий невозможны: корабль не потоплен
+        for placement in self._by_cell[cell]:
+            if not self._alive[placement]:
+                continue
+            self._hits_in[placement] += 1
+            if self._hits_in[placement] == self._lengths[placement]:
+                self._kill(placement)
+            else:
+                self._set_weight(placement, DensityAI.HIT_BONUS
+                                 ** self._hits_in[placement])
 
 
 class User(Player):
@@ -514,6 +2111,8 @@ class User(Player):
         Собственная доска.
     opponent_board: Board
         Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
 
     Наследуемые методы
     --------
@@ -526,21 +2125,128 @@ class User(Player):
 
     Методы
     --------
+    @staticmethod
+    parse(str):
+        Переводит строку с координатами выстрела в точку.
+        Если строка не из двух чисел, выбрасывает ValueError.
     ask():
         Спрашивает игрока, в какую клетку он делает выстрел.
     """
 
-    def ask(self) -> Dot:
+    @staticmethod
+    def parse(line: str) -> Dot:
         """
-        Спрашивает игрока, в какую клетку он делает выстрел.
+        Переводит строку с координатами выстрела в точку.
+        Если строка не из двух чисел, выбрасывает ValueError.
         """
 
-        x, y = input('x y = ').strip().split()
+        x, y = line.strip().split()
         if x and y:
             return Dot(int(x) - 1, int(y) - 1)
         else:
             raise ValueError
 
+    def ask(self) -> Dot:
+        """
+        Спрашивает игрока, в какую клетку он делает выстрел.
+        """
+
+        return User.parse(input('x y = '))
+
+
+class Renderer():
+    """
+    Класс для вывода кадров игры в консоль.
+    Каждый кадр собирается в одну строку и выводится одной записью.
+    В режиме ANSI кадр рисуется в верхнем левом углу экрана,
+    а при следующих выводах перерисовываются только изменившиеся
+    символы: курсор переводится к ним escape-последовательностями.
+
+    Атрибуты
+    --------
+    stream : TextIO
+        Поток вывода.
+    ansi : bool
+        Информация о том, нужно ли перерисовывать только изменения.
+    _last : list
+        Строки последнего выведенного кадра (в режиме ANSI).
+
+    Методы
+    --------
+    draw(str):
+        Выводит кадр целиком или только его изменения.
+    diff(list, list):
+        Возвращает escape-последовательности, переводящие экран
+        от старого кадра к новому.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None,
+                 ansi: bool = False) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта Renderer.
+
+        Атрибуты
+        --------
+        stream : TextIO
+            Поток вывода (по умолчанию sys.stdout).
+        ansi : bool
+            Информация о том, нужно ли перерисовывать только изменения.
+        """
+
+        self.stream = stream if stream is not None else sys.stdout
+        self.ansi = ansi
+        self._last = None
+
+    def draw(self, frame: str) -> None:
+        """
+        Выводит кадр целиком или только его изменения.
+        """
+
+        if not self.ansi:
+            output = frame
+        else:
+            lines = frame.split('\n')
+            if self._last is None:
+                # Первый кадр: очищаем экран и рисуем всё
+                output = '\x1b[H\x1b[2J' + frame
+            else:
+                output = Renderer.diff(self._last, lines)
+            # Переводим курсор под кадр и стираем всё, что ниже
+            output += f'\x1b[{len(lines)};1H\x1b[J'
+            self._last = lines
+        self.stream.write(output)
+        self.stream.flush()
+
+    @staticmethod
+    def diff(old: list[str], new: list[str]) -> str:
+        """
+        Возвращает escape-последовательности, переводящие экран
+        от старого кадра к новому.
+        """
+
+        parts = list()
+        for row, line in enumerate(new):
+            previous = old[row] if row < len(old) else ''
+            if line == previous:
+                continue
+            col = 0
+            while col < len(line):
+                # Пропускаем совпадающие символы
+                if col < len(previous) and line[col] == previous[col]:
+                    col += 1
+                    continue
+                # Собираем отрезок изменившихся символов
+                end = col
+                while end < len(line) and \
+                        (end >= len(previous) or line[end] != previous[end]):
+                    end += 1
+                parts.append(f'\x1b[{row + 1};{col + 1}H{line[col:end]}')
+                col = end
+            # Старая строка была длиннее - стираем её хвост
+            if len(previous) > len(line):
+                parts.append(f'\x1b[{row + 1};{len(line) + 1}H\x1b[K')
+        return ''.join(parts)
+
 
 class Game():
     """
@@ -556,21 +2262,62 @@ class Game():
         Игрок-компьютер, объект класса Ai .
     ai_board : Board
         Доска компьютера.
+    board_class : type
+        Класс досок игры (Board или BitBoard).
+    ai_class : type
+        Класс игрока-компьютера (AI или его потомок).
+    width : int
+        Ширина досок (размер по оси x).
+    height : int
+        Высота досок (размер по оси y).
+    ships_types : list
+        Длины всех кораблей флота каждого игрока в порядке убывания.
+    renderer : Renderer
+        Вывод досок в консоль.
+    shots : list
+        Выстрелы обоих игроков по порядку в виде пар
+        (номер клетки, результат).
+    recorder : RecordWriter
+        Запись сыгранных партий в файл (или None).
+    layouts : LayoutIndex
+        Индекс всех допустимых расстановок флота (или None).
+    pool : BoardPool
+        Запас заранее сгенерированных досок (или None).
+    rng : RandomStream
+        Поток случайных чисел игры.
+    seed : int
+        Начальное значение потока случайных чисел игры.
+    events : ShotEvents
+        Рассылка результатов выстрелов по обеим доскам.
+    name : str
+        Имя партии в результатах выстрелов.
 
     Методы
     --------
     make_board():
         Возвращает готовую к игре доску с расставленными кораблями.
     @staticmethod
-    random_board():
+    random_board(board_class=Board, width=BOARD_SIZE, height=BOARD_SIZE,
+                 ships_types=SHIPS_TYPES, rng=None):
         Вспомогательная функция.
-        Пытается сгенерировать случайную расстановку кораблей на пустой доске.
-        В случае успеха возвращает объект Board, в ином случае None.
+        Генерирует случайную расстановку кораблей на пустой доске.
+        Если флот невозможно разместить, выбрасывает BoardWrongFleetException,
+        а если расстановка не найдена за лимит шагов -
+        BoardFleetSearchException.
     @staticmethod
     greet():
         Приветствует в консоли пользователя и рассказывает о формате ввода.
+    say(str, end='\n'):
+        Выводит сообщение игры в поток вывода досок.
     show_boards():
-        Выводит на экран доски обоих игроков.
+        Выводит на экран доски обоих игроков одним кадром.
+    finish(str):
+        Выводит сообщение об итоге игры и доски обоих игроков
+        и записывает партию, если задан recorder.
+    turns():
+        Генератор очерёдности ходов: выдаёт игрока, который ходит,
+        получает результат его хода и по окончании игры
+        возвращает номер победителя.
     loop():
         Игровой цикл.
         Поочерёдно для каждого игрока вызывается метод move() и
@@ -579,7 +2326,38 @@ class Game():
         Запуск игры. Сначала вызывается приветствие и запуск игры.
     """
 
-    def __init__(self) -> None:
+    # Приветствие и обозначения клеток
+    GREETING = """
+        Привет Путник! Это игра «Морской бой».
+        Бой идёт до полного уничтожения одной из сторон.
+        Координаты выстрела вводятся цифрами через пробел:
+        \t координата по горизонтали (X), пробел, координата по вертикали (Y)
+        """
+    MARKS = """
+        Обозначения:
+            ■ - палуба
+            • - мимо / ореол корабля
+            ○ - море
+            × - попадание
+        """
+    PROMPT_START = '\n\tНажмите -= Enter =- для старта'
+    # Сообщения об итоге игры
+    USER_WON = '#' * 22 + '\n#    Вы выиграли!    #\n' + '#' * 22
+    AI_WON = '#' * 22 + '\n# Компьютер выиграл! #\n' + '#' * 22
+
+    def __init__(self, board_class: type[Board] = Board,
+                 ai_class: type[AI] = AI,
+                 width: int = BOARD_SIZE,
+                 height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES,
+                 ansi: bool = False,
+                 stream: Optional[TextIO] = None,
+                 recorder: Optional['RecordWriter'] = None,
+                 layouts: Optional['LayoutIndex'] = None,
+                 pool: Optional['BoardPool'] = None,
+                 seed: Optional[int] = None,
+                 subscribers: Optional[list[ShotSubscriber]] = None,
+                 name: Optional[str] = None) -> None:
         """
         Устанавливает все необходимые атрибуты для объекта Game.
 
@@ -593,59 +2371,136 @@ class Game():
             Игрок-компьютер, объект класса Ai .
         ai_board : Board
             Доска компьютера.
+        board_class : type
+            Класс досок игры (Board или BitBoard).
+        ai_class : type
+            Класс игрока-компьютера (AI или его потомок).
+        width : int
+            Ширина досок (размер по оси x).
+        height : int
+            Высота досок (размер по оси y).
+        ships_types : list
+            Длины всех кораблей флота каждого игрока в порядке убывания.
+        renderer : Renderer
+            Вывод досок в консоль; при ansi=True перерисовываются
+            только изменившиеся клетки. Доски и сообщения игры
+            выводятся в поток stream (по умолчанию sys.stdout).
+        shots : list
+            Выстрелы обоих игроков по порядку в виде пар
+            (номер клетки, результат); обе доски пишут в этот список.
+        recorder : RecordWriter
+            Запись сыгранных партий в файл; если задана,
+            по окончании игры в неё добавляется запись партии.
+        layouts : LayoutIndex
+            Индекс всех допустимых расстановок флота; если задан,
+            расстановки досок выбираются из него равновероятно.
+            Если размеры или флот индекса не совпадают с игрой,
+            выбрасывается ValueError.
+        pool : BoardPool
+            Запас заранее сгенерированных досок; если задан,
+            доски берутся из него, пока он не пуст. Если класс,
+            размеры или флот досок запаса не совпадают с игрой,
+            выбрасывается ValueError.
+        rng : RandomStream
+            Поток случайных чисел игры: из него генерируются
+            расстановки досок и ходы компьютера.
+        seed : int
+            Начальное значение потока; если задано, партия
+            повторяется по нему целиком, поэтому запас досок
+            не используется. Если не задано, выбирается случайно.
+        events : ShotEvents
+            Рассылка результатов выстрелов по обеим доскам получателям
+            subscribers; по умолчанию результаты выводятся в поток
+            досок с паузой ConsolePrinter. Пустой список отключает
+            вывод результатов.
+        name : str
+            Имя партии; доски получают имена '<name>:user' и '<name>:ai',
+            которые попадают в результаты выстрелов. По умолчанию - seed.
         """
 
+        self.board_class = board_class
+        self.width = width
+        self.height = height
+        self.ships_types = list(ships_types)
+        self.renderer = Renderer(stream, ansi)
+        self.layouts = layouts
+        # Доски из запаса и индекса должны подходить для игры
+        for source, title in ((pool, 'Запас досок'),
+                              (layouts, 'Индекс расстановок')):
+            if source is None:
+                continue
+            source_class = getattr(source, 'board_class', board_class)
+            if source_class is not board_class or \
+               (source.width, source.height) != (width, height) or \
+               sorted(source.ships_types) != sorted(ships_types):
+                raise ValueError(
+                    f'{title} ({source_class.__name__} '
+                    f'{source.width}x{source.height}, '
+                    f'флот {source.ships_types}) не подходит для игры '
+                    f'({board_class.__name__} {width}x{height}, '
+                    f'флот {list(ships_types)}).')
+        self.pool = pool if seed is None else None
+        self.rng = RandomStream(seed)
+        self.seed = self.rng.seed
         self.user_board = self.make_board()
         self.ai_board = self.make_board()
         self.ai_board.is_hidden = True
+        self.name = str(self.seed) if name is None else name
+        self.user_board.name = f'{self.name}:user'
+        self.ai_board.name = f'{self.name}:ai'
         self.user = User(self.user_board, self.ai_board)
-        self.ai = AI(self.ai_board, self.user_board)
+        self.ai = ai_class(self.ai_board, self.user_board, self.rng)
+        self.shots = list()
+        self.user_board.history = self.shots
+        self.ai_board.history = self.shots
+        if subscribers is None:
+            subscribers = [ConsolePrinter(self.renderer.stream)]
+        self.events = ShotEvents(subscribers)
+        self.user_board.events = self.events
+        self.ai_board.events = self.events
+        self.recorder = recorder
 
     def make_board(self) -> Board:
         """
         Возвращает готовую к игре доску с расставленными кораблями.
+        Если задан запас досок, доска берётся из него, а если он пуст
+        или не задан, но задан индекс расстановок, - из индекса.
         """
 
-        board = None
-        while board is None:
-            board = Game.random_board()
+        if self.pool is not None:
+            board = self.pool.take()
+            if board is not None:
+                return board
+        if self.layouts is not None:
+            return self.layouts.random_board(self.board_class, self.rng)
+        board = Game.random_board(self.board_class, self.width, self.height,
+                                  self.ships_types, self.rng)
         board.get_ready()
         return board
 
     @staticmethod
-    def random_board() -> Board:
+    def random_board(board_class: type[Board] = Board,
+                     width: int = BOARD_SIZE,
+                     height: int = BOARD_SIZE,
+                     ships_types: list[int] = SHIPS_TYPES,
+                     rng: Optional[RandomStream] = None) -> Board:
         """
         Вспомогательная функция.
-        Пытается сгенерировать случайную расстановку кораблей на пустой доске.
-        В случае успеха возвращает объект Board, в ином случае None.
+        Генерирует случайную расстановку кораблей на пустой доске,
+        беря случайные числа из потока rng (см. place_fleet).
+        Если флот невозможно разместить, выбрасывает BoardWrongFleetException,
+        а если расстановка не найдена за лимит шагов -
+        BoardFleetSearchException.
         """
 
+        start = perf_counter() if instrument is not None else 0.0
         # Создаём пустую доску
-        board = Board()
-        # Устанавливаем счётчик попыток
-        attempts = 0
-        # Для каждого типа корабля, от самого большого к самому маленькому
-        for length in SHIPS_TYPES:
-            # Начинаем попытки поставить корабль
-            while True:
-                # Если число попыток превышено, то сдаёмся и начинаем заново
-                if attempts > 2000:
-                    return None
-                # Пытаемся поставить нос корабля в случайную точку и
-                # расположить его в случайном направлении
-                try:
-                    board.add_ship(Ship(length,
-                                        Dot(randint(0, BOARD_SIZE-1),
-                                            randint(0, BOARD_SIZE-1)
-                                            ),
-                                        randint(0, 1)
-                                        )
-                                   )
-                    break
-                except BoardWrongShipException:
-                    pass
-                # Увеличиваем счётчик попыток
-                attempts += 1
+        board = board_class(width, height, ships_types)
+        # Ставим корабли, положения которых заведомо допустимы
+        for ship in place_fleet(ships_types, width, height, rng=rng):
+            board.add_ship(ship)
+        if instrument is not None:
+            instrument.observe('Game.random_board', perf_counter() - start)
         # Возвращаем доску с расставленными кораблями
         return board
 
@@ -655,70 +2510,92 @@ class Game():
         Приветствует в консоли пользователя и рассказывает о формате ввода.
         """
 
+        print(Game.GREETING)
+        print(Game.MARKS)
+        input(Game.PROMPT_START)
 
-        text = """
-        Привет Путник! Это игра «Морской бой».
-        Бой идёт до полного уничтожения одной из сторон.
-        Координаты выстрела вводятся цифрами через пробел:
-        \t координата по горизонтали (X), пробел, координата по вертикали (Y)
+    def say(self, text: str, end: str = '\n') -> None:
         """
-        marks = """
-        Обозначения:
-            ■ - палуба
-            • - мимо / ореол корабля
-            ○ - море
-            × - попадание
+        Выводит сообщение игры в поток вывода досок.
         """
 
-        print(text)
-        print(marks)
-        input('\n\tНажмите -= Enter =- для старта')
+        self.renderer.stream.write(text + end)
+        self.renderer.stream.flush()
 
     def show_boards(self) -> None:
         """
-        Выводит на экран доски обоих игроков.
+        Выводит на экран доски обоих игроков одним кадром.
         """
 
-        print('\n\n\n' + '-' * 50)
-        print('Доска пользователя:\n')
-        self.user.own_board.show()
-        print('Доска компьютера:\n')
-        self.ai.own_board.show()
+        frame = ('Доска пользователя:\n\n' + self.user.own_board.render() +
+                 'Доска компьютера:\n\n' + self.ai.own_board.render())
+        # При полной перерисовке отделяем кадр от предыдущего вывода
+        if not self.renderer.ansi:
+            frame = '\n\n\n' + '-' * 50 + '\n' + frame
+        self.renderer.draw(frame)
 
-    def loop(self) -> None:
+    def finish(self, banner: str) -> None:
         """
-        Игровой цикл.
-        Поочерёдно для каждого игрока вызывается метод move() и
-        выполняется проверка проигрыша доски соперника.
+        Выводит сообщение об итоге игры и доски обоих игроков
+        и записывает партию, если задан recorder.
+        """
+
+        # Отдаём получателям результаты, накопленные в пачках
+        self.events.flush()
+        # В режиме ANSI всё ниже кадра стирается при его выводе,
+        # поэтому сообщение выводится после досок
+        if self.renderer.ansi:
+            self.show_boards()
+            self.say(banner)
+        else:
+            self.say('\n\n\n' + '-' * 50 + '\n\n\n')
+            self.say(banner)
+            self.show_boards()
+        if self.recorder is not None:
+            self.recorder.write_game(self)
+
+    def turns(self) -> Generator[Player, bool, int]:
+        """
+        Генератор очерёдности ходов, общий для синхронного
+        и асинхронного игровых циклов: выводит доски, выдаёт игрока,
+        который ходит, и получает через send() True, если ход остаётся
+        за ним. Когда доска одного из игроков проиграла, выводит итог
+        и возвращает номер победителя (0 - пользователь, 1 - компьютер).
         """
 
         # Маркер текущего игрока
         player = 0
-        # Игровой цикл
         while True:
             # Выводим на экран доски обоих игроков
             self.show_boards()
-            # Делаем ход текущим игроком
-            if player % 2 == 0:
-                print('Ваш ход:')
-                repeat = self.user.move()
-            else:
-                print('Ходит компьютер:')
-                repeat = self.ai.move()
+            self.say(('Ваш ход:', 'Ходит компьютер:')[player])
+            repeat = yield (self.user, self.ai)[player]
             # Переход / сохранение права следующего хода
-            player += 0 if repeat else 1
+            if not repeat:
+                player = 1 - player
             # Если игрок-компьютер проиграл
             if self.ai.own_board.is_loser():
-                print('\n\n\n' + '-' * 50 + '\n\n\n')
-                print('#' * 22 + '\n#    Вы выиграли!    #\n' + '#' * 22)
-                self.show_boards()
-                break
+                self.finish(Game.USER_WON)
+                return 0
             # Если игрок-пользователь проиграл
             if self.user.own_board.is_loser():
-                print('\n\n\n' + '-' * 50 + '\n\n\n')
-                print('#' * 22 + '\n# Компьютер выиграл! #\n' + '#' * 22)
-                self.show_boards()
-                break
+                self.finish(Game.AI_WON)
+                return 1
+
+    def loop(self) -> None:
+        """
+        Игровой цикл.
+        Поочерёдно для каждого игрока вызывается метод move() и
+        выполняется проверка проигрыша доски соперника.
+        """
+
+        turns = self.turns()
+        player = next(turns)
+        try:
+            while True:
+                player = turns.send(player.move())
+        except StopIteration:
+            pass
 
     def start(self) -> None:
         """
@@ -730,5 +2607,6 @@ class Game():
 
 
 if __name__ == '__main__':
-    game = Game()
+    # С ключом --ansi перерисовываются только изменившиеся клетки
+    game = Game(ansi='--ansi' in sys.argv[1:])
     game.start()
@@ -0,0 +1,247 @@
+import atexit
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import monotonic
+from typing import TYPE_CHECKING, Optional
+
+from main import (MISS, SUNK, AI, Board, Dot, RandomStream, oreol_mask,
+                  ship_placements)
+
+if TYPE_CHECKING:
+    from transposition import TranspositionCache
+
+
+# Общий для всех MonteCarloAI пул процессов (создаётся при первом ходе
+# и закрывается close_pool() или при выходе из программы)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Возвращает общий пул из workers процессов, создавая его при первом вызове.
+    """
+
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(workers)
+        atexit.register(close_pool)
+    return _pool
+
+
+def close_pool() -> None:
+    """
+    Останавливает общий пул процессов, если он создан.
+    Следующий ход MonteCarloAI создаст пул заново.
+    """
+
+    global _pool
+    if _pool is not None:
+        atexit.unregister(close_pool)
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def sample_layouts(width: int, height: int, fleet: tuple[int, ...],
+                   hits: int, locked: int, budget: float,
+                   seed: int, limit: int = 1 << 30) -> tuple[int, list[int]]:
+    """
+    Генерирует в течение budget секунд или до limit штук случайные
+    расстановки непотопленных кораблей fleet, согласные с увиденным:
+    корабли не заходят в клетки маски locked (промахи, потопленные
+    корабли и их ореолы), накрывают все непотопленные попадания hits
+    и не состоят целиком из попаданий.
+    Возвращает количество подошедших расстановок и для каждой клетки
+    число расстановок, в которых в ней стоит палуба.
+    Срок передаётся длительностью, а не моментом времени, и отсчитывается
+    по monotonic(): часы процессов пула не сравниваются между собой,
+    и перевод системных часов не влияет на время хода.
+    """
+
+    deadline = monotonic() + budget
+    rng = RandomStream(seed)
+    placements = {length: [(mask, blocked) for mask, blocked, *_ in
+                           ship_placements(length, width, height)
+                           if not mask & locked and mask & ~hits]
+                  for length in set(fleet)}
+    counts = [0] * (width * height)
+    samples = 0
+    while samples < limit and monotonic() < deadline:
+        taken = locked
+        occupied = 0
+        for length in fleet:
+            pool = [placement for placement in placements[length]
+                    if not placement[0] & taken]
+            if not pool:
+                break
+            mask, blocked = pool[rng.below(len(pool))]
+            occupied |= mask
+            taken |= blocked
+        else:
+            # Расстановка должна накрывать все непотопленные попадания
+            if occupied & hits == hits:
+                samples += 1
+                cells = occupied & ~hits
+                while cells:
+                    bit = cells & -cells
+                    counts[bit.bit_length() - 1] += 1
+                    cells ^= bit
+    return samples, counts
+
+
+class MonteCarloAI(AI):
+    """
+    Класс для представления игрока-компьютера, который на каждом ходу
+    генерирует случайные расстановки флота, согласные с увиденным
+    на доске соперника, и стреляет в клетку, где палуба
+    встречалась в них чаще всего.
+
+    Генерация расстановок распределяется по пулу процессов и
+    останавливается по истечении time_budget секунд на ход;
+    выбор делается по тем расстановкам, что успели сгенерировать,
+    поэтому время хода не зависит от загрузки машины.
+
+    Наследуемые атрибуты
+    --------
+    own_board : Board
+        Собственная доска.
+    opponent_board: Board
+        Доска соперника.
+    rng : RandomStream
+        Поток случайных чисел игрока.
+
+    Атрибуты
+    --------
+    time_budget : float
+        Время на выбор одного хода в секундах.
+    workers : int
+        Количество процессов для генерации расстановок;
+        при 1 расстановки генерируются в текущем процессе.
+    cache : TranspositionCache
+        Кеш частот палуб по видимому состоянию доски соперника
+        (или None). Один кеш можно делить между игроками
+        с одинаковыми доской, флотом и time_budget: позиции,
+        повторяющиеся в разных партиях (например, начальная),
+        тогда оцениваются один раз.
+    samples : int
+        Количество расстановок, по которым был сделан последний выбор.
+    _hits : int
+        Битовая маска непотопленных попаданий.
+    _locked : int
+        Битовая маска клеток, где палуб непотопленных кораблей нет.
+    _shots : int
+        Битовая маска клеток, куда уже стреляли или где точно пусто.
+    _fleet : list
+        Длины непотопленных кораблей в порядке убывания.
+
+    Методы
+    --------
+    counts():
+        Возвращает количество расстановок и частоты палуб по клеткам.
+    choose():
+        Выбирает для выстрела клетку с наибольшей частотой палуб
+        без вывода в консоль и пауз.
+    learn(Dot, int):
+        Запоминает результат выстрела.
+    """
+
+    time_budget = 0.5
+    workers = os.cpu_count() or 1
+    cache: Optional['TranspositionCache'] = None
+
+    def __init__(self, own_board: Board, opponent_board: Board,
+                 rng: Optional[RandomStream] = None) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта MonteCarloAI.
+        """
+
+        super().__init__(own_board, opponent_board, rng)
+        self.samples = 0
+        self._hits = 0
+        self._locked = 0
+        self._shots = 0
+        self._fleet = sorted(opponent_board.ships_types, reverse=True)
+
+    def counts(self) -> tuple[int, list[int]]:
+        """
+        Генерирует расстановки до истечения time_budget и возвращает
+        их количество и число расстановок с палубой в каждой клетке.
+        """
+
+        width, height = self.opponent_board.width, self.opponent_board.height
+        deadline = monotonic() + self.time_budget
+        args = (width, height, tuple(self._fleet), self._hits, self._locked)
+        if self.workers <= 1:
+            return sample_layouts(*args, self.time_budget,
+                                  self.rng.below(1 << 32))
+        pool = get_pool(self.workers)
+        # Процессы заканчивают чуть раньше срока, чтобы успеть
+        # передать результаты
+        budget = self.time_budget - min(0.02, self.time_budget / 4)
+        futures = {pool.submit(sample_layouts, *args, budget,
+                               self.rng.below(1 << 32))
+                   for _ in range(self.workers)}
+        samples = 0
+        counts = [0] * (width * height)
+        while futures:
+            done, futures = wait(futures, max(0.0, deadline - monotonic()),
+                                 FIRST_COMPLETED)
+            for future in done:
+                found, cells = future.result()
+                samples += found
+                counts = [a + b for a, b in zip(counts, cells)]
+            if not done:
+                # Срок истёк: опоздавшие результаты не ждём
+                for future in futures:
+                    future.cancel()
+                break
+        return samples, counts
+
+    def choose(self) -> Dot:
+        """
+        Выбирает для выстрела клетку с наибольшей частотой палуб
+        без вывода в консоль и пауз. Если не удалось сгенерировать
+        ни одной расстановки, выбирает случайную неизвестную клетку.
+        Если задан кеш, частоты для уже встречавшегося состояния
+        доски соперника берутся из него.
+        """
+
+        width, height = self.opponent_board.width, self.opponent_board.height
+        if self.cache is None:
+            self.samples, counts = self.counts()
+        else:
+            self.samples, counts = self.cache.lookup(
+                self.opponent_board.state(), self.counts)
+        unknown = [cell for cell in range(width * height)
+                   if not self._shots >> cell & 1]
+        if self.samples:
+            best = max(counts[cell] for cell in unknown)
+            unknown = [cell for cell in unknown if counts[cell] == best]
+        cell = unknown[self.rng.below(len(unknown))]
+        return Dot(cell % width, cell // width)
+
+    def learn(self, dot: Dot, result: int) -> None:
+        """
+        Запоминает результат выстрела.
+        """
+
+        width, height = self.opponent_board.width, self.opponent_board.height
+        bit = 1 << (dot.y * width + dot.x)
+        self._shots |= bit
+        if result == MISS:
+            self._locked |= bit
+            return
+        self._hits |= bit
+        if result == SUNK:
+            # Потопленный корабль - связный отрезок попаданий через dot
+            ship = bit
+            while True:
+                grown = ship | (oreol_mask(ship, width, height) & self._hits)
+                if grown == ship:
+                    break
+                ship = grown
+            self._hits &= ~ship
+            self._fleet.remove(bin(ship).count('1'))
+            # Палубы и ореол потопленного корабля
+            known = ship | oreol_mask(ship, width, height)
+            self._locked |= known
+            self._shots |= known
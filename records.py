@@ -0,0 +1,389 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional
+
+from main import MISS, BitBoard, Board, Dot, Ship
+
+if TYPE_CHECKING:
+    from main import Game
+
+
+# Заголовок записи партии: метка, версия формата, ширина и высота досок,
+# номер победителя, количество кораблей на каждой доске и выстрелов
+HEADER = struct.Struct('<2sBBBbHI')
+MAGIC = b'BR'
+VERSION = 1
+# Корабль: номер клетки носа, длина, направление
+SHIP = struct.Struct('<HBB')
+# Выстрел хранится в двух байтах: номер клетки * 4 + результат,
+# поэтому на доске может быть не больше 2 ** 14 клеток
+MAX_CELLS = 1 << 14
+# Ширина и высота досок хранятся в заголовке в одном байте
+MAX_SIDE = 255
+
+
+class GameRecord(NamedTuple):
+    """
+    Класс для представления записи одной сыгранной партии.
+
+    Атрибуты
+    --------
+    width : int
+        Ширина досок (размер по оси x).
+    height : int
+        Высота досок (размер по оси y).
+    winner : int
+        Номер победителя (0 - ходивший первым, 1 - второй).
+    ships : tuple
+        Начальные расстановки досок игроков 0 и 1: для каждой доски
+        кортеж кораблей в виде троек (номер клетки носа, длина, направление).
+    shots : tuple
+        Выстрелы по порядку в виде пар (номер клетки, результат).
+        Первым стреляет игрок 0 по доске игрока 1; после промаха
+        право хода переходит сопернику.
+    """
+
+    width: int
+    height: int
+    winner: int
+    ships: tuple[tuple[tuple[int, int, int], ...], ...]
+    shots: tuple[tuple[int, int], ...]
+
+
+def board_ships(board: Board) -> tuple[tuple[int, int, int], ...]:
+    """
+    Возвращает расстановку кораблей доски в виде троек
+    (номер клетки носа, длина, направление).
+    """
+
+    return tuple((ship.bow.y * board.width + ship.bow.x, ship.length,
+                  ship.direction) for ship in board.ships)
+
+
+def record_game(game: 'Game') -> GameRecord:
+    """
+    Возвращает запись законченной партии игры Game.
+    Игрок 0 - пользователь, игрок 1 - компьютер.
+    """
+
+    return GameRecord(game.width, game.height,
+                      0 if game.ai_board.is_loser() else 1,
+                      (board_ships(game.user_board),
+                       board_ships(game.ai_board)),
+                      tuple(game.shots))
+
+
+def encode_record(record: GameRecord) -> bytes:
+    """
+    Упаковывает запись партии в байты.
+    Если ширина или высота доски больше MAX_SIDE или доска больше
+    MAX_CELLS клеток, выбрасывает ValueError.
+    """
+
+    for name, side in (('Ширина', record.width), ('Высота', record.height)):
+        if not 0 < side <= MAX_SIDE:
+            raise ValueError(f'{name} доски в записи партий должна быть '
+                             f'от 1 до {MAX_SIDE}, а не {side}.')
+    if record.width * record.height > MAX_CELLS:
+        raise ValueError(f'Запись партий поддерживает доски '
+                         f'не больше {MAX_CELLS} клеток.')
+    fleet = len(record.ships[0])
+    parts = [HEADER.pack(MAGIC, VERSION, record.width, record.height,
+                         record.winner, fleet, len(record.shots))]
+    for ships in record.ships:
+        for ship in ships:
+            parts.append(SHIP.pack(*ship))
+    shots = array('H', [cell << 2 | result for cell, result in record.shots])
+    if sys.byteorder == 'big':
+        shots.byteswap()
+    parts.append(shots.tobytes())
+    return b''.join(parts)
+
+
+class RecordWriter():
+    """
+    Класс для дозаписи партий в файл.
+    Записи копятся в памяти и добавляются в конец файла
+    пачками по batch штук, а остаток - при вызове flush() или close().
+
+    Атрибуты
+    --------
+    path : str
+        Путь к файлу записей.
+    batch : int
+        Количество записей, после которого буфер сбрасывается в файл.
+    _buffer : list
+        Упакованные записи, ещё не добавленные в файл.
+
+    Методы
+    --------
+    write(GameRecord):
+        Добавляет запись партии в буфер.
+    write_game(Game):
+        Добавляет в буфер запись законченной партии игры Game.
+    flush():
+        Добавляет накопленные записи в конец файла одной записью.
+    close():
+        Сбрасывает буфер в файл.
+    """
+
+    def __init__(self, path: str, batch: int = 1024) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта RecordWriter.
+
+        Атрибуты
+        --------
+        path : str
+            Путь к файлу записей.
+        batch : int
+            Количество записей, после которого буфер сбрасывается в файл.
+        _buffer : list
+            Упакованные записи, ещё не добавленные в файл.
+        """
+
+        self.path = path
+        self.batch = batch
+        self._buffer = list()
+
+    def write(self, record: GameRecord) -> None:
+        """
+        Добавляет запись партии в буфер.
+        """
+
+        self._buffer.append(encode_record(record))
+        if len(self._buffer) >= self.batch:
+            self.flush()
+
+    def write_game(self, game: 'Game') -> None:
+        """
+        Добавляет в буфер запись законченной партии игры Game.
+        """
+
+        self.write(record_game(game))
+
+    def flush(self) -> None:
+        """
+        Добавляет накопленные записи в конец файла одной записью.
+        """
+
+        if not self._buffer:
+            return
+        with open(self.path, 'ab') as file:
+            file.write(b''.join(self._buffer))
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """
+        Сбрасывает буфер в файл.
+        """
+
+        self.flush()
+
+    def __enter__(self) -> 'RecordWriter':
+        """
+        Возвращает сам объект для использования в with.
+        """
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Сбрасывает буфер в файл при выходе из with.
+        """
+
+        self.close()
+
+
+class RecordReader():
+    """
+    Класс для чтения файла записей партий.
+    Файл отображается в память (mmap), а при открытии строится только
+    таблица смещений записей по их заголовкам. Поэтому любая партия
+    и любой её выстрел читаются без разбора остальной части файла.
+
+    Атрибуты
+    --------
+    path : str
+        Путь к файлу записей.
+    _data : mmap или bytes
+        Содержимое файла.
+    _offsets : array
+        Смещения начала каждой записи в файле.
+
+    Методы
+    --------
+    header(int):
+        Возвращает заголовок партии: ширину, высоту, победителя,
+        количество кораблей на доске и количество выстрелов.
+    shot(int, int):
+        Возвращает выстрел партии с данным номером
+        в виде пары (номер клетки, результат).
+    shots(int):
+        Перебирает выстрелы партии в виде троек
+        (номер стрелявшего игрока, номер клетки, результат).
+    boards(int, move=None):
+        Возвращает доски игроков после первых move выстрелов партии.
+    close():
+        Закрывает отображение файла.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта RecordReader.
+        Если файл повреждён, выбрасывает ValueError.
+
+        Атрибуты
+        --------
+        path : str
+            Путь к файлу записей.
+        _data : mmap или bytes
+            Содержимое файла.
+        _offsets : array
+            Смещения начала каждой записи в файле.
+        """
+
+        self.path = path
+        with open(path, 'rb') as file:
+            try:
+                self._data = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл нельзя отобразить в память
+                self._data = b''
+        self._offsets = array('Q')
+        offset = 0
+        size = len(self._data)
+        while offset < size:
+            if size - offset < HEADER.size:
+                raise ValueError(f'Запись {len(self._offsets)} обрезана.')
+            magic, version, _, _, _, fleet, shots = \
+                HEADER.unpack_from(self._data, offset)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'Запись {len(self._offsets)} повреждена.')
+            self._offsets.append(offset)
+            offset += HEADER.size + 2 * fleet * SHIP.size + 2 * shots
+        if offset > size:
+            raise ValueError(f'Запись {len(self._offsets) - 1} обрезана.')
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество партий в файле.
+        """
+
+        return len(self._offsets)
+
+    def header(self, game: int) -> tuple[int, int, int, int, int]:
+        """
+        Возвращает заголовок партии: ширину, высоту, победителя,
+        количество кораблей на доске и количество выстрелов.
+        """
+
+        return HEADER.unpack_from(self._data, self._offsets[game])[2:]
+
+    def __getitem__(self, game: int) -> GameRecord:
+        """
+        Возвращает запись партии с данным номером.
+        """
+
+        offset = self._offsets[game]
+        width, height, winner, fleet, count = self.header(game)
+        offset += HEADER.size
+        ships = list()
+        for _ in range(2):
+            ships.append(tuple(SHIP.unpack_from(self._data,
+                                                offset + i * SHIP.size)
+                               for i in range(fleet)))
+            offset += fleet * SHIP.size
+        packed = struct.unpack_from(f'<{count}H', self._data, offset)
+        shots = tuple((value >> 2, value & 3) for value in packed)
+        return GameRecord(width, height, winner, tuple(ships), shots)
+
+    def shot(self, game: int, move: int) -> tuple[int, int]:
+        """
+        Возвращает выстрел партии с данным номером
+        в виде пары (номер клетки, результат).
+        """
+
+        _, _, _, fleet, count = self.header(game)
+        if not 0 <= move < count:
+            raise IndexError(move)
+        offset = (self._offsets[game] + HEADER.size + 2 * fleet * SHIP.size +
+                  2 * move)
+        value = struct.unpack_from('<H', self._data, offset)[0]
+        return value >> 2, value & 3
+
+    def shots(self, game: int) -> Iterator[tuple[int, int, int]]:
+        """
+        Перебирает выстрелы партии в виде троек
+        (номер стрелявшего игрока, номер клетки, результат).
+        """
+
+        player = 0
+        for cell, result in self[game].shots:
+            yield player, cell, result
+            # После промаха право хода переходит сопернику
+            if result == MISS:
+                player = 1 - player
+
+    def boards(self, game: int,
+               move: Optional[int] = None) -> tuple[BitBoard, BitBoard]:
+        """
+        Возвращает доски игроков 0 и 1 после первых move выстрелов партии
+        (по умолчанию - после всех).
+        """
+
+        record = self[game]
+        boards = list()
+        for ships in record.ships:
+            board = BitBoard(record.width, record.height,
+                             [length for _, length, _ in ships])
+            for cell, length, direction in ships:
+                board.add_ship(Ship(length, Dot(cell % record.width,
+                                                cell // record.width),
+                                    direction))
+            board.get_ready()
+            boards.append(board)
+        player = 0
+        for cell, result in record.shots[:move]:
+            boards[1 - player].shot_cell(cell)
+            if result == MISS:
+                player = 1 - player
+        return boards[0], boards[1]
+
+    def close(self) -> None:
+        """
+        Закрывает отображение файла.
+        """
+
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self) -> 'RecordReader':
+        """
+        Возвращает сам объект для использования в with.
+        """
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Закрывает отображение файла при выходе из with.
+        """
+
+        self.close()
+
+
+if __name__ == '__main__':
+    # python records.py ФАЙЛ [НОМЕР_ПАРТИИ [НОМЕР_ХОДА]]
+    with RecordReader(sys.argv[1]) as reader:
+        if len(sys.argv) < 3:
+            wins = sum(reader.header(game)[2] == 0
+                       for game in range(len(reader)))
+            print(f'Партий: {len(reader)}, побед игрока 0: {wins}')
+        else:
+            game = int(sys.argv[2])
+            move = int(sys.argv[3]) if len(sys.argv) > 3 else None
+            for board in reader.boards(game, move):
+                board.show()
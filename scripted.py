@@ -0,0 +1,234 @@
+import argparse
+import sys
+from time import perf_counter
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO
+
+import main
+from main import (AI, BOARD_SIZE, MISS, SHIPS_TYPES, BitBoard, Board,
+                  BoardException, Game, ShotSubscriber, User, retry_counter)
+from records import RecordWriter
+from shot_events import ShotMetrics, make_subscriber
+from tournament import load_strategy
+
+
+# Номера победителя в результате сценария
+USER, COMPUTER, UNFINISHED = 0, 1, 2
+WINNER_NAMES = {USER: 'user', COMPUTER: 'ai', UNFINISHED: 'unfinished'}
+
+
+class ScriptResult(NamedTuple):
+    """
+    Класс для представления результата одной партии по сценарию.
+
+    Атрибуты
+    --------
+    number : int
+        Номер партии в потоке сценариев (с 1).
+    winner : int
+        USER, COMPUTER или UNFINISHED, если ходы сценария
+        кончились раньше партии.
+    seed : int
+        Начальное значение потока случайных чисел партии.
+    user_shots : int
+        Количество выстрелов пользователя.
+    ai_shots : int
+        Количество выстрелов компьютера.
+    errors : int
+        Количество строк сценария, не ставших выстрелом
+        (неверный формат, выстрел за доску или в ту же клетку).
+    seconds : float
+        Время партии.
+    """
+
+    number: int
+    winner: int
+    seed: int
+    user_shots: int
+    ai_shots: int
+    errors: int
+    seconds: float
+
+    def __str__(self) -> str:
+        """
+        Возвращает строку итога партии для вывода сценария.
+        """
+
+        return (f'{self.number} {WINNER_NAMES[self.winner]} seed={self.seed} '
+                f'shots={self.user_shots}/{self.ai_shots} '
+                f'errors={self.errors} ms={self.seconds * 1000:.2f}')
+
+
+def read_scripts(stream: Iterable[str]) -> Iterator[tuple[Optional[int],
+                                                          list[str]]]:
+    """
+    Читает из потока сценарии партий и возвращает их по одному
+    в виде пар (seed или None, строки ходов пользователя).
+    Сценарии разделяются пустыми строками; первая строка сценария
+    может задавать seed партии в виде 'seed N', строки с '#' - комментарии,
+    остальные строки - ходы 'x y', как при вводе с клавиатуры.
+    Строка seed с неверным числом остаётся в ходах, поэтому партия
+    получает случайный seed, а строка считается ошибкой сценария.
+    """
+
+    seed = None
+    moves = list()
+    started = False
+    for line in stream:
+        line = line.strip()
+        if line.startswith('#'):
+            continue
+        if not line:
+            if started:
+                yield seed, moves
+            seed, moves, started = None, list(), False
+            continue
+        started = True
+        if line.startswith('seed') and not moves:
+            words = line.split()
+            if len(words) == 2 and words[1].lstrip('-').isdigit():
+                seed = int(words[1])
+                continue
+        moves.append(line)
+    if started:
+        yield seed, moves
+
+
+class ScriptedGame(Game):
+    """
+    Класс для представления игры, в которой ходы пользователя берутся
+    из сценария, а не из консоли. Партия играется без приветствия,
+    вывода досок и пауз; результаты выстрелов получают только
+    переданные игре получатели subscribers.
+
+    Методы
+    --------
+    play(Iterable):
+        Играет партию по ходам сценария и возвращает номер победителя.
+    """
+
+    def play(self, moves: Iterable[str]) -> tuple[int, int, int, int]:
+        """
+        Играет партию по ходам пользователя moves.
+        Возвращает номер победителя (USER, COMPUTER или UNFINISHED),
+        количество выстрелов пользователя и компьютера
+        и количество ошибочных ходов сценария.
+        """
+
+        moves = iter(moves)
+        shots = [0, 0]
+        errors = 0
+        # Маркер текущего игрока
+        player = 0
+        while True:
+            if player == USER:
+                line = next(moves, None)
+                if line is None:
+                    return UNFINISHED, shots[0], shots[1], errors
+                try:
+                    dot = User.parse(line)
+                    result = self.ai_board.shot(dot).result
+                except ValueError:
+                    if main.instrument is not None:
+                        main.instrument.count('move.retry.input')
+                    errors += 1
+                    continue
+                except BoardException as e:
+                    if main.instrument is not None:
+                        main.instrument.count(retry_counter(e))
+                    errors += 1
+                    continue
+            else:
+                dot = self.ai.choose()
+                try:
+                    result = self.user_board.shot(dot).result
+                except BoardException:
+                    continue
+                self.ai.learn(dot, result)
+            shots[player] += 1
+            if self.ai_board.is_loser() or self.user_board.is_loser():
+                if self.recorder is not None:
+                    self.recorder.write_game(self)
+                return player, shots[0], shots[1], errors
+            # Право хода остаётся за текущим игроком только при попадании
+            if result == MISS:
+                player = 1 - player
+
+
+def run_scripts(stream: Iterable[str],
+                output: Optional[TextIO] = None,
+                board_class: type[Board] = BitBoard,
+                ai_class: type[AI] = AI,
+                width: int = BOARD_SIZE,
+                height: int = BOARD_SIZE,
+                ships_types: list[int] = SHIPS_TYPES,
+                recorder: Optional[RecordWriter] = None,
+                subscribers: Optional[list[ShotSubscriber]] = None
+                ) -> list[int]:
+    """
+    Играет подряд все партии по сценариям из потока stream
+    и выводит в output (по умолчанию sys.stdout) по одной строке
+    результата на партию. Партии без seed получают случайный seed,
+    который выводится в строке результата, поэтому любую партию
+    можно повторить. Результаты выстрелов всех партий передаются
+    получателям subscribers; партия называется своим номером в потоке,
+    поэтому доски партии номер N в результатах - 'N:user' и 'N:ai'.
+    Закрывать получателей должен вызывающий.
+    Возвращает количество партий, выигранных пользователем,
+    компьютером и незаконченных.
+    """
+
+    output = output or sys.stdout
+    totals = [0, 0, 0]
+    for number, (seed, moves) in enumerate(read_scripts(stream), 1):
+        start = perf_counter()
+        game = ScriptedGame(board_class, ai_class, width, height,
+                            ships_types, recorder=recorder, seed=seed,
+                            subscribers=subscribers or [], name=str(number))
+        winner, user_shots, ai_shots, errors = game.play(moves)
+        result = ScriptResult(number, winner, game.seed, user_shots,
+                              ai_shots, errors, perf_counter() - start)
+        output.write(f'{result}\n')
+        totals[winner] += 1
+    output.flush()
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Морской бой по сценариям: ходы пользователя читаются '
+                    'из файла или stdin, по строке результата на партию.')
+    parser.add_argument('script', nargs='?', default='-',
+                        help="файл сценариев, '-' - stdin")
+    parser.add_argument('--ai', default='AI',
+                        help="стратегия компьютера: AI, DensityAI "
+                             "или модуль:Класс")
+    parser.add_argument('--record', default=None,
+                        help='файл для записи сыгранных партий')
+    parser.add_argument('--events', action='append', default=[],
+                        help="получатель результатов выстрелов: console, "
+                             "metrics или log:путь (можно повторять)")
+    args = parser.parse_args()
+
+    recorder = RecordWriter(args.record) if args.record else None
+    subscribers = [make_subscriber(spec) for spec in args.events]
+    stream = sys.stdin if args.script == '-' else \
+        open(args.script, encoding='utf-8')
+    start = perf_counter()
+    try:
+        user, ai, unfinished = run_scripts(stream,
+                                           ai_class=load_strategy(args.ai),
+                                           recorder=recorder,
+                                           subscribers=subscribers)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        for subscriber in subscribers:
+            subscriber.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(f'Партий: {user + ai + unfinished}, побед пользователя: {user}, '
+          f'компьютера: {ai}, незаконченных: {unfinished}, '
+          f'время: {perf_counter() - start:.2f} с', file=sys.stderr)
+    for subscriber in subscribers:
+        if isinstance(subscriber, ShotMetrics):
+            print('Выстрелы:', subscriber.counts, file=sys.stderr)
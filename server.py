@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from async_game import AsyncGame
+from board_pool import BoardPool
+from instrumentation import enable
+from main import AI, BitBoard, Board
+
+
+# Команды протокола, которые можно ввести вместо координат выстрела
+COMMANDS_HELP = ('\n\tКоманды: "x y" - выстрел, "board" - показать доски, '
+                 '"quit" - выйти.\n')
+# Максимальная длина строки ввода клиента в байтах
+LINE_LIMIT = 256
+# Ответ клиенту на слишком длинную строку, которая отбрасывается
+LINE_TOO_LONG = (f'\n\tСлишком длинная строка (больше {LINE_LIMIT} байт), '
+                 'она пропущена.\n')
+
+
+class SocketStream():
+    """
+    Класс для представления потока вывода игры в сетевое соединение.
+    Имеет интерфейс текстового потока (write и flush), поэтому
+    передаётся в Game вместо sys.stdout.
+
+    Атрибуты
+    --------
+    writer : asyncio.StreamWriter
+        Соединение с клиентом.
+
+    Методы
+    --------
+    write(str):
+        Кодирует текст и ставит его в буфер отправки соединения.
+    flush():
+        Ничего не делает: буфер отправляется циклом событий.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта SocketStream.
+
+        Атрибуты
+        --------
+        writer : asyncio.StreamWriter
+            Соединение с клиентом.
+        """
+
+        self.writer = writer
+
+    def write(self, text: str) -> int:
+        """
+        Кодирует текст и ставит его в буфер отправки соединения.
+        """
+
+        if not self.writer.is_closing():
+            self.writer.write(text.encode())
+        return len(text)
+
+    def flush(self) -> None:
+        """
+        Ничего не делает: буфер отправляется циклом событий.
+        """
+
+
+class GameServer():
+    """
+    Класс для представления сервера, на котором одновременно идут
+    игры пользователей с компьютером.
+    Каждое соединение получает свою игру AsyncGame. Протокол строковый:
+    клиент отправляет координаты выстрела "x y" или команду,
+    сервер отправляет те же доски и сообщения, что и консольная игра.
+
+    Атрибуты
+    --------
+    host : str
+        Адрес, на котором сервер принимает соединения.
+    port : int
+        Порт, на котором сервер принимает соединения.
+    max_sessions : int
+        Максимальное количество одновременных игр.
+    idle_timeout : float
+        Время в секундах, после которого молчащий клиент отключается.
+    pace : float
+        Длительность пауз между сообщениями игры в секундах.
+    board_class : type
+        Класс досок игр.
+    ai_class : type
+        Класс игрока-компьютера.
+    pool : BoardPool
+        Запас заранее сгенерированных досок для новых игр.
+    sessions : int
+        Количество идущих сейчас игр.
+
+    Методы
+    --------
+    reader(StreamReader, StreamWriter, AsyncGame):
+        Возвращает функцию чтения координат выстрела для игры,
+        которая выполняет команды протокола и отключает молчащих клиентов.
+    handle(StreamReader, StreamWriter):
+        Обслуживает одно соединение от подключения до конца игры.
+    serve():
+        Запускает сервер и обслуживает соединения до остановки.
+    """
+
+    def __init__(self, host: str = '127.0.0.1',
+                 port: int = 8765,
+                 max_sessions: int = 1000,
+                 idle_timeout: float = 300.0,
+                 pace: float = 0.5,
+                 board_class: type[Board] = BitBoard,
+                 ai_class: type[AI] = AI,
+                 pool_size: int = 64) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта GameServer.
+
+        Атрибуты
+        --------
+        host : str
+            Адрес, на котором сервер принимает соединения.
+        port : int
+            Порт, на котором сервер принимает соединения.
+        max_sessions : int
+            Максимальное количество одновременных игр.
+        idle_timeout : float
+            Время в секундах, после которого молчащий клиент отключается.
+        pace : float
+            Длительность пауз между сообщениями игры в секундах.
+        board_class : type
+            Класс досок игр.
+        ai_class : type
+            Класс игрока-компьютера.
+        pool : BoardPool
+            Запас заранее сгенерированных досок для новых игр
+            (до pool_size досок, пополняется при четверти от него).
+        sessions : int
+            Количество идущих сейчас игр.
+        """
+
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.pace = pace
+        self.board_class = board_class
+        self.ai_class = ai_class
+        self.pool = BoardPool(board_class, size=pool_size,
+                              low=pool_size // 4)
+        self.sessions = 0
+
+    def reader(self, reader: asyncio.StreamReader,
+               writer: asyncio.StreamWriter,
+               game: AsyncGame) -> Callable[[], Awaitable[str]]:
+        """
+        Возвращает функцию чтения координат выстрела для игры.
+        Перед чтением она дожидается отправки накопленного вывода,
+        чтобы буфер медленного клиента не рос без ограничений.
+        Команда "board" выводит доски, "quit" завершает игру.
+        Строка длиннее LINE_LIMIT отбрасывается целиком, а клиент
+        получает сообщение об этом и может продолжить игру.
+        Если клиент дольше idle_timeout не присылает строку
+        или не забирает вывод, выбрасывается asyncio.TimeoutError.
+        """
+
+        async def drain_then_read() -> Optional[bytes]:
+            await writer.drain()
+            # Возвращает None, если строка оказалась слишком длинной
+            too_long = False
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    # Соединение закрыто: остаток без перевода строки
+                    return b'' if too_long else e.partial
+                except asyncio.LimitOverrunError as e:
+                    # Пропускаем прочитанную часть строки и дочитываем
+                    # её до перевода строки
+                    too_long = True
+                    await reader.readexactly(e.consumed)
+                else:
+                    return None if too_long else line
+
+        async def read_line() -> str:
+            while True:
+                # Отправка вывода и чтение строки - под одним сроком,
+                # иначе клиент, который не читает сокет, навсегда
+                # останавливает игру в drain() и занимает место
+                line = await asyncio.wait_for(drain_then_read(),
+                                              self.idle_timeout)
+                if line is None:
+                    game.say(LINE_TOO_LONG)
+                    game.say('x y = ', end='')
+                    continue
+                command = line.decode(errors='replace').strip().lower()
+                if command == 'quit':
+                    return ''
+                if command == 'board':
+                    game.show_boards()
+                elif command in ('help', '?'):
+                    game.say(COMMANDS_HELP)
+                else:
+                    # Пустая строка от клиента - это ещё не конец ввода
+                    return line.decode(errors='replace') if line else ''
+                game.say('x y = ', end='')
+
+        return read_line
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """
+        Обслуживает одно соединение от подключения до конца игры.
+        Если сервер заполнен, сообщает об этом и закрывает соединение.
+        """
+
+        if self.sessions >= self.max_sessions:
+            writer.write('\n\tСервер заполнен, попробуйте позже.\n'.encode())
+            writer.close()
+            return
+        self.sessions += 1
+        try:
+            game = AsyncGame(None, SocketStream(writer), self.pace,
+                             self.board_class, self.ai_class, pool=self.pool)
+            game.read_line = self.reader(reader, writer, game)
+            await game.greet()
+            game.say(COMMANDS_HELP)
+            await game.play()
+            await asyncio.wait_for(writer.drain(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            game.say('\n\tВремя ожидания хода истекло.\n')
+            # Если клиент не забирает вывод, соединение рвётся сразу,
+            # не дожидаясь отправки буфера
+            if writer.transport.get_write_buffer_size():
+                writer.transport.abort()
+        except (EOFError, ValueError, ConnectionError):
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self) -> None:
+        """
+        Запускает сервер и обслуживает соединения до остановки.
+        """
+
+        self.pool.start()
+        # Очередь подключений не меньше числа игр, чтобы при наплыве
+        # клиентов их подключения не отбрасывались
+        backlog = max(100, self.max_sessions)
+        server = await asyncio.start_server(self.handle, self.host, self.port,
+                                            limit=LINE_LIMIT, backlog=backlog)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Сервер игры «Морской бой» для многих игроков.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-sessions', type=int, default=1000,
+                        help='максимальное количество одновременных игр')
+    parser.add_argument('--idle-timeout', type=float, default=300.0,
+                        help='время ожидания хода клиента, секунды')
+    parser.add_argument('--pace', type=float, default=0.5,
+                        help='пауза между сообщениями, секунды')
+    parser.add_argument('--pool-size', type=int, default=64,
+                        help='запас заранее сгенерированных досок')
+    parser.add_argument('--stats', default=None,
+                        help='файл для периодической записи счётчиков')
+    args = parser.parse_args()
+    if args.stats:
+        enable().start_dump(args.stats)
+    try:
+        asyncio.run(GameServer(args.host, args.port, args.max_sessions,
+                               args.idle_timeout, args.pace,
+                               pool_size=args.pool_size).serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,130 @@
+import json
+
+import main
+from main import HIT, MISS, SUNK, ConsolePrinter, ShotResult, ShotSubscriber
+
+
+# Названия результатов выстрела в журнале и счётчиках
+RESULT_NAMES = {MISS: 'miss', HIT: 'hit', SUNK: 'sunk'}
+
+
+class ShotLogger(ShotSubscriber):
+    """
+    Класс для записи результатов выстрелов в файл, по строке JSON
+    на выстрел: имя доски, номер клетки, результат, а при потоплении -
+    номера клеток палуб корабля и его ореола.
+    Строки добавляются в конец файла пачками по batch штук.
+    Имена досок включают имя партии (см. Game.name), поэтому журнал
+    нескольких партий разбирается на партии по имени доски, а каждая
+    партия восстанавливается так же, как по истории Board.history:
+    после промаха ход переходит сопернику.
+
+    Атрибуты
+    --------
+    path : str
+        Путь к файлу журнала.
+    """
+
+    def __init__(self, path: str, batch: int = 256) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта ShotLogger.
+        """
+
+        super().__init__(batch)
+        self.path = path
+
+    def handle(self, shots: list[ShotResult]) -> None:
+        """
+        Добавляет строки пачки в конец файла одной записью.
+        """
+
+        lines = list()
+        for shot in shots:
+            entry = {'board': shot.board, 'cell': shot.cell,
+                     'result': RESULT_NAMES[shot.result]}
+            if shot.ship is not None:
+                entry['ship'] = list(shot.decks)
+                entry['halo'] = list(shot.halo)
+            lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(''.join(lines))
+
+    def __enter__(self) -> 'ShotLogger':
+        """
+        Возвращает сам объект для использования в with.
+        """
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Дописывает остаток результатов в файл при выходе из with.
+        """
+
+        self.close()
+
+
+class ShotMetrics(ShotSubscriber):
+    """
+    Класс для подсчёта результатов выстрелов.
+    Считаются выстрелы каждого результата, потопленные корабли
+    каждой длины и клетки их ореолов. Если включено
+    инструментирование (main.instrument), счётчики пачки
+    прибавляются и к нему с префиксом 'events.'.
+
+    Атрибуты
+    --------
+    counts : dict
+        Значения счётчиков: miss, hit, sunk, sunk.<длина>, halo.
+    """
+
+    def __init__(self, batch: int = 1024) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта ShotMetrics.
+        """
+
+        super().__init__(batch)
+        self.counts = dict()
+
+    def handle(self, shots: list[ShotResult]) -> None:
+        """
+        Прибавляет пачку результатов к счётчикам.
+        """
+
+        batch = dict()
+        for shot in shots:
+            name = RESULT_NAMES[shot.result]
+            batch[name] = batch.get(name, 0) + 1
+            if shot.ship is not None:
+                name = f'sunk.{shot.ship.length}'
+                batch[name] = batch.get(name, 0) + 1
+                batch['halo'] = batch.get('halo', 0) + len(shot.halo)
+        for name, value in batch.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+            if main.instrument is not None:
+                main.instrument.count(f'events.{name}', value)
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Возвращает счётчики с учётом ещё не обработанной пачки.
+        """
+
+        self.flush()
+        return dict(self.counts)
+
+
+def make_subscriber(spec: str) -> ShotSubscriber:
+    """
+    Возвращает получателя результатов по строке параметра командной
+    строки: 'console' - ConsolePrinter без пауз, 'metrics' - ShotMetrics,
+    'log:путь' - ShotLogger в данный файл.
+    Если строка не подходит ни под один вариант, выбрасывает ValueError.
+    """
+
+    if spec == 'console':
+        return ConsolePrinter(pause=0)
+    if spec == 'metrics':
+        return ShotMetrics()
+    if spec.startswith('log:'):
+        return ShotLogger(spec[4:])
+    raise ValueError(f'Неизвестный получатель результатов: {spec}.')
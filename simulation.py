@@ -0,0 +1,182 @@
+from random import getrandbits
+from time import perf_counter
+from typing import Iterator, NamedTuple, Optional
+
+from layouts import stream_placements
+from main import (BOARD_SIZE, MISS, SHIPS_TYPES, BitBoard, RandomStream,
+                  derive_seed, ship_placements)
+
+
+# Количество партий, доски которых генерируются одной порцией
+BLOCK = 4096
+
+
+class GameResult(NamedTuple):
+    """
+    Класс для представления результата одной сыгранной партии.
+
+    Атрибуты
+    --------
+    winner : int
+        Номер победившего игрока (0 - ходивший первым, 1 - второй).
+    moves : int
+        Количество сделанных выстрелов обоими игроками.
+    shots : tuple
+        Последовательность выстрелов в виде пар (номер клетки, попадание).
+        Номер клетки равен y * width + x. Чей это был выстрел,
+        восстанавливается по последовательности: после промаха
+        право хода переходит сопернику.
+    seed : int
+        Начальное значение потока случайных чисел партии:
+        play_game(seed) повторяет партию в точности.
+    """
+
+    winner: int
+    moves: int
+    shots: tuple[tuple[int, bool], ...]
+    seed: int = 0
+
+
+def play_headless(boards: tuple[BitBoard, BitBoard],
+                  rng: RandomStream) -> GameResult:
+    """
+    Разыгрывает одну партию компьютера против компьютера
+    без вывода в консоль и без пауз.
+    boards[i] - собственная доска игрока i.
+
+    AI.ask выбирает случайную клетку без памяти, а Player.move повторяет
+    попытку, пока клетка не окажется свободной. Поэтому каждый выстрел
+    AI равновероятно попадает в одну из ещё свободных клеток доски соперника.
+    Здесь то же распределение получается без повторных попыток:
+    каждый игрок выбирает случайную клетку из ещё не выбранных им,
+    пропуская заблокированные ореолами.
+    """
+
+    # Ещё не выбранные клетки доски соперника для каждого игрока
+    remaining = [list(range(board.width * board.height)) for board in
+                 (boards[1], boards[0])]
+    below = rng.below
+    shots = list()
+    # Маркер текущего игрока
+    player = 0
+    while True:
+        board = boards[1 - player]
+        cells = remaining[player]
+        # Берём случайную свободную клетку: меняем её местами
+        # с последней и снимаем с конца списка
+        while True:
+            i = below(len(cells))
+            cells[i], cells[-1] = cells[-1], cells[i]
+            cell = cells.pop()
+            if not board.is_used(cell):
+                break
+        result = board.shot_cell(cell)
+        shots.append((cell, result != MISS))
+        # Если доска соперника проиграла
+        if board.live_ships == 0:
+            return GameResult(player, len(shots), tuple(shots), rng.seed)
+        # Переход права следующего хода после промаха
+        if result == MISS:
+            player = 1 - player
+
+
+def game_boards(rngs: list[RandomStream],
+                width: int = BOARD_SIZE,
+                height: int = BOARD_SIZE,
+                ships_types: list[int] = SHIPS_TYPES
+                ) -> list[tuple[BitBoard, BitBoard]]:
+    """
+    Возвращает готовые к игре пары досок партий с потоками случайных
+    чисел rngs. Расстановки всех досок генерируются векторно
+    (layouts.stream_placements), но обе доски партии берут случайные
+    числа только из потока своей партии, поэтому зависят только от него.
+    """
+
+    streams = [rng for rng in rngs for _ in range(2)]
+    layouts = stream_placements(streams, ships_types, width, height).tolist()
+    # Маски палуб положений кораблей в порядке флота
+    tables = [[placement[0] for placement in
+               ship_placements(length, width, height)]
+              for length in ships_types]
+    boards = list()
+    for layout in layouts:
+        board = BitBoard(width, height, ships_types)
+        board.set_ships([table[index] for table, index in
+                         zip(tables, layout)])
+        boards.append(board)
+    return list(zip(boards[::2], boards[1::2]))
+
+
+def play_game(seed: int,
+              width: int = BOARD_SIZE,
+              height: int = BOARD_SIZE,
+              ships_types: list[int] = SHIPS_TYPES) -> GameResult:
+    """
+    Разыгрывает одну партию компьютера против компьютера
+    без вывода в консоль и без пауз. Расстановки досок и выстрелы
+    берутся из потока случайных чисел с начальным значением seed,
+    поэтому партия зависит только от него.
+    """
+
+    rng = RandomStream(seed)
+    boards = game_boards([rng], width, height, ships_types)[0]
+    return play_headless(boards, rng)
+
+
+def play_games(first: int, count: int, seed: int,
+               width: int = BOARD_SIZE,
+               height: int = BOARD_SIZE,
+               ships_types: list[int] = SHIPS_TYPES
+               ) -> Iterator[tuple[tuple[BitBoard, BitBoard], GameResult]]:
+    """
+    Разыгрывает партии с номерами от first до first + count - 1
+    прогона с начальным значением seed (см. simulate) и возвращает
+    их по одной в виде пар (доски партии, результат).
+    Доски генерируются порциями по BLOCK партий.
+    """
+
+    for start in range(first, first + count, BLOCK):
+        rngs = [RandomStream(derive_seed(seed, number)) for number in
+                range(start, min(start + BLOCK, first + count))]
+        for rng, boards in zip(rngs, game_boards(rngs, width, height,
+                                                 ships_types)):
+            yield boards, play_headless(boards, rng)
+
+
+def simulate(n_games: int, seed: Optional[int] = None,
+             width: int = BOARD_SIZE,
+             height: int = BOARD_SIZE,
+             ships_types: list[int] = SHIPS_TYPES) -> list[GameResult]:
+    """
+    Разыгрывает n_games партий компьютера против компьютера
+    без вывода в консоль и без пауз.
+    Партия номер i играется с начальным значением derive_seed(seed, i),
+    поэтому прогон можно разбить между процессами
+    по номерам партий (play_games), а любую партию - повторить
+    вызовом play_game по её seed.
+    Доски всех партий порции генерируются векторно (см. game_boards).
+    Возвращает список результатов партий.
+
+    Генерация досок больше не узкое место: почти всё время уходит
+    на сами партии на Python (около 40 выстрелов на партию), поэтому
+    скорость - порядка нескольких тысяч партий в секунду на ядро,
+    а не десятки тысяч.
+    """
+
+    if seed is None:
+        seed = getrandbits(64)
+    return [result for _, result in
+            play_games(0, n_games, seed, width, height, ships_types)]
+
+
+if __name__ == '__main__':
+    n_games = 1000
+    start = perf_counter()
+    results = simulate(n_games)
+    elapsed = perf_counter() - start
+    first_wins = sum(result.winner == 0 for result in results)
+    mean_moves = sum(result.moves for result in results) / n_games
+    print(f'Партий: {n_games}, время: {elapsed:.2f} с '
+          f'({n_games / elapsed:.0f} партий/с)')
+    print(f'Побед первого игрока: {first_wins / n_games:.1%}, '
+          f'среднее число выстрелов: {mean_moves:.1f}')
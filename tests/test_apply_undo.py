@@ -0,0 +1,64 @@
+from random import Random
+
+import pytest
+
+from main import (BitBoard, Board, BoardException, Dot, Game, RandomStream,
+                  Ship)
+
+
+def snapshot(board: Board) -> tuple:
+    """
+    Возвращает всё наблюдаемое состояние доски.
+    """
+
+    return ([column[:] for column in board.table], set(board.locked_dots),
+            [ship.lives for ship in board.ships], board.live_ships,
+            board.state(), board.is_loser())
+
+
+def twin(board: Board) -> Board:
+    """
+    Возвращает готовую доску того же класса с теми же кораблями.
+    """
+
+    copy = type(board)(board.width, board.height, board.ships_types)
+    for ship in board.ships:
+        copy.add_ship(Ship(ship.length, ship.bow, ship.direction))
+    copy.get_ready()
+    return copy
+
+
+@pytest.mark.parametrize('board_class', [Board, BitBoard])
+def test_undo_restores_every_trial_shot(board_class):
+    rng = Random(4)
+    width, height = 7, 6
+    for seed in range(20):
+        board = Game.random_board(board_class, width, height,
+                                  [3, 2, 2, 1, 1, 1], RandomStream(seed))
+        board.get_ready()
+        played = twin(board)
+        cells = [Dot(x, y) for y in range(height) for x in range(width)]
+        while not board.is_loser():
+            # Серия пробных выстрелов, отменяемых в обратном порядке
+            snapshots = list()
+            for dot in rng.sample(cells, rng.randint(1, 12)):
+                before = snapshot(board)
+                try:
+                    board.apply(dot)
+                except BoardException:
+                    assert snapshot(board) == before
+                    continue
+                snapshots.append(before)
+            while snapshots:
+                board.undo()
+                assert snapshot(board) == snapshots.pop()
+            # Настоящий выстрел после отмен - как на доске без них
+            dot = rng.choice(cells)
+            try:
+                expected = played.fire(dot)
+            except BoardException as e:
+                with pytest.raises(type(e)):
+                    board.fire(dot)
+                continue
+            assert board.fire(dot) == expected
+            assert snapshot(board) == snapshot(played)
@@ -0,0 +1,65 @@
+import asyncio
+import io
+
+import main
+from async_game import AsyncGame
+from main import ConsolePrinter
+
+
+def sweep_reader(width: int, height: int):
+    """
+    Возвращает асинхронную функцию ввода, которая сначала запускает игру,
+    а затем по очереди стреляет во все клетки доски.
+    """
+
+    lines = iter(['\n'] + [f'{x} {y}\n' for y in range(1, height + 1)
+                           for x in range(1, width + 1)])
+
+    async def read_line() -> str:
+        return next(lines, '')
+    return read_line
+
+
+async def play(game: AsyncGame) -> int:
+    await game.greet()
+    return await game.play()
+
+
+def test_game_finishes_with_loser_board():
+    game = AsyncGame(sweep_reader(6, 6), io.StringIO(), pace=0, seed=3)
+    winner = asyncio.run(play(game))
+    boards = (game.ai.own_board, game.user.own_board)
+    assert boards[winner].is_loser()
+    assert not boards[1 - winner].is_loser()
+    assert game.renderer.stream.getvalue().count('Ваш ход:') > 0
+
+
+def test_console_printer_does_not_block_event_loop(monkeypatch):
+    def blocked(seconds: float) -> None:
+        raise AssertionError('time.sleep в асинхронной игре')
+    monkeypatch.setattr(main, 'sleep', blocked)
+    printed = io.StringIO()
+    printer = ConsolePrinter(printed, pause=0.001)
+
+    async def run() -> tuple[int, int]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+        task = asyncio.create_task(ticker())
+        game = AsyncGame(sweep_reader(6, 6), io.StringIO(), pace=0, seed=3,
+                         subscribers=[printer])
+        winner = await play(game)
+        task.cancel()
+        return winner, ticks
+
+    winner, ticks = asyncio.run(run())
+    assert winner in (0, 1)
+    assert printer.deferred and printer.owed == 0
+    shots = printed.getvalue().count('\n')
+    assert shots > 0
+    # Цикл событий обслуживал другую задачу во время пауз после выстрелов
+    assert ticks >= shots
@@ -0,0 +1,56 @@
+from random import Random
+
+import pytest
+
+from main import (BitBoard, Board, BoardUsedException,
+                  BoardWrongShipException, Dot, Game, RandomStream, Ship)
+
+
+@pytest.mark.parametrize('size', [(6, 6), (10, 7)])
+def test_bitboard_matches_board(size):
+    width, height = size
+    fleet = [3, 2, 2, 1, 1, 1, 1]
+    rng = Random(1)
+    for seed in range(30):
+        board = Game.random_board(Board, width, height, fleet,
+                                  RandomStream(seed))
+        bits = BitBoard(width, height, fleet)
+        # У каждой доски свои корабли: выстрелы уменьшают их жизни
+        for ship in board.ships:
+            bits.add_ship(Ship(ship.length, ship.bow, ship.direction))
+        assert bits.locked_dots == board.locked_dots
+        board.get_ready()
+        bits.get_ready()
+        cells = [Dot(x, y) for y in range(height) for x in range(width)]
+        rng.shuffle(cells)
+        for dot in cells:
+            try:
+                expected = board.fire(dot)
+            except BoardUsedException:
+                with pytest.raises(BoardUsedException):
+                    bits.fire(dot)
+                continue
+            assert bits.fire(dot) == expected
+            assert bits.state() == board.state()
+            assert bits.live_ships == board.live_ships
+            assert bits.table == board.table
+            if board.is_loser():
+                break
+        assert bits.is_loser() and board.is_loser()
+
+
+def test_add_ship_rejects_the_same_ships():
+    rng = Random(2)
+    for _ in range(200):
+        board, bits = Board(), BitBoard()
+        for _ in range(8):
+            ship = (rng.randint(1, 3), Dot(rng.randrange(7), rng.randrange(7)),
+                    rng.randrange(2))
+            try:
+                board.add_ship(Ship(*ship))
+            except BoardWrongShipException:
+                with pytest.raises(BoardWrongShipException):
+                    bits.add_ship(Ship(*ship))
+            else:
+                bits.add_ship(Ship(*ship))
+        assert bits.locked_dots == board.locked_dots
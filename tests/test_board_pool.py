@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from board_pool import BoardPool
+from layout_index import LayoutIndex
+from main import BitBoard, Game
+
+
+@pytest.mark.parametrize('options', [
+    {'board_class': BitBoard},
+    {'width': 8},
+    {'height': 8},
+    {'ships_types': [3, 2, 1]},
+])
+def test_mismatched_pool_is_rejected(options):
+    with pytest.raises(ValueError):
+        Game(pool=BoardPool(**options), subscribers=[])
+
+
+def test_matching_pool_is_used():
+    pool = BoardPool(BitBoard, 8, 8, [3, 2, 1], size=4)
+    pool._boards.extend(Game.random_board(BitBoard, 8, 8, [3, 2, 1])
+                        for _ in range(2))
+    for board in pool._boards:
+        board.get_ready()
+    game = Game(BitBoard, width=8, height=8, ships_types=[1, 2, 3],
+                pool=pool, subscribers=[])
+    assert len(pool) == 0
+    assert isinstance(game.user_board, BitBoard)
+
+
+def test_mismatched_layout_index_is_rejected():
+    layouts = LayoutIndex.build([2, 1], 4, 4)
+    with pytest.raises(ValueError):
+        Game(layouts=layouts, subscribers=[])
+    game = Game(width=4, height=4, ships_types=[1, 2], layouts=layouts,
+                subscribers=[])
+    assert (game.user_board.width, game.user_board.height) == (4, 4)
+
+
+def test_restart_keeps_one_producer():
+    pool = BoardPool(size=8, low=2)
+    for _ in range(20):
+        pool.start()
+        pool.stop()
+    pool.start()
+    try:
+        producers = [thread for thread in threading.enumerate()
+                     if thread.name == 'board-pool']
+        assert len(producers) == 1
+    finally:
+        pool.stop()
@@ -0,0 +1,20 @@
+import pytest
+
+from main import Board, BitBoard
+
+
+@pytest.mark.parametrize('board_class', [Board, BitBoard])
+def test_sizes_are_part_of_state(board_class):
+    small = board_class(6, 6, [1]).state()
+    large = board_class(10, 10, [1]).state()
+    assert small != large
+    assert len({small, large}) == 2
+    assert small == board_class(6, 6, [1]).state()
+
+
+@pytest.mark.parametrize('board_class', [Board, BitBoard])
+def test_foreign_operands(board_class):
+    state = board_class().state()
+    assert state != 0
+    assert state not in {0: 'ноль'}
+    assert state in {state: 'состояние'}
@@ -0,0 +1,51 @@
+import pytest
+
+from main import BitBoard, Board, DensityAI, Game, RandomStream
+
+
+def play(seed, width=6, height=6, fleet=(3, 2, 2, 1, 1, 1, 1), check=None):
+    rng = RandomStream(seed)
+    target = Game.random_board(BitBoard, width, height, list(fleet), rng)
+    target.get_ready()
+    ai = DensityAI(Board(width, height, list(fleet)), target, rng)
+    shots = 0
+    while not target.is_loser():
+        dot = ai.choose()
+        result = target.fire(dot)
+        ai.learn(dot, result)
+        shots += 1
+        if check is not None:
+            check(ai)
+    return shots
+
+
+def test_scores_match_weights():
+    def check(ai):
+        for cell, placements in enumerate(ai._by_cell):
+            assert ai._score[cell] == sum(ai._weight[placement]
+                                          for placement in placements)
+        assert ai._live == sum(ai._alive)
+    for seed in range(5):
+        play(seed, check=check)
+
+
+def test_sunk_lengths_are_dropped():
+    def check(ai):
+        for length, left in ai._remaining.items():
+            if not left:
+                assert not any(ai._alive[placement]
+                               for placement in ai._by_length[length])
+    for seed in range(10):
+        play(seed, 8, 8, (4, 3, 2, 1), check)
+
+
+@pytest.mark.parametrize('size', [(6, 6), (10, 10)])
+def test_beats_random_shooting(size):
+    width, height = size
+    fleet = (3, 2, 2, 1, 1, 1, 1)
+    shots = [play(seed, width, height, fleet) for seed in range(40)]
+    assert max(shots) <= width * height
+    # Случайная стрельба до последней из decks палуб тратит в среднем
+    # cells * decks / (decks + 1) выстрелов
+    cells, decks = width * height, sum(fleet)
+    assert sum(shots) / len(shots) < 0.8 * cells * decks / (decks + 1)
@@ -0,0 +1,96 @@
+from functools import lru_cache
+from time import perf_counter
+
+import pytest
+
+from endgame import EndgameAI, EndgameSolver, consistent_layouts
+from layout_index import LayoutIndex
+from main import AI, Board, Game, RandomStream
+from tournament import play_match
+
+
+def brute_force_expected(layouts: list[tuple[int, ...]]) -> float:
+    """
+    Возвращает наименьшее ожидаемое число выстрелов до потопления
+    флота полным перебором выстрелов и их результатов.
+    """
+
+    @lru_cache(maxsize=None)
+    def solve(members: frozenset, hits: int) -> float:
+        decks = {number: sum(layouts[number]) for number in members}
+        left = 0
+        for number in members:
+            left |= decks[number] & ~hits
+        if not left:
+            return 0.0
+        best = float('inf')
+        for cell in range(left.bit_length()):
+            bit = 1 << cell
+            if not left & bit:
+                continue
+            groups = dict()
+            for number in members:
+                outcome = 0
+                if decks[number] & bit:
+                    ship = next(ship for ship in layouts[number]
+                                if ship & bit)
+                    outcome = ship if not ship & ~(hits | bit) else -1
+                groups.setdefault(outcome, set()).add(number)
+            value = 1 + sum(len(group) * solve(frozenset(group),
+                                               hits if outcome == 0
+                                               else hits | bit)
+                            for outcome, group in groups.items()) / \
+                len(members)
+            best = min(best, value)
+        return best
+
+    return solve(frozenset(range(len(layouts))), 0)
+
+
+@pytest.mark.parametrize('width, height, fleet', [(3, 3, [2, 1]),
+                                                  (4, 3, [2, 1]),
+                                                  (2, 5, [2, 1])])
+def test_solver_matches_brute_force(width, height, fleet):
+    layouts = consistent_layouts(fleet, width, height, 0, 0, 10000, 10 ** 6)
+    solver = EndgameSolver(width, height, layouts)
+    members = solver.filter(0, 0, 0)
+    assert members == (1 << len(layouts)) - 1
+    cell, value = solver.best_shot(members, 0, perf_counter() + 60)
+    assert value == pytest.approx(brute_force_expected(layouts))
+    assert solver.targets(members, 0) >> cell & 1
+
+
+def test_consistent_layouts_follow_board_rules():
+    layouts = consistent_layouts([2, 2, 1], 4, 4, 0, 0, 10000, 10 ** 6)
+    masks = [sum(ships) for ships in layouts]
+    index = LayoutIndex.build([2, 2, 1], 4, 4)
+    assert sorted(masks) == sorted(index.mask(number)
+                                   for number in range(len(index)))
+    # С подбитой палубой в клетке 0 и промахом в клетке 5
+    # остаются расстановки с палубой в 0 и без палубы в 5
+    seen = consistent_layouts([2, 2, 1], 4, 4, 1, 1 << 5, 10000, 10 ** 6)
+    assert sorted(sum(ships) for ships in seen) == sorted(
+        mask for mask in masks if mask & 1 and not mask >> 5 & 1 and
+        # Однопалубный корабль в клетке 0 уже был бы потоплен
+        mask & 0b10010)
+
+
+def test_endgame_ai_finishes_games_with_the_solver():
+    wins = 0
+    for seed in range(8):
+        winner, moves, forfeit = play_match((EndgameAI, AI), 6, 6,
+                                            [3, 2, 2, 1, 1, 1, 1],
+                                            seed=seed)
+        assert not forfeit
+        wins += winner == 0
+    assert wins >= 6
+    board = Game.random_board(Board, 6, 6, [2, 1], RandomStream(3))
+    board.get_ready()
+    ai = EndgameAI(Board(6, 6, [2, 1]), board, RandomStream(4))
+    expected = list()
+    while not board.is_loser():
+        dot = ai.choose()
+        expected.append(ai.expected)
+        ai.learn(dot, board.shot(dot).result)
+    # Ближе к концу выбор делает точный перебор
+    assert expected[-1] is not None
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from heatmaps import Heatmaps, aggregate, collect
+from main import MISS
+from simulation import play_games
+
+ARRAYS = ('occupancy', 'shots', 'hits', 'hit_turns', 'first_hit')
+
+
+def naive(count: int, seed: int, width: int, height: int,
+          ships_types: list[int]) -> dict[str, np.ndarray]:
+    """
+    Считает статистику партий play_games по одной партии и клетке.
+    """
+
+    cells = width * height
+    stats = {'occupancy': np.zeros(cells, dtype=np.int64)}
+    for name in ARRAYS[1:]:
+        stats[name] = np.zeros((2, cells), dtype=np.int64)
+    for boards, result in play_games(0, count, seed, width, height,
+                                     ships_types):
+        for board in boards:
+            for ship in board.ships:
+                for dot in ship.dots:
+                    stats['occupancy'][dot.y * width + dot.x] += 1
+        player, turns, first = 0, [0, 0], [True, True]
+        for cell, shot in result.shots:
+            turns[player] += 1
+            stats['shots'][player, cell] += 1
+            if shot == MISS:
+                player = 1 - player
+                continue
+            stats['hits'][player, cell] += 1
+            stats['hit_turns'][player, cell] += turns[player]
+            if first[player]:
+                first[player] = False
+                stats['first_hit'][player, turns[player] - 1] += 1
+    return stats
+
+
+def test_streamed_counts_match_naive(monkeypatch):
+    # Маленькая пачка событий: массивы пополняются много раз за прогон
+    monkeypatch.setattr(Heatmaps, 'FLUSH', 7)
+    heatmaps = collect(0, 40, 5, 7, 6, [3, 2, 1, 1])
+    expected = naive(40, 5, 7, 6, [3, 2, 1, 1])
+    assert heatmaps.games == 40 and heatmaps.boards == 80
+    for name in ARRAYS:
+        assert np.array_equal(getattr(heatmaps, name), expected[name]), name
+    maps = heatmaps.maps()
+    assert maps['occupancy'].shape == (6, 7)
+    assert maps['occupancy'].sum() == pytest.approx(3 + 2 + 1 + 1)
+
+
+def test_aggregate_merges_chunks_like_one_run():
+    whole = collect(0, 60, 8)
+    pooled = aggregate(60, 8, workers=2, chunk=25)
+    assert pooled.games == whole.games
+    for name in ARRAYS:
+        assert np.array_equal(getattr(pooled, name), getattr(whole, name))
+
+
+def test_save_load_round_trip(tmp_path):
+    heatmaps = collect(0, 15, 2)
+    path = str(tmp_path / 'heatmaps.npz')
+    heatmaps.save(path)
+    loaded = Heatmaps.load(path)
+    assert (loaded.width, loaded.height, loaded.games, loaded.boards) == \
+        (heatmaps.width, heatmaps.height, heatmaps.games, heatmaps.boards)
+    for name in ARRAYS:
+        assert np.array_equal(getattr(loaded, name), getattr(heatmaps, name))
+    with np.load(path) as data:
+        assert np.array_equal(data['map_occupancy'],
+                              heatmaps.maps()['occupancy'])
+    with pytest.raises(ValueError):
+        loaded.merge(Heatmaps(loaded.width + 1, loaded.height))
+
+
+def test_add_uses_record_ships():
+    heatmaps = Heatmaps(4, 3)
+    # Вертикальный корабль из клетки 1 и горизонтальный из клетки 8
+    heatmaps.add((((1, 2, 1),), ((8, 3, 0),)), [(5, 1), (6, MISS), (0, 2)])
+    assert heatmaps.maps()['occupancy'].sum() == pytest.approx(2.5)
+    assert heatmaps.hits[0, 5] == 1 and heatmaps.hits[1, 0] == 1
+    assert heatmaps.shots[0, 6] == 1
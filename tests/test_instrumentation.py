@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import main
+from instrumentation import Instrumentation, disable, enable
+from main import Board, Dot, Ship
+
+
+def test_counters_follow_shots():
+    instrument = enable()
+    try:
+        board = Board(4, 4, [2])
+        board.add_ship(Ship(2, Dot(0, 0), 0))
+        board.get_ready()
+        for dot in (Dot(3, 3), Dot(0, 0), Dot(1, 0)):
+            board.shot(dot)
+    finally:
+        disable()
+    assert main.instrument is None
+    counters = instrument.snapshot()['counters']
+    assert counters['shot.miss'] == 1
+    assert counters['shot.hit'] == 1
+    assert counters['shot.sunk'] == 1
+
+
+def test_second_start_dump_is_noop(tmp_path):
+    instrument = Instrumentation()
+    path = str(tmp_path / 'stats.json')
+    instrument.count('games', 3)
+    instrument.start_dump(path, interval=60.0)
+    instrument.start_dump(path, interval=60.0)
+    threads = [thread for thread in threading.enumerate()
+               if thread.name == 'instrumentation-dump']
+    assert len(threads) == 1
+    instrument.stop_dump()
+    assert not threads[0].is_alive()
+    with open(path, encoding='utf-8') as file:
+        assert json.load(file)['counters'] == {'games': 3}
+
+
+def test_script_shares_instrument_with_imported_main():
+    # Запущенный скриптом main.py должен видеть сборщик,
+    # включённый через import main в другом модуле
+    probe = (
+        'import builtins, runpy, sys\n'
+        'def ask(*args):\n'
+        '    import instrumentation\n'
+        '    instrument = instrumentation.enable()\n'
+        '    game = sys.modules["__main__"]\n'
+        '    sys.exit(0 if game.instrument is instrument else 1)\n'
+        'builtins.input = ask\n'
+        'runpy.run_path("main.py", run_name="__main__")\n')
+    result = subprocess.run([sys.executable, '-c', probe],
+                            cwd=Path(__file__).resolve().parent.parent,
+                            capture_output=True, timeout=60)
+    assert result.returncode == 0, result.stderr.decode()
@@ -0,0 +1,57 @@
+import itertools
+
+import numpy as np
+
+from layout_index import LayoutIndex, mask_ships, observed
+from main import BitBoard, Board, BoardException, Dot, Ship
+
+
+def brute_force_layouts(ships_types: list[int], width: int,
+                        height: int) -> set[int]:
+    """
+    Возвращает маски палуб всех расстановок, которые принимает
+    Board.add_ship, перебирая все положения каждого корабля.
+    """
+
+    positions = [(x, y, direction) for x in range(width)
+                 for y in range(height) for direction in (0, 1)]
+    layouts = set()
+    for choice in itertools.product(positions, repeat=len(ships_types)):
+        board = Board(width, height, ships_types)
+        try:
+            for length, (x, y, direction) in zip(ships_types, choice):
+                board.add_ship(Ship(length, Dot(x, y), direction))
+        except BoardException:
+            continue
+        layouts.add(sum(1 << (dot.y * width + dot.x)
+                        for ship in board.ships for dot in ship.dots))
+    return layouts
+
+
+def test_index_matches_brute_force():
+    index = LayoutIndex.build([2, 2, 1], 4, 4)
+    masks = [index.mask(number) for number in range(len(index))]
+    assert len(set(masks)) == len(index)
+    assert set(masks) == brute_force_layouts([2, 2, 1], 4, 4)
+
+
+def test_boards_and_filter_on_multiword_masks(tmp_path):
+    # 9 * 8 = 72 клетки - маска занимает два 64-битных слова
+    index = LayoutIndex.load([3, 1], 9, 8, cache_dir=str(tmp_path))
+    assert index.masks.shape[1] == 2
+    assert np.array_equal(LayoutIndex.load([3, 1], 9, 8,
+                                           cache_dir=str(tmp_path)).masks,
+                          LayoutIndex.build([3, 1], 9, 8).masks)
+    board = index.board(len(index) - 1, BitBoard)
+    assert [ship.length for ship in mask_ships(index.mask(len(index) - 1),
+                                               9)] == [3, 1]
+    for dot in [Dot(x, y) for y in range(8) for x in range(9)][::5]:
+        board.shot(dot)
+    hits, empty = observed(board)
+    masks = [index.mask(number) for number in range(len(index))]
+    expected = [mask for mask in masks
+                if mask & hits == hits and not mask & empty]
+    filtered = index.filter(hits, empty)
+    assert [filtered.mask(number)
+            for number in range(len(filtered))] == expected
+    assert index.mask(len(index) - 1) in expected
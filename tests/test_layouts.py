@@ -0,0 +1,43 @@
+import random
+import tracemalloc
+
+import layouts
+from layouts import generate_layouts, layout_to_board
+from main import BitBoard
+
+
+def test_layouts_are_legal_boards():
+    grids = generate_layouts(200, [3, 2, 2, 1, 1, 1, 1], 6, 6, seed=1)
+    assert grids.shape == (200, 6, 6)
+    assert (grids.sum(axis=(1, 2)) == 11).all()
+    for grid in grids:
+        # layout_to_board ставит корабли через add_ship, который
+        # отвергает соприкасающиеся корабли
+        board = layout_to_board(grid, BitBoard)
+        assert sorted(board.ships_types) == [1, 1, 1, 1, 2, 2, 3]
+
+
+def test_same_seed_same_layouts():
+    assert (generate_layouts(50, seed=4) == generate_layouts(50, seed=4)).all()
+
+
+def test_global_random_state_is_untouched():
+    random.seed(12)
+    expected = random.random()
+    random.seed(12)
+    generate_layouts(10, seed=1)
+    assert random.random() == expected
+
+
+def test_chunk_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(layouts, 'CHUNK_MEMORY', 4 * 2 ** 20)
+    # Маски положений кораблей кешируются при первом вызове
+    generate_layouts(1, [4, 3, 2, 1], 40, 40, seed=2)
+    tracemalloc.start()
+    try:
+        generate_layouts(300, [4, 3, 2, 1], 40, 40, seed=2)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Без ограничения порция из 300 досок заняла бы около 200 Мбайт
+    assert peak < 12 * 2 ** 20
@@ -0,0 +1,49 @@
+import time
+
+import montecarlo
+from main import Board, Dot, oreol_mask
+from montecarlo import MonteCarloAI, close_pool, sample_layouts
+
+
+def test_samples_cover_hits_and_avoid_locked():
+    # Попадание в клетку (1, 1) и промах в (3, 3) на доске 5x5
+    hits = 1 << (1 * 5 + 1)
+    locked = 1 << (3 * 5 + 3)
+    samples, counts = sample_layouts(5, 5, (3, 2, 1), hits, locked,
+                                     10.0, seed=7, limit=300)
+    assert samples == 300
+    assert counts[3 * 5 + 3] == 0
+    assert counts[1 * 5 + 1] == 0
+    # Палуба при попадании продолжается в соседнюю клетку
+    assert sum(counts[cell] for cell in range(25)
+               if oreol_mask(hits, 5, 5) >> cell & 1) >= 300
+    assert (samples, counts) == sample_layouts(5, 5, (3, 2, 1), hits, locked,
+                                               10.0, seed=7, limit=300)
+
+
+def test_wall_clock_jump_does_not_end_sampling(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: 1e12)
+    samples, _ = sample_layouts(5, 5, (2, 1), 0, 0, 10.0, seed=1, limit=50)
+    assert samples == 50
+
+
+def test_pool_moves_and_close():
+    board = Board(6, 6, [3, 2, 1])
+    ai = type('FastMonteCarloAI', (MonteCarloAI,),
+              {'time_budget': 0.3, 'workers': 2})(Board(6, 6, [3, 2, 1]),
+                                                  board)
+    try:
+        for _ in range(3):
+            dot = ai.choose()
+            assert ai.samples > 0
+            assert not board.out(dot)
+            ai.learn(dot, board.shot(dot).result)
+        assert montecarlo._pool is not None
+    finally:
+        close_pool()
+    assert montecarlo._pool is None
+    # После закрытия следующий ход создаёт пул заново
+    try:
+        assert isinstance(ai.choose(), Dot)
+    finally:
+        close_pool()
@@ -0,0 +1,17 @@
+import pytest
+
+from main import (BoardFleetSearchException, BoardWrongFleetException,
+                  RandomStream, place_fleet)
+
+
+def test_impossible_fleet():
+    with pytest.raises(BoardWrongFleetException):
+        place_fleet([3, 3, 3], 3, 3)
+
+
+def test_step_limit_is_reported_separately():
+    # Флот помещается, но за один шаг без перезапусков его не расставить
+    assert place_fleet([2, 1, 1], 4, 4, rng=RandomStream(1))
+    with pytest.raises(BoardFleetSearchException):
+        place_fleet([2, 1, 1], 4, 4, max_steps=1, restarts=0,
+                    rng=RandomStream(1))
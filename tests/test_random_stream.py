@@ -0,0 +1,58 @@
+import random
+
+from main import BitBoard, Game, RandomStream, derive_seed
+
+
+def draws(rng: RandomStream) -> list:
+    """
+    Возвращает смесь чисел всех видов, которая выходит за одну пачку.
+    """
+
+    values = list()
+    for i in range(3 * RandomStream.BATCH // 4):
+        values.append(rng.below(i + 1))
+        values.append(rng.randint(-5, 5))
+        values.append(rng.random())
+    items = list(range(50))
+    rng.shuffle(items)
+    return values + items
+
+
+def test_same_seed_gives_same_stream():
+    assert draws(RandomStream(42)) == draws(RandomStream(42))
+    assert draws(RandomStream(42)) != draws(RandomStream(43))
+    assert draws(RandomStream(42).spawn(3)) == draws(RandomStream(42).spawn(3))
+    assert draws(RandomStream(42).spawn(3)) != draws(RandomStream(42).spawn(4))
+
+
+def test_stream_does_not_depend_on_platform_or_global_state():
+    # Значения закреплены: партию можно повторить по seed на другой машине
+    assert derive_seed(0, 0) == 7120306904099482837
+    assert RandomStream(5).spawn(0).seed == derive_seed(5, 0)
+    random.seed(1)
+    rng = RandomStream(1)
+    random.random()
+    assert [rng.below(1000) for _ in range(5)] == [134, 569, 847, 802, 763]
+    state = random.getstate()
+    draws(RandomStream(7))
+    assert random.getstate() == state
+
+
+def test_values_stay_in_range():
+    rng = RandomStream(9)
+    for n in (1, 2, 3, 7, 1000, 1 << 32):
+        assert all(0 <= rng.below(n) < n for _ in range(500))
+    assert {rng.randint(2, 4) for _ in range(500)} == {2, 3, 4}
+    assert all(0.0 <= rng.random() < 1.0 for _ in range(1000))
+    items = list(range(30))
+    rng.shuffle(items)
+    assert sorted(items) == list(range(30))
+
+
+def test_game_seed_repeats_boards():
+    first, second = (Game(BitBoard, seed=11, subscribers=[])
+                     for _ in range(2))
+    for a, b in ((first.user_board, second.user_board),
+                 (first.ai_board, second.ai_board)):
+        assert [(ship.bow, ship.length, ship.direction) for ship in a.ships] \
+            == [(ship.bow, ship.length, ship.direction) for ship in b.ships]
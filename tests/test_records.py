@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from async_game import AsyncGame
+from records import (MAX_SIDE, GameRecord, RecordReader, RecordWriter,
+                     encode_record, record_game)
+
+
+def play_recorded(recorder: RecordWriter, seed: int, width: int,
+                  height: int, ships_types: list[int]) -> GameRecord:
+    """
+    Играет партию, в которой пользователь по очереди стреляет
+    во все клетки доски, записывает её и возвращает её запись.
+    """
+
+    lines = iter(['\n'] + [f'{x} {y}\n' for y in range(1, height + 1)
+                           for x in range(1, width + 1)])
+
+    async def read_line() -> str:
+        return next(lines, '')
+
+    async def play(game: AsyncGame) -> None:
+        await game.greet()
+        await game.play()
+
+    game = AsyncGame(read_line, pace=0, seed=seed, width=width,
+                     height=height, ships_types=ships_types,
+                     recorder=recorder)
+    asyncio.run(play(game))
+    return record_game(game)
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    with RecordWriter(path, batch=2) as writer:
+        records = [play_recorded(writer, seed, width, height, ships_types)
+                   for seed, width, height, ships_types in
+                   ((1, 6, 6, [3, 2, 2, 1]), (2, 9, 5, [4, 3, 1]),
+                    (3, 6, 6, [3, 2, 2, 1]))]
+    with RecordReader(path) as reader:
+        assert len(reader) == len(records)
+        for game, record in enumerate(records):
+            assert reader[game] == record
+            assert reader.header(game) == (record.width, record.height,
+                                           record.winner,
+                                           len(record.ships[0]),
+                                           len(record.shots))
+            for move, shot in enumerate(record.shots):
+                assert reader.shot(game, move) == shot
+            # Доска проигравшего после всех выстрелов проиграла
+            boards = reader.boards(game)
+            assert boards[1 - record.winner].is_loser()
+            assert not boards[record.winner].is_loser()
+            assert not any(board.is_loser()
+                           for board in reader.boards(game, 0))
+
+
+@pytest.mark.parametrize('width, height', [(MAX_SIDE + 1, 2),
+                                           (2, MAX_SIDE + 1), (0, 4)])
+def test_board_side_out_of_header_range(width, height):
+    record = GameRecord(width, height, 0, ((), ()), ())
+    with pytest.raises(ValueError, match='доски в записи партий'):
+        encode_record(record)
@@ -0,0 +1,80 @@
+import io
+import re
+from random import Random
+
+from main import BitBoard, Board, Dot, Game, RandomStream, Renderer, Ship
+
+ESCAPE = re.compile(r'\x1b\[(?:(\d+);(\d+)H|2J|H|K|J)')
+
+
+def screen(output):
+    """
+    Применяет вывод Renderer к пустому экрану и возвращает его строки.
+    """
+
+    lines = list()
+    row = col = 0
+    position = 0
+    # Завершающая команда нужна, чтобы напечатать хвост вывода
+    for match in ESCAPE.finditer(output + '\x1b[H'):
+        for char in output[position:match.start()]:
+            if char == '\n':
+                row, col = row + 1, 0
+                continue
+            lines.extend([''] * (row + 1 - len(lines)))
+            line = lines[row].ljust(col)
+            lines[row] = line[:col] + char + line[col + 1:]
+            col += 1
+        position = match.end()
+        code = match.group(0)
+        lines.extend([''] * (row + 1 - len(lines)))
+        if match.group(1):
+            row, col = int(match.group(1)) - 1, int(match.group(2)) - 1
+        elif code.endswith('2J'):
+            lines = list()
+        elif code.endswith('H'):
+            row = col = 0
+        elif code.endswith('K'):
+            lines[row] = lines[row][:col]
+        else:
+            lines[row] = lines[row][:col]
+            del lines[row + 1:]
+    return lines
+
+
+def test_ansi_diffs_rebuild_every_frame():
+    stream = io.StringIO()
+    renderer = Renderer(stream, ansi=True)
+    board = Game.random_board(BitBoard, 8, 7, [3, 2, 1], RandomStream(3))
+    board.get_ready()
+    rng = Random(3)
+    cells = [Dot(x, y) for y in range(7) for x in range(8)]
+    rng.shuffle(cells)
+    for dot in cells[:30]:
+        board.fire(dot)
+        frame = board.render()
+        renderer.draw(frame)
+        lines = screen(stream.getvalue())
+        while lines and not lines[-1]:
+            lines.pop()
+        assert lines == frame.rstrip('\n').split('\n')
+
+
+def test_plain_mode_writes_whole_frames():
+    stream = io.StringIO()
+    renderer = Renderer(stream)
+    renderer.draw('a\n')
+    renderer.draw('b\n')
+    assert stream.getvalue() == 'a\nb\n'
+
+
+def test_hidden_board_hides_live_ships():
+    board = Board(10, 12, [2])
+    board.add_ship(Ship(2, Dot(0, 0), 0))
+    assert '■' in board.render()
+    board.is_hidden = True
+    assert '■' not in board.render()
+    lines = board.render().split('\n')
+    # Подписи двузначных строк и столбцов выровнены
+    assert lines[0].startswith('  X|  1  2')
+    assert lines[13].startswith('12 |')
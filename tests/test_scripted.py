@@ -0,0 +1,14 @@
+import io
+
+from scripted import read_scripts, run_scripts
+
+
+def test_bad_seed_line_is_a_script_error():
+    scripts = 'seed 7\n1 1\n\nseed x\n1 1\n\nseed\n1 1\n\nseed 1 2\n1 1\n'
+    assert [seed for seed, _ in read_scripts(io.StringIO(scripts))] == \
+        [7, None, None, None]
+    output = io.StringIO()
+    assert sum(run_scripts(io.StringIO(scripts), output)) == 4
+    errors = [line.split('errors=')[1].split()[0]
+              for line in output.getvalue().splitlines()]
+    assert errors == ['0', '1', '1', '1']
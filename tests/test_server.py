@@ -0,0 +1,62 @@
+import asyncio
+
+from server import LINE_LIMIT, LINE_TOO_LONG, GameServer
+
+
+async def sessions_after_stuck_client(idle_timeout: float,
+                                      wait: float) -> tuple[int, int]:
+    """
+    Подключает клиента, который шлёт команды "board", но не читает
+    ответы, и возвращает количество игр сервера до и после ожидания.
+    """
+
+    game_server = GameServer(idle_timeout=idle_timeout, pace=0)
+    server = await asyncio.start_server(game_server.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    # Маленький буфер клиента: прочитав его, клиент перестаёт читать сокет
+    reader, writer = await asyncio.open_connection('127.0.0.1', port,
+                                                   limit=1024)
+    writer.write(b'board\n' * 20000)
+    await writer.drain()
+    await asyncio.sleep(0.5)
+    before = game_server.sessions
+    await asyncio.sleep(wait)
+    after = game_server.sessions
+    writer.transport.abort()
+    server.close()
+    await server.wait_closed()
+    return before, after
+
+
+def test_client_that_never_reads_is_evicted():
+    before, after = asyncio.run(sessions_after_stuck_client(1.0, 3.0))
+    assert before == 1
+    assert after == 0
+
+
+async def replies_to_long_line(size: int) -> str:
+    """
+    Присылает серверу строку длиной size байт, затем команды "board"
+    и "quit", и возвращает весь вывод сервера.
+    """
+
+    game_server = GameServer(pace=0)
+    server = await asyncio.start_server(game_server.handle, '127.0.0.1', 0,
+                                        limit=LINE_LIMIT)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b'\n' + b'7' * size + b'\nboard\nquit\n')
+    await writer.drain()
+    output = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return output.decode()
+
+
+def test_long_line_is_dropped_with_reply():
+    output = asyncio.run(replies_to_long_line(LINE_LIMIT * 40))
+    assert output.count(LINE_TOO_LONG) == 1
+    # Игра продолжилась: после длинной строки выполнена команда "board"
+    assert output.rindex('Доска пользователя') > output.index(LINE_TOO_LONG)
+    assert 'Внимательнее' not in output
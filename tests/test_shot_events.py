@@ -0,0 +1,33 @@
+import io
+import json
+
+from main import DensityAI
+from scripted import run_scripts
+from shot_events import ShotLogger
+
+
+def test_shared_log_splits_into_games(tmp_path):
+    path = tmp_path / 'shots.jsonl'
+    moves = '\n'.join(f'{x} {y}' for y in range(1, 9) for x in range(1, 9))
+    scripts = '\n\n'.join(f'seed {seed}\n{moves}' for seed in (1, 2, 3))
+    with ShotLogger(str(path), batch=7) as logger:
+        run_scripts(io.StringIO(scripts), io.StringIO(), ai_class=DensityAI,
+                    width=8, height=8, ships_types=[4, 3, 2, 1],
+                    subscribers=[logger])
+    games = dict()
+    for line in path.read_text(encoding='utf-8').splitlines():
+        entry = json.loads(line)
+        game, side = entry['board'].split(':')
+        games.setdefault(game, dict()).setdefault(side, list()).append(entry)
+    assert sorted(games) == ['1', '2', '3']
+    for boards in games.values():
+        assert set(boards) == {'user', 'ai'}
+        for entries in boards.values():
+            hits = {entry['cell'] for entry in entries
+                    if entry['result'] != 'miss'}
+            for entry in entries:
+                if entry['result'] == 'sunk':
+                    # Палубы потопленного корабля - подбитые клетки этой доски
+                    assert entry['cell'] in entry['ship']
+                    assert set(entry['ship']) <= hits
+                    assert not set(entry['ship']) & set(entry['halo'])
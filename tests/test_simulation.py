@@ -0,0 +1,51 @@
+from heatmaps import collect
+from layouts import stream_placements
+from main import SHIPS_TYPES, BitBoard, RandomStream, ship_placements
+from simulation import play_game, play_games, simulate
+
+
+def test_set_ships_matches_add_ship():
+    streams = [RandomStream(seed) for seed in range(50)]
+    for layout in stream_placements(streams).tolist():
+        masks = [ship_placements(length)[index][0]
+                 for length, index in zip(SHIPS_TYPES, layout)]
+        loaded = BitBoard()
+        loaded.set_ships(masks)
+        # add_ship отвергнет соприкасающиеся корабли
+        built = BitBoard()
+        for ship in loaded.ships:
+            built.add_ship(ship)
+        built.get_ready()
+        assert loaded._ship_masks == built._ship_masks
+        assert loaded._ship_at == built._ship_at
+        assert loaded._ships == built._ships
+        assert loaded.state() == built.state()
+
+
+def test_layout_depends_only_on_its_stream():
+    alone = stream_placements([RandomStream(5)])
+    together = stream_placements([RandomStream(seed) for seed in range(10)])
+    assert (alone[0] == together[5]).all()
+
+
+def test_games_replay_by_seed():
+    results = simulate(30, seed=3)
+    assert [play_game(result.seed) for result in results] == results
+    assert [result for _, result in play_games(12, 5, 3)] == results[12:17]
+
+
+def test_other_board_sizes():
+    fleet = [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]
+    results = simulate(20, seed=1, width=10, height=10, ships_types=fleet)
+    assert play_game(results[7].seed, 10, 10, fleet) == results[7]
+    decks = sum(fleet)
+    for result in results:
+        hits = [cell for cell, hit in result.shots if hit]
+        assert decks <= len(hits) < 2 * decks
+
+
+def test_heatmaps_collect_plays_simulate_games():
+    heatmaps = collect(0, 10, 9)
+    shots = sum(result.moves for result in simulate(10, seed=9))
+    assert heatmaps.games == 10
+    assert int(heatmaps.shots.sum()) == shots
@@ -0,0 +1,132 @@
+import json
+from math import sqrt
+from zlib import crc32
+from random import Random
+
+import pytest
+
+import tournament as tournament_module
+from main import AI, Dot
+from tournament import (ALPHA, Tournament, is_decided, play_batch,
+                        play_match, sequential_test)
+
+
+def run_pair(rate: float, rng: Random, batch: int = 50,
+             min_games: int = 200, max_games: int = 10000) -> dict:
+    """
+    Играет пару пачками, как Tournament.run, с долей побед первой
+    стратегии rate вместо настоящих партий.
+    """
+
+    stats = {'games': 0, 'wins': 0}
+    while stats['games'] < max_games and not is_decided(stats, min_games):
+        stats['games'] += batch
+        stats['wins'] += sum(rng.random() < rate for _ in range(batch))
+    return stats
+
+
+def test_equal_strategies_false_decision_rate():
+    rng = Random(1)
+    runs = 2000
+    decided = sum(sequential_test(run_pair(0.5, rng)) in (1, -1)
+                  for _ in range(runs))
+    rate = decided / runs
+    assert rate <= ALPHA + 3 * sqrt(ALPHA * (1 - ALPHA) / runs)
+
+
+def test_stronger_strategy_is_found():
+    rng = Random(2)
+    results = [sequential_test(run_pair(0.6, rng)) for _ in range(200)]
+    assert results.count(1) >= 190
+    assert -1 not in results
+
+
+def test_tournament_equal_strategies(tmp_path):
+    tournament = Tournament(['AI', 'AI'], str(tmp_path / 'results.json'),
+                            batch=50, min_games=100, max_games=400)
+    result = tournament.run(workers=1)['AI vs AI']
+    assert result['decision'] in (0, None)
+    assert result['games'] <= 400
+
+
+class StubbornAI(AI):
+    """
+    Компьютер, который всё время стреляет в одну и ту же клетку.
+    """
+
+    def choose(self) -> Dot:
+        return Dot(0, 0)
+
+
+def test_stubborn_strategy_forfeits():
+    winner, moves, forfeit = play_match((StubbornAI, AI), 6, 6, [3, 2, 1],
+                                        seed=5)
+    assert forfeit
+    assert winner == 1
+    winner, _, forfeit = play_match((AI, AI), 6, 6, [3, 2, 1], seed=5)
+    assert not forfeit
+
+
+def test_results_do_not_depend_on_workers_or_resume(tmp_path):
+    def run(path: str, max_games: int, workers: int) -> dict:
+        tournament = Tournament(['AI', 'DensityAI'], path, batch=20,
+                                min_games=200, max_games=max_games, seed=3)
+        tournament.run(workers=workers)
+        return tournament.results['AI vs DensityAI']
+
+    single = run(str(tmp_path / 'single.json'), 200, 1)
+    assert single['games'] == 200 and single['next_batch'] == 10
+    assert run(str(tmp_path / 'pool.json'), 200, 3) == single
+    # Прерванный на 100 партиях турнир продолжается с 6-й пачки
+    resumed = str(tmp_path / 'resumed.json')
+    assert run(resumed, 100, 2)['next_batch'] == 5
+    assert run(resumed, 200, 2) == single
+
+
+# Начальное значение пачки, на которой прерывается турнир
+BROKEN_SEED = crc32(b'3:AI vs DensityAI:7')
+
+
+def broken_batch(names, games, seed, *args) -> dict:
+    """
+    Разыгрывает пачку, как play_batch, но падает в конце пачки номер 7,
+    когда остальные пачки уже выданы в работу.
+    """
+
+    stats = play_batch(names, games, seed, *args)
+    if seed == BROKEN_SEED:
+        raise RuntimeError('пачка прервана')
+    return stats
+
+
+def test_interrupted_run_resumes_from_persisted_batches(tmp_path,
+                                                        monkeypatch):
+    def run(path: str, workers: int) -> dict:
+        tournament = Tournament(['AI', 'DensityAI'], path, batch=20,
+                                min_games=200, max_games=200, seed=3)
+        tournament.run(workers=workers)
+        return tournament.results['AI vs DensityAI']
+
+    path = str(tmp_path / 'results.json')
+    monkeypatch.setattr(tournament_module, 'play_batch', broken_batch)
+    with pytest.raises(RuntimeError):
+        run(path, 4)
+    monkeypatch.undo()
+    with open(path, encoding='utf-8') as file:
+        saved = json.load(file)['results']['AI vs DensityAI']
+    # В файле учтены только пачки до прерванной, как бы ни шли остальные
+    assert saved['next_batch'] <= 7
+    assert saved['games'] == 20 * saved['next_batch']
+    assert run(path, 4) == run(str(tmp_path / 'fresh.json'), 1)
+
+
+def test_resume_with_other_settings_is_rejected(tmp_path):
+    path = str(tmp_path / 'results.json')
+    Tournament(['AI', 'AI'], path, batch=10, min_games=10,
+               max_games=10).run(workers=1)
+    Tournament(['AI', 'AI'], path, batch=10, max_games=20)
+    for changes in ({'batch': 20}, {'seed': 1}, {'width': 7},
+                    {'ships_types': [3, 2, 1]},
+                    {'options': {'time_budget': 0.1}}):
+        with pytest.raises(ValueError, match=next(iter(changes))):
+            Tournament(['AI', 'AI'], path, **dict({'batch': 10}, **changes))
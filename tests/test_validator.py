@@ -0,0 +1,69 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from main import Board, BoardWrongShipException, Dot, Game, RandomStream, Ship
+from records import board_ships
+from validator import (OUT, TOUCH, VALID, WRONG_FLEET, pack_layouts,
+                       validate, validate_bytes)
+
+FLEET = [3, 2, 2, 1, 1, 1, 1]
+
+
+def board_verdict(layout: list[tuple[int, int, int]], width: int,
+                  height: int) -> tuple[int, int]:
+    """
+    Ставит корабли расстановки на Board по очереди и возвращает
+    результат проверки и номер первого отвергнутого корабля.
+    """
+
+    board = Board(width, height, FLEET)
+    for number, (bow, length, direction) in enumerate(layout):
+        ship = Ship(length, Dot(bow % width, bow // width), direction)
+        try:
+            board.add_ship(ship)
+        except BoardWrongShipException:
+            if any(board.out(dot) for dot in ship.dots):
+                return OUT, number
+            return TOUCH, number
+    return VALID, -1
+
+
+@pytest.mark.parametrize('width, height', [(6, 6), (9, 7)])
+def test_validate_matches_board_add_ship(width, height):
+    rng = Random(width)
+    layouts = list()
+    # Настоящие расстановки и случайные корабли флота в случайном порядке
+    for seed in range(50):
+        board = Game.random_board(Board, width, height, FLEET,
+                                  RandomStream(seed))
+        layouts.append(list(board_ships(board)))
+    for _ in range(2000):
+        lengths = rng.sample(FLEET, len(FLEET))
+        layouts.append([(rng.randrange(width * height), length,
+                         rng.randrange(2)) for length in lengths])
+    result = validate(np.array(layouts), FLEET, width, height)
+    for number, layout in enumerate(layouts):
+        verdict = board_verdict(layout, width, height)
+        assert (int(result.errors[number]),
+                int(result.ships[number])) == verdict, layout
+    assert result.valid[:50].all()
+    assert {OUT, TOUCH} <= set(result.errors.tolist())
+    assert np.array_equal(validate_bytes(pack_layouts(layouts), FLEET,
+                                         width, height).errors,
+                          result.errors)
+
+
+def test_wrong_fleet_and_bad_fields():
+    good = [(0, 3, 0), (12, 2, 0), (16, 2, 0), (24, 1, 0), (26, 1, 0),
+            (28, 1, 0), (5, 1, 0)]
+    extra = [(0, 3, 0), (12, 3, 0)] + good[2:]
+    direction = good[:6] + [(5, 1, 2)]
+    bow = good[:6] + [(36, 1, 0)]
+    result = validate(np.array([good, extra, direction, bow]), FLEET, 6, 6)
+    assert result.errors.tolist() == [VALID, WRONG_FLEET, OUT, OUT]
+    assert result.ships.tolist() == [-1, 1, 6, 6]
+    assert result.message(1).startswith('Корабль 1:')
+    with pytest.raises(ValueError):
+        validate(np.array([good[:6]]), FLEET, 6, 6)
@@ -0,0 +1,459 @@
+import argparse
+import importlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations
+from math import log, sqrt
+from time import perf_counter
+from typing import Optional
+from zlib import crc32
+
+from main import (AI, BOARD_SIZE, MISS, SHIPS_TYPES, BitBoard, BoardException,
+                  Game, RandomStream, derive_seed)
+
+
+# Квантиль нормального распределения для 95% доверительных интервалов
+Z = 1.96
+# Параметры последовательного теста исхода пары по умолчанию:
+# отличие доли побед от 0.5, которое нужно обнаружить, вероятность
+# ошибочно объявить победителя при равных стратегиях и вероятность
+# пропустить отличие delta
+DELTA, ALPHA, BETA = 0.05, 0.05, 0.1
+# Сколько неудачных выстрелов подряд на клетку доски разрешено
+# стратегии, прежде чем ей засчитывается поражение (см. play_match)
+RETRIES_PER_CELL = 64
+# Параметры турнира, которые хранятся в файле результатов:
+# с другими значениями продолжить турнир нельзя
+SETTINGS = ('seed', 'width', 'height', 'ships_types', 'batch', 'options')
+
+
+def load_strategy(name: str) -> type[AI]:
+    """
+    Возвращает класс игрока-компьютера по имени:
+    'AI', 'DensityAI' или 'модуль:Класс' (например, 'montecarlo:MonteCarloAI').
+    """
+
+    module, _, cls = name.rpartition(':')
+    return getattr(importlib.import_module(module or 'main'), cls)
+
+
+def play_match(strategies: tuple[type[AI], type[AI]],
+               width: int = BOARD_SIZE,
+               height: int = BOARD_SIZE,
+               ships_types: list[int] = SHIPS_TYPES,
+               options: Optional[dict] = None,
+               seed: Optional[int] = None) -> tuple[int, int, bool]:
+    """
+    Разыгрывает одну партию двух компьютеров без вывода в консоль и пауз.
+    Первым ходит strategies[0]. Выбор хода делается методом choose(),
+    неудачные выстрелы повторяются, как в Player.move, но не больше
+    RETRIES_PER_CELL * width * height раз подряд: стратегии, которая
+    всё время выбирает уже обстрелянные клетки или клетки вне доски,
+    засчитывается поражение.
+    Атрибуты options выставляются игрокам, у которых они есть.
+    Расстановки и ходы берутся из потока случайных чисел с начальным
+    значением seed (ходы стратегий, ограниченных временем, зависят
+    ещё и от скорости машины).
+    Возвращает номер победителя, количество удачных выстрелов
+    и True, если проигравшему засчитано поражение.
+    """
+
+    rng = RandomStream(seed)
+    boards = list()
+    for _ in range(2):
+        board = Game.random_board(BitBoard, width, height, ships_types, rng)
+        board.get_ready()
+        boards.append(board)
+    players = [strategies[0](boards[0], boards[1], rng),
+               strategies[1](boards[1], boards[0], rng)]
+    for player in players:
+        for key, value in (options or {}).items():
+            if hasattr(player, key):
+                setattr(player, key, value)
+    moves = 0
+    turn = 0
+    retries = 0
+    while True:
+        player = players[turn]
+        dot = player.choose()
+        try:
+            result = player.opponent_board.fire(dot)
+        except BoardException:
+            retries += 1
+            if retries > RETRIES_PER_CELL * width * height:
+                return 1 - turn, moves, True
+            continue
+        retries = 0
+        moves += 1
+        player.learn(dot, result)
+        if player.opponent_board.live_ships == 0:
+            return turn, moves, False
+        if result == MISS:
+            turn = 1 - turn
+
+
+def play_batch(names: tuple[str, str], games: int, seed: int,
+               width: int, height: int, ships_types: list[int],
+               options: dict) -> dict[str, float]:
+    """
+    Разыгрывает games партий пары стратегий, чередуя право первого хода.
+    Выполняется в процессе пула, поэтому стратегии передаются по именам,
+    а генерация расстановок внутри игроков идёт в одном процессе.
+    Партия номер i играется с начальным значением derive_seed(seed, i).
+    Возвращает количество партий, побед первой стратегии,
+    сумму и сумму квадратов длин партий и количество партий,
+    закончившихся поражением за неудачные выстрелы.
+    """
+
+    strategies = (load_strategy(names[0]), load_strategy(names[1]))
+    options = dict(options, workers=1)
+    stats = {'games': 0, 'wins': 0, 'moves': 0, 'moves_sq': 0, 'forfeits': 0}
+    for game in range(games):
+        # В нечётных партиях первой ходит вторая стратегия
+        first = game % 2
+        winner, moves, forfeit = play_match(
+            (strategies[first], strategies[1 - first]), width, height,
+            ships_types, options, derive_seed(seed, game))
+        stats['games'] += 1
+        stats['wins'] += winner == first
+        stats['forfeits'] += forfeit
+        stats['moves'] += moves
+        stats['moves_sq'] += moves * moves
+    return stats
+
+
+def summary(stats: dict[str, float]) -> dict[str, float]:
+    """
+    Возвращает долю побед первой стратегии пары с 95% интервалом Уилсона
+    и среднюю длину партии с 95% доверительным интервалом.
+    """
+
+    n = stats['games']
+    if not n:
+        return {'games': 0}
+    rate = stats['wins'] / n
+    centre = (rate + Z * Z / (2 * n)) / (1 + Z * Z / n)
+    spread = Z * sqrt(rate * (1 - rate) / n + Z * Z / (4 * n * n)) / \
+        (1 + Z * Z / n)
+    mean = stats['moves'] / n
+    variance = max(0.0, stats['moves_sq'] / n - mean * mean)
+    margin = Z * sqrt(variance / n)
+    return {
+        'games': n,
+        'win_rate': rate,
+        'win_rate_low': centre - spread,
+        'win_rate_high': centre + spread,
+        'mean_moves': mean,
+        'mean_moves_low': mean - margin,
+        'mean_moves_high': mean + margin,
+        'forfeits': stats.get('forfeits', 0),
+    }
+
+
+def sequential_test(stats: dict[str, float],
+                    delta: float = DELTA,
+                    alpha: float = ALPHA,
+                    beta: float = BETA) -> Optional[int]:
+    """
+    Последовательный тест отношения правдоподобия (SPRT) для доли
+    побед первой стратегии пары. Гипотеза равенства p = 0.5 проверяется
+    двумя односторонними тестами против p = 0.5 + delta и p = 0.5 - delta.
+    Верхняя граница log(2 / alpha): отношение правдоподобия при равных
+    стратегиях - мартингал, поэтому по неравенству Вилля каждый тест
+    хотя бы раз пересечёт её с вероятностью не больше alpha / 2,
+    сколько бы раз ни проверяли исход. Значит, вероятность объявить
+    победителя среди равных стратегий не больше alpha при любом
+    расписании проверок. Нижняя граница log(beta / (1 - alpha / 2)).
+    Возвращает 1, если сильнее первая стратегия, -1 - если вторая,
+    0, если отличие меньше delta (стратегии равны), и None,
+    если партий для решения пока мало.
+    """
+
+    wins = stats['wins']
+    losses = stats['games'] - wins
+    upper = log(2 / alpha)
+    lower = log(beta / (1 - alpha / 2))
+    # Логарифмы отношения правдоподобия для p = 0.5 ± delta против 0.5
+    better = wins * log(1 + 2 * delta) + losses * log(1 - 2 * delta)
+    worse = wins * log(1 - 2 * delta) + losses * log(1 + 2 * delta)
+    if better >= upper:
+        return 1
+    if worse >= upper:
+        return -1
+    if better <= lower and worse <= lower:
+        return 0
+    return None
+
+
+def is_decided(stats: dict[str, float], min_games: int,
+               delta: float = DELTA, alpha: float = ALPHA,
+               beta: float = BETA) -> bool:
+    """
+    Проверяет, что исход пары решён последовательным тестом
+    (см. sequential_test): сыграно не меньше min_games партий и тест
+    выбрал победителя или признал стратегии равными.
+    """
+
+    if stats['games'] < min_games:
+        return False
+    return sequential_test(stats, delta, alpha, beta) is not None
+
+
+class Tournament():
+    """
+    Класс для представления кругового турнира стратегий компьютера.
+    Партии каждой пары играются пачками в пуле процессов; пара
+    снимается с турнира, как только её исход решён последовательным
+    тестом (см. sequential_test) или сыграно max_games партий.
+    Тест проверяется после каждой пачки, но вероятность объявить
+    победителя среди равных стратегий всё равно не больше alpha.
+    Результаты пачек учитываются по порядку их номеров, поэтому итоги
+    не зависят от числа процессов. После каждой учтённой пачки
+    результаты записываются в файл, и прерванный турнир продолжается
+    с первой неучтённой пачки.
+
+    Атрибуты
+    --------
+    names : list
+        Имена стратегий (см. load_strategy).
+    path : str
+        Файл результатов (или None).
+    batch : int
+        Количество партий в одной задаче пула.
+    min_games : int
+        Минимальное количество партий пары до проверки исхода.
+    max_games : int
+        Максимальное количество партий пары.
+    seed : int
+        Начальное значение для случайных чисел пачек.
+    delta : float
+        Отличие доли побед от 0.5, которое должен обнаружить тест.
+    alpha : float
+        Вероятность объявить победителя среди равных стратегий.
+    beta : float
+        Вероятность признать равными стратегии, доля побед
+        которых отличается от 0.5 на delta.
+    options : dict
+        Атрибуты, выставляемые игрокам (например, time_budget).
+    results : dict
+        Для каждой пары "A vs B" счётчики партий и номер
+        первой неучтённой пачки.
+
+    Методы
+    --------
+    pairs():
+        Возвращает все пары стратегий.
+    settings():
+        Возвращает параметры турнира, которые хранятся в файле.
+    save():
+        Записывает результаты в файл.
+    summary():
+        Возвращает итоги по парам с решением последовательного теста.
+    run(workers=None):
+        Проводит турнир и возвращает итоги по парам.
+    """
+
+    def __init__(self, names: list[str], path: Optional[str] = None,
+                 batch: int = 50, min_games: int = 200,
+                 max_games: int = 10000, seed: int = 0,
+                 width: int = BOARD_SIZE, height: int = BOARD_SIZE,
+                 ships_types: list[int] = SHIPS_TYPES,
+                 options: Optional[dict] = None,
+                 delta: float = DELTA, alpha: float = ALPHA,
+                 beta: float = BETA) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта Tournament.
+        Если файл результатов уже есть, турнир продолжается с него;
+        если он записан с другими параметрами SETTINGS (начальным
+        значением, доской, флотом, размером пачки или атрибутами
+        игроков), выбрасывается ValueError.
+        """
+
+        self.names = names
+        self.path = path
+        self.batch = batch
+        self.min_games = min_games
+        self.max_games = max_games
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.ships_types = list(ships_types)
+        self.options = options or {}
+        self.delta = delta
+        self.alpha = alpha
+        self.beta = beta
+        self.results = dict()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+            saved = report.get('settings', {})
+            current = self.settings()
+            changed = [name for name in SETTINGS
+                       if saved.get(name) != current[name]]
+            if changed:
+                raise ValueError(f'Турнир в файле {path} начат с другими '
+                                 f'параметрами: {", ".join(changed)}.')
+            self.results = report['results']
+        for first, second in self.pairs():
+            self.results.setdefault(f'{first} vs {second}', {
+                'games': 0, 'wins': 0, 'moves': 0, 'moves_sq': 0,
+                'forfeits': 0, 'next_batch': 0})
+
+    def pairs(self) -> list[tuple[str, str]]:
+        """
+        Возвращает все пары стратегий.
+        """
+
+        return list(combinations(self.names, 2))
+
+    def settings(self) -> dict:
+        """
+        Возвращает параметры турнира, которые хранятся в файле
+        результатов (см. SETTINGS), в том виде, в каком их читает json.
+        """
+
+        return json.loads(json.dumps({name: getattr(self, name)
+                                      for name in SETTINGS}))
+
+    def save(self) -> None:
+        """
+        Записывает результаты в файл (целиком, через временный файл).
+        """
+
+        if not self.path:
+            return
+        report = {'settings': self.settings(),
+                  'results': self.results,
+                  'summary': self.summary()}
+        temp = f'{self.path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def _finished(self, key: str) -> bool:
+        stats = self.results[key]
+        return stats['games'] >= self.max_games or \
+            is_decided(stats, self.min_games, self.delta, self.alpha,
+                       self.beta)
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Возвращает итоги по парам; decision - результат
+        последовательного теста (см. sequential_test).
+        """
+
+        report = dict()
+        for key, stats in self.results.items():
+            report[key] = summary(stats)
+            if stats['games']:
+                report[key]['decision'] = sequential_test(
+                    stats, self.delta, self.alpha, self.beta) \
+                    if stats['games'] >= self.min_games else None
+        return report
+
+    def run(self, workers: Optional[int] = None) -> dict[str, dict]:
+        """
+        Проводит турнир и возвращает итоги по парам.
+        Чтобы пул был загружен полностью, у него в работе
+        всегда вдвое больше пачек, чем процессов.
+        """
+
+        workers = workers or os.cpu_count() or 1
+        pairs = {f'{first} vs {second}': (first, second)
+                 for first, second in self.pairs()}
+        # Сколько партий каждой пары выдано в работу, но ещё не учтено
+        pending = {key: 0 for key in pairs}
+        # Номер следующей выдаваемой пачки каждой пары
+        issued = {key: self.results[key]['next_batch'] for key in pairs}
+        # Готовые пачки, которые ждут учёта предыдущих по номеру
+        ready = {key: dict() for key in pairs}
+        with ProcessPoolExecutor(workers) as pool:
+            futures = dict()
+            while True:
+                # Выдаём пачки нерешённым парам по очереди
+                active = [key for key in pairs if not self._finished(key) and
+                          self.results[key]['games'] + pending[key]
+                          < self.max_games]
+                while active and len(futures) < 2 * workers:
+                    for key in list(active):
+                        if len(futures) >= 2 * workers:
+                            break
+                        number = issued[key]
+                        issued[key] += 1
+                        # Пачка с тем же номером после возобновления
+                        # играется с тем же начальным значением
+                        seed = crc32(f'{self.seed}:{key}:{number}'.encode())
+                        future = pool.submit(
+                            play_batch, pairs[key], self.batch, seed,
+                            self.width, self.height, self.ships_types,
+                            self.options)
+                        futures[future] = key, number
+                        pending[key] += self.batch
+                        if (self.results[key]['games'] + pending[key] >=
+                                self.max_games):
+                            active.remove(key)
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, number = futures.pop(future)
+                    ready[key][number] = future.result()
+                    stats = self.results[key]
+                    # Учитываем пачки по порядку номеров: номер первой
+                    # неучтённой пачки в файле растёт, только когда
+                    # результаты всех пачек до неё уже записаны
+                    while stats['next_batch'] in ready[key]:
+                        result = ready[key].pop(stats['next_batch'])
+                        stats['next_batch'] += 1
+                        pending[key] -= self.batch
+                        if self._finished(key):
+                            # Исход уже решён - лишние пачки не учитываем
+                            continue
+                        for name, value in result.items():
+                            stats[name] += value
+                self.save()
+        return self.summary()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Круговой турнир стратегий компьютера.')
+    parser.add_argument('strategies', nargs='+',
+                        help="имена стратегий: AI, DensityAI "
+                             "или модуль:Класс")
+    parser.add_argument('--out', default=None,
+                        help='файл результатов; если он есть, '
+                             'турнир продолжается с него')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--min-games', type=int, default=200)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--alpha', type=float, default=ALPHA,
+                        help='вероятность объявить победителя '
+                             'среди равных стратегий')
+    parser.add_argument('--delta', type=float, default=DELTA,
+                        help='отличие доли побед от 0.5, '
+                             'которое нужно обнаружить')
+    parser.add_argument('--time-budget', type=float, default=0.05,
+                        help='время на ход для стратегий с time_budget')
+    args = parser.parse_args()
+
+    start = perf_counter()
+    tournament = Tournament(args.strategies, args.out, args.batch,
+                            args.min_games, args.max_games, args.seed,
+                            options={'time_budget': args.time_budget},
+                            delta=args.delta, alpha=args.alpha)
+    decisions = {1: 'сильнее первая', -1: 'сильнее вторая', 0: 'равны',
+                 None: 'не решено'}
+    for key, result in tournament.run(args.workers).items():
+        if not result['games']:
+            continue
+        print(f"{key}: партий {result['games']}, побед первой "
+              f"{result['win_rate']:.1%} [{result['win_rate_low']:.1%}, "
+              f"{result['win_rate_high']:.1%}], выстрелов "
+              f"{result['mean_moves']:.1f} ± "
+              f"{result['mean_moves'] - result['mean_moves_low']:.1f}, "
+              f"{decisions[result['decision']]}")
+    print(f'Время: {perf_counter() - start:.1f} с')
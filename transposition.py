@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, TypeVar
+
+import main
+
+
+T = TypeVar('T')
+
+
+class TranspositionCache():
+    """
+    Класс для представления кеша оценок позиций ограниченного размера.
+    Ключи - видимые состояния досок (BoardState, см. Board.state())
+    или кортежи из них и других параметров оценки. Когда в кеше
+    больше size записей, вытесняется та, к которой дольше всего
+    не обращались, поэтому повторяющиеся в разных партиях и поисках
+    позиции оцениваются один раз, а память ограничена.
+
+    Атрибуты
+    --------
+    size : int
+        Максимальное количество записей.
+    hits : int
+        Количество найденных в кеше оценок.
+    misses : int
+        Количество оценок, которых в кеше не было.
+    _entries : OrderedDict
+        Записи в порядке обращения, последняя - самая свежая.
+
+    Методы
+    --------
+    get(Hashable):
+        Возвращает оценку позиции или None, если её нет в кеше.
+    put(Hashable, object):
+        Запоминает оценку позиции.
+    lookup(Hashable, Callable):
+        Возвращает оценку позиции, вычисляя её функцией,
+        если её нет в кеше.
+    clear():
+        Очищает кеш.
+    """
+
+    def __init__(self, size: int = 1 << 16) -> None:
+        """
+        Устанавливает все необходимые атрибуты для объекта TranspositionCache.
+        """
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество позиций в кеше.
+        """
+
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Проверяет, есть ли позиция в кеше, не считая попадания и промахи.
+        """
+
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """
+        Возвращает оценку позиции или None, если её нет в кеше.
+        """
+
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            if main.instrument is not None:
+                main.instrument.count('cache.miss')
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if main.instrument is not None:
+            main.instrument.count('cache.hit')
+        return value
+
+    def put(self, key: Hashable, value: object) -> None:
+        """
+        Запоминает оценку позиции (None не запоминается),
+        вытесняя самую старую запись, если кеш заполнен.
+        """
+
+        if value is None:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def lookup(self, key: Hashable, evaluate: Callable[[], T]) -> T:
+        """
+        Возвращает оценку позиции, а если её нет в кеше -
+        вычисляет функцией evaluate и запоминает.
+        """
+
+        value = self.get(key)
+        if value is None:
+            value = evaluate()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """
+        Очищает кеш.
+        """
+
+        self._entries.clear()
@@ -0,0 +1,222 @@
+import argparse
+import sys
+from functools import lru_cache
+from time import perf_counter
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+from layouts import pack_masks
+from main import BOARD_SIZE, SHIPS_TYPES, ship_placements
+from records import SHIP
+
+
+# Результаты проверки расстановки: верная, флот не совпадает
+# с SHIPS_TYPES, корабль за пределами доски (или с неверным
+# направлением), корабль касается ранее поставленного или его ореола
+VALID, WRONG_FLEET, OUT, TOUCH = 0, 1, 2, 3
+# Сообщения о результатах проверки; {ship} - номер корабля с 0
+LAYOUT_MESSAGES = {
+    VALID: 'Расстановка верна.',
+    WRONG_FLEET: 'Корабль {ship}: такой длины нет во флоте '
+                 'или таких кораблей слишком много.',
+    OUT: 'Корабль {ship}: выходит за пределы поля.',
+    TOUCH: 'Корабль {ship}: касается другого корабля.',
+}
+
+
+class ValidationResult(NamedTuple):
+    """
+    Класс для представления результатов проверки набора расстановок.
+
+    Атрибуты
+    --------
+    errors : np.ndarray
+        Для каждой расстановки VALID, WRONG_FLEET, OUT или TOUCH.
+    ships : np.ndarray
+        Для каждой расстановки номер первого нарушающего правила
+        корабля в ней (с 0) или -1, если расстановка верна.
+    """
+
+    errors: np.ndarray
+    ships: np.ndarray
+
+    @property
+    def valid(self) -> np.ndarray:
+        """
+        Возвращает массив bool: True для верных расстановок.
+        """
+
+        return self.errors == VALID
+
+    def message(self, layout: int) -> str:
+        """
+        Возвращает сообщение о результате проверки расстановки номер layout.
+        """
+
+        return LAYOUT_MESSAGES[int(self.errors[layout])].format(
+            ship=int(self.ships[layout]))
+
+
+@lru_cache(maxsize=None)
+def placement_table(lengths: tuple[int, ...], width: int = BOARD_SIZE,
+                    height: int = BOARD_SIZE) -> tuple[
+        np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Строит таблицы всех положений кораблей данных длин на доске.
+    Возвращает массив номеров положений формы
+    (width * height, max(lengths) + 1, 2), индексируемый номером клетки
+    носа, длиной и направлением (-1 - такого положения на доске нет),
+    и маски палуб и палуб с ореолом каждого положения в виде массивов
+    64-битных слов, как в layouts.py.
+    """
+
+    cells = width * height
+    words = (cells + 63) // 64
+    index = np.full((cells, max(lengths) + 1, 2), -1, dtype=np.int32)
+    masks = list()
+    blocked = list()
+    for length in lengths:
+        placements = ship_placements(length, width, height)
+        for mask, halo, x, y, direction in placements:
+            index[y * width + x, length, direction] = len(masks)
+            # Однопалубный корабль в любом направлении занимает одну клетку
+            if length == 1:
+                index[y * width + x, length, 1] = len(masks)
+            masks.append(mask)
+            blocked.append(halo)
+    return index, pack_masks(masks, words), pack_masks(blocked, words)
+
+
+def validate(ships: np.ndarray,
+             ships_types: list[int] = SHIPS_TYPES,
+             width: int = BOARD_SIZE,
+             height: int = BOARD_SIZE) -> ValidationResult:
+    """
+    Проверяет сразу все расстановки массива ships формы
+    (количество расстановок, len(ships_types), 3), где каждый корабль
+    задан тройкой (номер клетки носа, длина, направление), как в records.py.
+
+    Сначала длины кораблей сверяются с ships_types (порядок кораблей
+    не важен), затем корабли ставятся по очереди сразу на всех досках
+    и, как в Board.add_ship, каждый проверяется на выход за пределы доски
+    и на пересечение с клетками ранее поставленных кораблей и их ореолов.
+    Маски всех положений кораблей вычисляются один раз для размера доски,
+    поэтому проверка сводится к поиску в таблице и операциям над массивами.
+    Для каждой расстановки сообщается первое найденное нарушение.
+    """
+
+    ships = np.asarray(ships, dtype=np.int64)
+    count, fleet = ships.shape[:2]
+    if fleet != len(ships_types):
+        raise ValueError(f'В расстановке должно быть {len(ships_types)} '
+                         f'кораблей.')
+    errors = np.zeros(count, dtype=np.int8)
+    offenders = np.full(count, -1, dtype=np.int16)
+    if not count:
+        return ValidationResult(errors, offenders)
+    bows, lengths, directions = ships[:, :, 0], ships[:, :, 1], ships[:, :, 2]
+
+    # Сверяем длины с флотом: корабли расстановки сортируются по убыванию
+    # длины, и первый несовпавший с флотом корабль считается лишним
+    order = np.argsort(-lengths, axis=1, kind='stable')
+    sorted_lengths = np.take_along_axis(lengths, order, axis=1)
+    mismatch = sorted_lengths != np.array(sorted(ships_types, reverse=True))
+    wrong = mismatch.any(axis=1)
+    first = np.take_along_axis(order, mismatch.argmax(axis=1)[:, None],
+                               axis=1)[:, 0]
+    errors[wrong] = WRONG_FLEET
+    offenders[wrong] = first[wrong]
+
+    index, masks, blocked = placement_table(
+        tuple(sorted(set(ships_types))), width, height)
+    cells, max_length = index.shape[:2]
+    # Номера положений кораблей; значения вне таблицы - положения нет
+    inside = (bows >= 0) & (bows < cells) & (lengths >= 0) & \
+        (lengths < max_length) & ((directions == 0) | (directions == 1))
+    placements = np.where(
+        inside, index[np.where(inside, bows, 0), np.where(inside, lengths, 0),
+                      np.where(inside, directions, 0)], -1)
+    locked = np.zeros((count, masks.shape[1]), dtype=np.uint64)
+    for ship in range(fleet):
+        pending = errors == VALID
+        placement = placements[:, ship]
+        out = pending & (placement < 0)
+        errors[out] = OUT
+        offenders[out] = ship
+        placement = np.maximum(placement, 0)
+        touch = pending & ~out & \
+            (locked & masks[placement]).any(axis=1)
+        errors[touch] = TOUCH
+        offenders[touch] = ship
+        locked |= blocked[placement]
+    return ValidationResult(errors, offenders)
+
+
+def unpack_layouts(data: bytes,
+                   ships_types: list[int] = SHIPS_TYPES) -> np.ndarray:
+    """
+    Распаковывает расстановки из байтов: каждая расстановка -
+    len(ships_types) кораблей подряд в формате records.SHIP.
+    Возвращает массив для validate().
+    Если длина данных не кратна размеру расстановки,
+    выбрасывает ValueError.
+    """
+
+    size = SHIP.size * len(ships_types)
+    if len(data) % size:
+        raise ValueError(f'Размер данных не кратен размеру расстановки '
+                         f'({size} байт).')
+    raw = np.frombuffer(data, dtype='<u4').reshape(-1, len(ships_types))
+    # Поля SHIP '<HBB' - младшие 16 бит, следующие 8 и старшие 8
+    return np.stack((raw & 0xFFFF, (raw >> 16) & 0xFF, raw >> 24),
+                    axis=2).astype(np.int64)
+
+
+def pack_layouts(layouts: Iterable[Iterable[tuple[int, int, int]]]) -> bytes:
+    """
+    Упаковывает расстановки из троек (номер клетки носа, длина,
+    направление), например из records.board_ships, в байты
+    для unpack_layouts().
+    """
+
+    return b''.join(SHIP.pack(*ship) for layout in layouts
+                    for ship in layout)
+
+
+def validate_bytes(data: bytes,
+                   ships_types: list[int] = SHIPS_TYPES,
+                   width: int = BOARD_SIZE,
+                   height: int = BOARD_SIZE) -> ValidationResult:
+    """
+    Проверяет расстановки, упакованные pack_layouts().
+    """
+
+    return validate(unpack_layouts(data, ships_types), ships_types,
+                    width, height)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Проверка расстановок флота, упакованных '
+                    'по кораблям в формате records.SHIP.')
+    parser.add_argument('path', nargs='?', default='-',
+                        help="файл расстановок, '-' - stdin")
+    parser.add_argument('--all', action='store_true',
+                        help='выводить и верные расстановки')
+    args = parser.parse_args()
+
+    if args.path == '-':
+        data = sys.stdin.buffer.read()
+    else:
+        with open(args.path, 'rb') as file:
+            data = file.read()
+    start = perf_counter()
+    result = validate_bytes(data)
+    elapsed = perf_counter() - start
+    for layout in range(len(result.errors)):
+        if args.all or result.errors[layout] != VALID:
+            print(f'{layout}: {result.message(layout)}')
+    print(f'Расстановок: {len(result.errors)}, верных: '
+          f'{int(result.valid.sum())}, время: {elapsed:.3f} с',
+          file=sys.stderr)